@@ -0,0 +1,965 @@
+#!/usr/bin/env python3
+"""
+Poller benchmarks against synthetic simulation logs.
+
+Remote commands are executed by a local bash shim instead of ssh, so the
+numbers measure what the poller asks the remote host to send, without any
+network in the way.
+
+Usage:
+    python bench.py wire [--rows 500000] [--append 10]
+    python bench.py parse [--rows 1000000]
+    python bench.py concurrency [--sims 12] [--workers 4] [--slow 2.0]
+    python bench.py fleet [--hosts 4] [--sims 3] [--down 1] [--window 20]
+    python bench.py breaker [--sims 6] [--cycles 6] [--connect 2.0]
+    python bench.py schedule [--duration 60] [--interval 10] [--idle 6]
+    python bench.py stream [--duration 30] [--interval 10] [--write 1.0]
+    python bench.py collector [--sims 8] [--cycles 10]
+    python bench.py discovery [--sims 4] [--dirs 2000]
+    python bench.py store [--sims 4] [--rows 200000] [--append 100]
+    python bench.py warm [--sims 4] [--rows 200000] [--rtt 0.3]
+    python bench.py memory [--days 14] [--budget-mb 64]
+    python bench.py retention [--days 90] [--rows 500000]
+    python bench.py history [--rows 500000] [--max-points 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import poller
+import store
+
+LOG_HEADER = (
+    '#"Step","Time (ps)","Potential Energy (kJ/mole)","Kinetic Energy (kJ/mole)",'
+    '"Total Energy (kJ/mole)","Temperature (K)","Box Volume (nm^3)","Density (g/mL)",'
+    '"Speed (ns/day)"\n'
+)
+
+
+def write_log(path, rows, start=0, header=True):
+    """Append `rows` synthetic production.log lines starting at row index `start`."""
+    rng = random.Random(start)
+    with open(path, 'a') as f:
+        if header:
+            f.write(LOG_HEADER)
+        for i in range(start, start + rows):
+            f.write(
+                f"{i * 5000},{i * 10.0:.1f},{-512000 + rng.gauss(0, 300):.4f},"
+                f"{92000 + rng.gauss(0, 150):.4f},{-420000 + rng.gauss(0, 300):.4f},"
+                f"{300 + rng.gauss(0, 1.5):.4f},{812.35 + rng.gauss(0, 0.5):.4f},"
+                f"{1.0213 + rng.gauss(0, 0.0005):.4f},{328 + rng.gauss(0, 4):.2f}\n"
+            )
+
+
+class LocalShell:
+    """Stands in for poller.ssh_run: runs the command with local bash and counts stdout bytes."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.calls = 0
+
+    def __call__(self, host, command, timeout=15):
+        result = subprocess.run(['bash', '-c', command], capture_output=True, text=True,
+                                timeout=timeout)
+        self.calls += 1
+        self.bytes += len(result.stdout.encode('utf-8'))
+        return result.stdout.strip() or None
+
+
+# Drop-in for the ssh binary: accepts poller's ssh argv, treats ControlMaster
+# management calls (-O / -M) as successful no-ops, sleeps for the injected
+# latency of every FAKE_SSH_LATENCY key found in "<host> <command>", then runs
+# the command with local bash under FAKE_SSH_HOME. Hosts in FAKE_SSH_DOWN
+# behave like a dead box: every connection fails with 255 after that host's
+# connect delay.
+FAKE_SSH = """#!/usr/bin/env python3
+import json, os, subprocess, sys, time
+args = sys.argv[1:]
+down = json.loads(os.environ.get('FAKE_SSH_DOWN', '{}'))
+host = args[-1] if '-O' in args or '-M' in args else args[-2]
+if host in down:
+    if '-O' not in args:
+        time.sleep(down[host])
+    sys.exit(255)
+if '-O' in args or '-M' in args:
+    sys.exit(0)
+command = args[-1]
+latency = json.loads(os.environ.get('FAKE_SSH_LATENCY', '{}'))
+time.sleep(sum(v for k, v in latency.items() if k in args[-2] + ' ' + command))
+env = dict(os.environ, HOME=os.environ.get('FAKE_SSH_HOME', os.environ['HOME']))
+sys.exit(subprocess.call(['bash', '-c', command], env=env))
+"""
+
+
+def install_fake_ssh(workdir, latency, down=None):
+    """
+    Point poller at the fake ssh shim with per-substring latency (seconds) and
+    {host: connect delay} for hosts that refuse every connection.
+    """
+    path = os.path.join(workdir, 'fake-ssh')
+    with open(path, 'w') as f:
+        f.write(FAKE_SSH)
+    os.chmod(path, 0o755)
+    os.environ['FAKE_SSH_LATENCY'] = json.dumps(latency)
+    os.environ['FAKE_SSH_DOWN'] = json.dumps(down or {})
+    os.environ['FAKE_SSH_HOME'] = workdir
+    poller.SSH_BINARY = path
+
+
+def reset_poller():
+    for cache in (poller._last_known, poller._discovered_cache, poller._log_state,
+                  poller._ssh_masters, poller._host_snapshots, poller._breakers,
+                  poller._next_poll, poller._host_polled_at, poller._host_discovered_at,
+                  poller._discovery_changes, poller._discovered_seen):
+        cache.clear()
+
+
+def legacy_simulation_command(log_path):
+    """The pre-incremental remote command: tail -1, cat and tail -30 of the same log."""
+    return ' ; '.join([
+        "echo '===TAIL==='",
+        f"tail -1 {log_path} 2>/dev/null || echo 'NO_LOG'",
+        "echo '===HISTORY==='",
+        f"cat {log_path} 2>/dev/null || echo 'NO_LOG'",
+        "echo '===PROCESS==='",
+        "echo 'NOT_RUNNING'",
+        "echo '===LOGTAIL==='",
+        f"tail -30 {log_path} 2>/dev/null || echo 'NO_LOG'",
+    ])
+
+
+def bench_wire(args):
+    """Bytes over the wire per poll, old triple-read vs. single incremental read."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        log_path = os.path.join(workdir, 'production.log')
+        write_log(log_path, args.rows)
+        sim = {'name': 'bench', 'directory': workdir, 'log': 'production.log',
+               'target_ns': 500, 'script': 'scripts/bench_md.py'}
+
+        shell = LocalShell()
+        poller.ssh_run = shell
+        legacy = legacy_simulation_command(log_path)
+
+        print(f"log: {args.rows} rows, {os.path.getsize(log_path) / 1e6:.1f} MB")
+        print(f"{'poll':<24}{'legacy bytes':>16}{'incremental bytes':>20}")
+        for label, append in [('first', 0), ('steady state', args.append), ('idle', 0)]:
+            if append:
+                write_log(log_path, append, start=args.rows, header=False)
+                args.rows += append
+            shell.bytes = 0
+            shell(None, legacy)
+            legacy_bytes = shell.bytes
+            shell.bytes = 0
+            result = poller.poll_simulation('bench', sim)
+            label = f"{label} (+{append} rows)" if append else label
+            print(f"{label:<24}{legacy_bytes:>16,}{shell.bytes:>20,}")
+        print(f"rows held: {len(result['log_data'])}, "
+              f"last_entry ns: {result['current_ns']}, tail lines: {len(result['log_tail'])}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_parse(args):
+    """Per-line dict parser vs. the vectorized column parser on one large log."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        log_path = os.path.join(workdir, 'production.log')
+        write_log(log_path, args.rows)
+        with open(log_path) as f:
+            text = f.read()
+    finally:
+        shutil.rmtree(workdir)
+
+    t0 = time.perf_counter()
+    rows = poller._parse_log_rows(text)
+    t_rows = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    columns = poller.parse_log_columns(text)
+    t_columns = time.perf_counter() - t0
+
+    identical = all(
+        np.array_equal(columns[name], np.array([row[name] for row in rows]))
+        for name in poller.LOG_COLUMNS + ('time_ns',)
+    )
+    print(f"log: {args.rows} rows, {len(text) / 1e6:.1f} MB")
+    print(f"per-line dicts:  {t_rows:8.3f} s")
+    print(f"column arrays:   {t_columns:8.3f} s   ({t_rows / t_columns:.1f}x)")
+    print(f"identical: {identical}")
+
+    # A live log's usual blemish: one row cut short in the middle of the block
+    lines = text.split('\n')
+    middle = len(lines) // 2
+    lines[middle] = lines[middle][:len(lines[middle]) // 2]
+    damaged = '\n'.join(lines)
+    t0 = time.perf_counter()
+    rows = poller._parse_log_rows(damaged)
+    t_rows = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    columns = poller.parse_log_columns(damaged)
+    t_columns = time.perf_counter() - t0
+    print(f"one truncated row: per-line {t_rows:.3f} s, columns {t_columns:.3f} s "
+          f"({t_rows / t_columns:.1f}x), rows {len(rows)} / {len(columns['step'])}")
+
+
+def bench_concurrency(args):
+    """Serial vs. bounded-pool per-simulation polling with injected SSH latency."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        rng = random.Random(0)
+        sims, latency = [], {'': args.rtt}
+        for i in range(args.sims):
+            directory = os.path.join(workdir, f'sim{i:02d}')
+            os.makedirs(directory)
+            write_log(os.path.join(directory, 'production.log'), 2000)
+            sims.append({'name': f'sim{i:02d}', 'directory': directory, 'log': 'production.log',
+                         'target_ns': 500, 'script': f'scripts/bench_sim{i:02d}.py'})
+            # The trailing '/' keys on the sim's own log path, so sim01 doesn't match sim010
+            latency[directory + '/'] = args.slow if i == 0 else rng.uniform(0.05, 0.3)
+        install_fake_ssh(workdir, latency)
+
+        sim_latency = [latency[s['directory'] + '/'] + args.rtt for s in sims]
+        print(f"{args.sims} sims, rtt {args.rtt:.2f}s, per-sim latency sum "
+              f"{sum(sim_latency):.2f}s, slowest {max(sim_latency):.2f}s")
+        runs = [('serial', False, 1), (f'pool x{args.workers}', False, args.workers),
+                (f'pool x{args.sims}', False, args.sims), ('batched', True, args.workers)]
+        for label, batched, workers in runs:
+            reset_poller()
+            t0 = time.perf_counter()
+            result = poller.poll_all('bench', sims, batched=batched, max_workers=workers)
+            elapsed = time.perf_counter() - t0
+            order_ok = [s['name'] for s in result['simulations']] == [s['name'] for s in sims]
+            print(f"{label:<14}{elapsed:8.2f} s   stable order: {order_ok}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_fleet(args):
+    """Fleet poll with some hosts hung: when each host's results get published."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        fleet, latency = {}, {}
+        for h in range(args.hosts):
+            host = f'gpu{h:02d}'
+            sims = []
+            for i in range(args.sims):
+                directory = os.path.join(workdir, host, f'sim{i:02d}')
+                os.makedirs(directory)
+                write_log(os.path.join(directory, 'production.log'), 2000)
+                sims.append({'name': f'sim{i:02d}', 'directory': directory, 'log': 'production.log',
+                             'target_ns': 500, 'script': f'scripts/bench_{host}_{i:02d}.py'})
+            fleet[host] = {'simulations': sims, 'discovery_roots': (os.path.join(workdir, host),)}
+            # Hung hosts outlast every timeout; the rest answer in 0.1-0.5 s
+            latency[host + ' '] = 60 if h < args.down else 0.1 + 0.1 * (h % 5)
+        install_fake_ssh(workdir, latency)
+
+        published = []
+        t0 = time.perf_counter()
+        poller.add_publish_hook(lambda snap: published.append((
+            time.perf_counter() - t0, [h['host'] for h in snap['hosts'] if h['reachable']])))
+        result = poller.poll_fleet(fleet, sim_timeout=args.timeout)
+        elapsed = time.perf_counter() - t0
+
+        print(f"{args.hosts} hosts x {args.sims} sims, {args.down} hung, sim timeout {args.timeout}s")
+        for at, reachable in published:
+            print(f"  published at {at:6.2f} s   reachable: {len(reachable)}")
+        print(f"cycle: {elapsed:.2f} s, sims in snapshot: {len(result['simulations'])}")
+        for h in result['hosts']:
+            print(f"  {h['host']}  reachable={h['reachable']!s:<5}  sims={h['simulations']}  "
+                  f"unreachable={h['unreachable']}")
+
+        # The monitor's loop over --window seconds, a poll every --interval:
+        # one fleet-wide cycle at a time vs. each host on its own thread
+        print(f"cycles completed in {args.window} s, polling every {args.interval} s:")
+        for label, groups in (('one loop', [list(fleet)]), ('per host', [[host] for host in fleet])):
+            reset_poller()
+            cycles = {host: 0 for host in fleet}
+            deadline = time.monotonic() + args.window
+
+            def loop(hosts):
+                while time.monotonic() < deadline:
+                    poller.poll_fleet(fleet, hosts=hosts, publish=False, sim_timeout=args.timeout)
+                    if time.monotonic() < deadline:
+                        for host in hosts:
+                            cycles[host] += 1
+                    time.sleep(args.interval)
+
+            threads = [threading.Thread(target=loop, args=(hosts,)) for hosts in groups]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            print(f"  {label:<9} " + '  '.join(f"{host} {n:2d}" for host, n in cycles.items()))
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_breaker(args):
+    """Consecutive poll cycles against a dead host, with and without its breaker."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        sims = []
+        for i in range(args.sims):
+            directory = os.path.join(workdir, f'sim{i:02d}')
+            os.makedirs(directory)
+            sims.append({'name': f'sim{i:02d}', 'directory': directory, 'log': 'production.log',
+                         'target_ns': 500, 'script': f'scripts/bench_{i:02d}.py'})
+        install_fake_ssh(workdir, {}, down={'deadbox': args.connect})
+        poller.BREAKER_BACKOFF = args.backoff
+
+        print(f"dead host, {args.sims} sims, unbatched, connect timeout {args.connect}s, "
+              f"first probe after {args.backoff}s")
+        for label, threshold in (('no breaker', 10 ** 9), ('breaker', 3)):
+            reset_poller()
+            poller.BREAKER_THRESHOLD = threshold
+            times = []
+            for _ in range(args.cycles):
+                t0 = time.perf_counter()
+                result = poller.poll_fleet({'deadbox': {'simulations': sims}}, batched=False)
+                times.append(time.perf_counter() - t0)
+                time.sleep(args.interval)
+            state = result['hosts'][0]['breaker']['state']
+            print(f"{label:<12}" + ' '.join(f"{t:6.2f}" for t in times)
+                  + f"   total {sum(times):6.2f} s   breaker {state}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_schedule(args):
+    """Fixed-interval vs. adaptive polling of one fast sim among stopped and finished ones."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    procs = []
+    try:
+        sims = []
+        idle = [(f'stopped{i:02d}', 500) for i in range(args.idle // 2)]
+        idle += [(f'done{i:02d}', 15) for i in range(args.idle - args.idle // 2)]
+        for name, target in [('fast', 500)] + idle:
+            directory = os.path.join(workdir, name)
+            os.makedirs(directory)
+            write_log(os.path.join(directory, 'production.log'), 2000)
+            sims.append({'name': name, 'directory': directory, 'log': 'production.log',
+                         'target_ns': target, 'script': f'scripts/bench_{name}.py'})
+        # A process whose command line the fast sim's pgrep matches
+        procs.append(subprocess.Popen(['bash', '-c', 'sleep 3600; true', 'scripts/bench_fast.py'],
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        install_fake_ssh(workdir, {})
+        fleet = {'bench': {'simulations': sims, 'discovery_roots': (workdir,)}}
+
+        # The fast sim writes a row every 10 ps at ~328 ns/day: one per ~2.6 s
+        stop = threading.Event()
+
+        def writer():
+            row = 2000
+            while not stop.wait(2.6):
+                write_log(os.path.join(sims[0]['directory'], 'production.log'), 1, row, header=False)
+                row += 1
+
+        print(f"{args.duration}s per mode, poll_interval {args.interval}s, {args.idle} idle sims, "
+              f"fast sim writes every 2.6 s")
+        for label, scheduled in (('fixed', False), ('adaptive', True)):
+            reset_poller()
+            counts = {'ssh': 0, 'sims': 0}
+            ssh_run_async, simulation_command = poller.ssh_run_async, poller._simulation_command
+
+            async def counted_ssh(host, command, timeout=15):
+                counts['ssh'] += 1
+                return await ssh_run_async(host, command, timeout)
+
+            def counted_command(host, sim_config, prefix='', **kwargs):
+                counts['sims'] += 1
+                return simulation_command(host, sim_config, prefix, **kwargs)
+
+            poller.ssh_run_async, poller._simulation_command = counted_ssh, counted_command
+            stop.clear()
+            thread = threading.Thread(target=writer, daemon=True)
+            thread.start()
+            lag, samples = 0.0, 0
+            t0 = time.monotonic()
+            last_poll = -args.interval
+            try:
+                while time.monotonic() - t0 < args.duration:
+                    now = time.monotonic()
+                    if scheduled and poller.fleet_due_at(fleet, args.interval) <= now:
+                        poller.poll_fleet(fleet, publish=False, scheduled=True, poll_interval=args.interval)
+                    elif not scheduled and now - last_poll >= args.interval:
+                        poller.poll_fleet(fleet, publish=False, poll_interval=args.interval)
+                        last_poll = now
+                    # Rows on disk the monitor hasn't seen yet
+                    with open(os.path.join(sims[0]['directory'], 'production.log')) as f:
+                        on_disk = sum(1 for _ in f) - 1
+                    seen = poller._last_known.get(('bench', 'fast'), {}).get('log_rows', 0)
+                    lag += on_disk - seen
+                    samples += 1
+                    time.sleep(0.5)
+            finally:
+                stop.set()
+                thread.join()
+                poller.ssh_run_async, poller._simulation_command = ssh_run_async, simulation_command
+            print(f"{label:<10} ssh calls {counts['ssh']:4d}   sim scans {counts['sims']:4d}   "
+                  f"fast sim rows behind (mean) {lag / max(samples, 1):5.2f}")
+    finally:
+        for proc in procs:
+            proc.kill()
+        shutil.rmtree(workdir)
+
+
+def bench_stream(args):
+    """Freshness of a running sim's rows with scheduled polling alone vs. a log stream."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    procs = []
+    try:
+        directory = os.path.join(workdir, 'live')
+        os.makedirs(directory)
+        log_path = os.path.join(directory, 'production.log')
+        write_log(log_path, 2000)
+        sims = [{'name': 'live', 'directory': directory, 'log': 'production.log',
+                 'target_ns': 500, 'script': 'scripts/bench_live.py'}]
+        procs.append(subprocess.Popen(['bash', '-c', 'sleep 3600; true', 'scripts/bench_live.py'],
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        install_fake_ssh(workdir, {})
+        fleet = {'bench': {'simulations': sims, 'discovery_roots': (workdir,)}}
+        stop = threading.Event()
+        written = {'rows': 2000}
+
+        def writer():
+            while not stop.wait(args.write):
+                write_log(log_path, 1, written['rows'], header=False)
+                written['rows'] += 1
+
+        print(f"{args.duration}s per mode, poll_interval {args.interval}s, a row every {args.write}s")
+        for label, stream in (('polled', False), ('streamed', True)):
+            reset_poller()
+            published = []
+            poller._publish_hooks[:] = [lambda snap: published.append(snap)]
+            counts = {'ssh': 0}
+            ssh_run_async = poller.ssh_run_async
+
+            async def counted_ssh(host, command, timeout=15):
+                counts['ssh'] += 1
+                return await ssh_run_async(host, command, timeout)
+
+            poller.ssh_run_async = counted_ssh
+            stop.clear()
+            thread = threading.Thread(target=writer, daemon=True)
+            thread.start()
+            lag, samples = 0.0, 0
+            t0 = time.monotonic()
+            try:
+                while time.monotonic() - t0 < args.duration:
+                    if poller.fleet_due_at(fleet, args.interval) <= time.monotonic():
+                        poller.poll_fleet(fleet, scheduled=True, poll_interval=args.interval,
+                                          stream=stream)
+                    seen = poller._last_known.get(('bench', 'live'), {}).get('log_rows', 0)
+                    lag += written['rows'] - seen
+                    samples += 1
+                    time.sleep(0.1)
+            finally:
+                stop.set()
+                thread.join()
+                poller.close_log_streams()
+                poller.ssh_run_async = ssh_run_async
+                poller._publish_hooks.clear()
+            print(f"{label:<10} ssh calls {counts['ssh']:4d}   publishes {len(published):4d}   "
+                  f"rows behind (mean) {lag / max(samples, 1):5.2f}")
+    finally:
+        for proc in procs:
+            proc.kill()
+        shutil.rmtree(workdir)
+
+
+def bench_collector(args):
+    """Batched shell script vs. remote collector: remote CPU and local parse time per cycle."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        roots = (os.path.join(workdir, 'simulations'),)
+        sims = []
+        for i in range(args.sims):
+            directory = os.path.join(roots[0], f'sim{i:02d}')
+            os.makedirs(directory)
+            sims.append({'name': f'sim{i:02d}', 'directory': directory, 'log': 'production.log',
+                         'target_ns': 500, 'script': f'scripts/bench_{i:02d}.py'})
+        install_fake_ssh(workdir, {})
+        # The fake ssh is a Python process itself: its CPU per call is taken
+        # off, so remote cpu is what the remote command costs
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        for _ in range(10):
+            poller.ssh_run('bench', 'true')
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        ssh_cpu = ((after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)) / 10
+        calls = [0]
+        ssh_run_async = poller.ssh_run_async
+
+        async def counted_ssh(*a, **kw):
+            calls[0] += 1
+            return await ssh_run_async(*a, **kw)
+
+        poller.ssh_run_async = counted_ssh
+        outcomes = {}
+        print(f"{args.sims} sims, {args.cycles} cycles, {args.append} new rows per sim per cycle "
+              f"(ssh shim {ssh_cpu * 1000:.1f} ms cpu per call, not counted)")
+        for label, collector in (('shell', False), ('collector', True)):
+            for sim in sims:
+                log_path = os.path.join(sim['directory'], 'production.log')
+                if os.path.exists(log_path):
+                    os.remove(log_path)
+                write_log(log_path, args.rows)
+            reset_poller()
+            poller._collector_failed.clear()
+            split, parse = poller._split_sections, poller._parse_simulation
+            parse_time = [0.0]
+
+            def timed(func):
+                def wrapper(*a, **kw):
+                    t = time.perf_counter()
+                    try:
+                        return func(*a, **kw)
+                    finally:
+                        parse_time[0] += time.perf_counter() - t
+                return wrapper
+
+            poller._split_sections, poller._parse_simulation = timed(split), timed(parse)
+            # The first cycle reads every log in full (and installs the collector)
+            t0 = time.perf_counter()
+            poller.poll_all('bench', sims, discovery_roots=roots, collector=collector)
+            first = time.perf_counter() - t0
+            before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            parse_time[0] = 0.0
+            calls[0] = 0
+            t0 = time.perf_counter()
+            try:
+                for cycle in range(args.cycles):
+                    for i, sim in enumerate(sims):
+                        write_log(os.path.join(sim['directory'], 'production.log'), args.append,
+                                  args.rows + cycle * args.append, header=False)
+                    result = poller.poll_all('bench', sims, discovery_roots=roots, collector=collector)
+            finally:
+                poller._split_sections, poller._parse_simulation = split, parse
+            elapsed = time.perf_counter() - t0
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            remote_cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime) - calls[0] * ssh_cpu
+            outcomes[label] = [(s['name'], s['status'], s['log_rows'], s['current_ns'])
+                               for s in result['simulations']]
+            print(f"{label:<10} first {first * 1000:7.1f} ms   cycle {elapsed / args.cycles * 1000:7.1f} ms   "
+                  f"remote cpu {remote_cpu / args.cycles * 1000:7.1f} ms   "
+                  f"local parse {parse_time[0] / args.cycles * 1000:6.2f} ms")
+        print(f"same results: {outcomes['shell'] == outcomes['collector']}")
+    finally:
+        poller.ssh_run_async = ssh_run_async
+        shutil.rmtree(workdir)
+
+
+def bench_discovery(args):
+    """Poll cycle latency with discovery in every cycle vs. on its own schedule."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        roots = (os.path.join(workdir, 'simulations'),)
+        # Old runs: directories the find sweeps have to walk through
+        for i in range(args.dirs):
+            directory = os.path.join(roots[0], f'old{i:04d}', 'analysis')
+            os.makedirs(directory)
+            open(os.path.join(directory, 'notes.txt'), 'w').close()
+        sims = []
+        for i in range(args.sims):
+            directory = os.path.join(roots[0], f'sim{i:02d}')
+            os.makedirs(directory)
+            write_log(os.path.join(directory, 'production.log'), 100)
+            sims.append({'name': f'sim{i:02d}', 'directory': directory, 'log': 'production.log',
+                         'target_ns': 500, 'script': f'scripts/bench_{i:02d}.py'})
+        install_fake_ssh(workdir, {})
+        print(f"{args.sims} sims, {args.dirs} other run directories, {args.cycles} cycles")
+        for label, every_cycle in (('every cycle', True), ('scheduled', False)):
+            reset_poller()
+            poller.poll_all('bench', sims, discovery_roots=roots)
+            t0 = time.perf_counter()
+            for _ in range(args.cycles):
+                if every_cycle:
+                    poller._host_discovered_at.clear()
+                poller.poll_all('bench', sims, discovery_roots=roots)
+            elapsed = time.perf_counter() - t0
+            print(f"{label:<12} cycle {elapsed / args.cycles * 1000:7.1f} ms")
+        t0 = time.perf_counter()
+        changes = poller.discover_fleet({'bench': {'simulations': sims, 'discovery_roots': roots}})
+        print(f"discover_fleet {(time.perf_counter() - t0) * 1000:7.1f} ms   "
+              f"found {changes['bench']['found']}, added {len(changes['bench']['added'])}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_store(args):
+    """First poll after a restart, with and without the on-disk history store."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        sims = []
+        for i in range(args.sims):
+            directory = os.path.join(workdir, f'sim{i:02d}')
+            os.makedirs(directory)
+            write_log(os.path.join(directory, 'production.log'), args.rows)
+            sims.append({'name': f'sim{i:02d}', 'directory': directory, 'log': 'production.log',
+                         'target_ns': 50000, 'script': f'scripts/bench_{i:02d}.py'})
+        install_fake_ssh(workdir, {})
+        received = [0]
+        ssh_run_async = poller.ssh_run_async
+
+        async def counted_ssh(host, command, timeout=15):
+            output = await ssh_run_async(host, command, timeout)
+            received[0] += len((output or '').encode('utf-8'))
+            return output
+
+        print(f"{args.sims} sims x {args.rows} rows, {args.append} rows written while down")
+        rows = args.rows
+        poller.ssh_run_async = counted_ssh
+        try:
+            for label, db_path in (('memory', None), ('store', os.path.join(workdir, 'history.db'))):
+                # The monitor's previous run
+                reset_poller()
+                if db_path:
+                    poller.open_store(db_path)
+                poller.poll_all('bench', sims, discovery_roots=())
+                poller.close_store()
+                for sim in sims:
+                    write_log(os.path.join(sim['directory'], 'production.log'), args.append, rows, header=False)
+                rows += args.append
+                # Restart
+                reset_poller()
+                t0 = time.perf_counter()
+                if db_path:
+                    poller.open_store(db_path)
+                loaded = time.perf_counter() - t0
+                received[0] = 0
+                t1 = time.perf_counter()
+                result = poller.poll_all('bench', sims, discovery_roots=())
+                polled = time.perf_counter() - t1
+                poller.close_store()
+                complete = all(s['log_rows'] == rows for s in result['simulations'])
+                print(f"{label:<7} load {loaded * 1000:7.1f} ms   first poll {polled * 1000:7.1f} ms   "
+                      f"{received[0] / 1e6:8.2f} MB received   all rows: {complete}")
+        finally:
+            poller.ssh_run_async = ssh_run_async
+        print(f"database: {os.path.getsize(os.path.join(workdir, 'history.db')) / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_warm(args):
+    """Launch to first servable snapshot: cold first poll vs. warm start."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        sims = []
+        for i in range(args.sims):
+            directory = os.path.join(workdir, f'sim{i:02d}')
+            os.makedirs(directory)
+            write_log(os.path.join(directory, 'production.log'), args.rows)
+            sims.append({'name': f'sim{i:02d}', 'directory': directory, 'log': 'production.log',
+                         'target_ns': 50000, 'script': f'scripts/bench_{i:02d}.py'})
+        install_fake_ssh(workdir, {'bench': args.rtt})
+        fleet = {'bench': {'simulations': sims, 'discovery_roots': ()}}
+        db_path = os.path.join(workdir, 'history.db')
+        state_file = os.path.join(workdir, 'state.json')
+        # The previous run
+        reset_poller()
+        poller.open_store(db_path)
+        poller.poll_fleet(fleet, publish=False, scheduled=True)
+        poller.save_warm_start(state_file)
+        poller.close_store()
+        print(f"{args.sims} sims x {args.rows} rows, ssh latency {args.rtt}s")
+
+        reset_poller()
+        t0 = time.perf_counter()
+        poller.poll_fleet(fleet, publish=False, scheduled=True)
+        print(f"cold  first snapshot {(time.perf_counter() - t0) * 1000:8.1f} ms")
+
+        reset_poller()
+        t0 = time.perf_counter()
+        poller.open_store(db_path)
+        warm = poller.load_warm_start(state_file)
+        served = time.perf_counter() - t0
+        rows = sum(s['log_rows'] for s in warm['simulations'])
+        fresh = poller.poll_fleet(fleet, publish=False, scheduled=True)
+        refreshed = time.perf_counter() - t0
+        poller.close_store()
+        print(f"warm  first snapshot {served * 1000:8.1f} ms (stale: {warm['stale']}, {rows} rows)   "
+              f"refreshed at {refreshed * 1000:.1f} ms (stale: {fresh['stale']})")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def bench_memory(args):
+    """
+    Weeks of uptime compressed into cycles: every "day" a few new sims run
+    (and yesterday's finish and leave the config) while two long campaigns
+    keep growing. History memory with and without the budget.
+    """
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    idle = poller.HISTORY_IDLE
+    try:
+        install_fake_ssh(workdir, {})
+
+        def sim(name, rows, start=0):
+            directory = os.path.join(workdir, name)
+            os.makedirs(directory, exist_ok=True)
+            write_log(os.path.join(directory, 'production.log'), rows, start, header=not start)
+            return {'name': name, 'directory': directory, 'log': 'production.log',
+                    'target_ns': 10 ** 6, 'script': f'scripts/{name}.py'}
+
+        print(f"{args.days} days, {args.new} new sims x {args.rows} rows a day, "
+              f"2 campaigns growing {args.rows // 4} rows a day")
+        # Budgeted first: RSS the allocator has grown to is not handed back
+        for label, budget in ((f'{args.budget_mb} MB budget', args.budget_mb * 2 ** 20), ('unbounded', float('inf'))):
+            for name in os.listdir(workdir):
+                if name != 'fake-ssh':
+                    shutil.rmtree(os.path.join(workdir, name))
+            reset_poller()
+            poller.open_store(os.path.join(workdir, 'history.db'))
+            # Idle means "not grown since the previous day" here
+            poller.HISTORY_IDLE = 0.5 if budget != float('inf') else idle
+            campaigns = [sim(f'campaign{i}', args.rows) for i in range(2)]
+            kept = []
+            for day in range(args.days):
+                for i, c in enumerate(campaigns):
+                    sim(c['name'], args.rows // 4, args.rows + day * (args.rows // 4))
+                today = [sim(f'day{day:02d}_{i}', args.rows) for i in range(args.new)]
+                # Yesterday's sims are finished but stay configured for a week
+                kept = (kept + today)[-args.new * 7:]
+                time.sleep(0.6)
+                poller.poll_all('bench', campaigns + kept, discovery_roots=(), memory_budget=budget)
+                usage = poller.cache_usage(budget)
+                if day % max(1, args.days // 7) == 0 or day == args.days - 1:
+                    print(f"  {label:<14} day {day:2d}: {usage['used_bytes'] / 2 ** 20:7.1f} MB history, "
+                          f"{len(usage['logs'])} logs, {usage['spilled']} spilled, rss {rss_mb():6.1f} MB")
+            rows = {s['name']: s['log_rows'] for s in poller._host_snapshots['bench']['simulations']}
+            full = len(poller._store.load_history(('bench', poller._log_path(campaigns[0]))))
+            poller.close_store()
+            print(f"  {label:<14} campaign0 rows in memory {rows['campaign0']}, in store {full}")
+            os.remove(os.path.join(workdir, 'history.db'))
+    finally:
+        poller.HISTORY_IDLE = idle
+        shutil.rmtree(workdir)
+
+
+def bench_retention(args):
+    """Store size and full-range query cost for a long campaign, before and after compaction."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        db_path = os.path.join(workdir, 'history.db')
+        history_store = store.HistoryStore(db_path, flush_interval=3600)
+        now = time.time()
+        rng = np.random.default_rng(0)
+        # One GPU sample per poll_interval, one status sample per sim
+        t = np.arange(now - args.days * 86400, now, args.interval)
+        util = np.clip(80 + rng.normal(0, 10, len(t)), 0, 100)
+        history_store._samples = [('gpu', ('bench', ti, ui, 30, 20000, 24000, 65)) for ti, ui in zip(t, util)]
+        history_store._samples += [('status', ('bench', 'sim', ti, 'running', i * 0.01, 0, 320))
+                                   for i, ti in enumerate(t)]
+        log_path = os.path.join(workdir, 'production.log')
+        write_log(log_path, args.rows)
+        with open(log_path) as f:
+            columns = poller.parse_log_columns(f.read())
+        history_store.save_log(('bench', log_path), {'inode': '1', 'offset': 0, 'partial': b'', 'tail': []},
+                               columns, reset=True)
+        history_store.flush()
+        print(f"{args.days} days of samples every {args.interval}s ({len(t)} per series), "
+              f"log of {args.rows} rows ({args.rows * 10 / 1000:.0f} ns)")
+
+        def report(label):
+            with history_store._db_lock:
+                history_store._db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                history_store._db.execute('VACUUM')
+            line = f"{label:<10} db {os.path.getsize(db_path) / 2 ** 20:7.1f} MB"
+            for series, key, fields in (('gpu', ('bench',), ['gpu_util']),
+                                        ('log', ('bench', log_path), ['temperature', 'speed_ns_day'])):
+                t0 = time.perf_counter()
+                result = history_store.query(series, key, fields, max_points=1000)
+                line += (f"   {series} full range: {(time.perf_counter() - t0) * 1000:6.1f} ms, "
+                         f"{len(result['t'])} pts (tier {result['tier']})")
+            print(line)
+
+        report('raw')
+        t0 = time.perf_counter()
+        history_store.compact(now)
+        print(f"compaction {time.perf_counter() - t0:.2f} s")
+        report('compacted')
+        t0 = time.perf_counter()
+        recent = history_store.query('log', ('bench', log_path), ['temperature'],
+                                     start=columns['time_ps'][-1] - 1000, max_points=1000)
+        print(f"last 1 ns of the log: {(time.perf_counter() - t0) * 1000:.1f} ms, "
+              f"{len(recent['t'])} pts (tier {recent['tier']})")
+        history_store.close()
+    finally:
+        shutil.rmtree(workdir)
+
+
+def bench_history(args):
+    """Points a 1 ns zoom gets: the /api/status overview vs. a ranged history query."""
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-')
+    try:
+        directory = os.path.join(workdir, 'sim')
+        os.makedirs(directory)
+        write_log(os.path.join(directory, 'production.log'), args.rows)
+        sim = {'name': 'sim', 'directory': directory, 'log': 'production.log',
+               'target_ns': args.rows * 10 / 1000, 'script': 'scripts/bench.py'}
+        install_fake_ssh(workdir, {})
+        reset_poller()
+        poller.open_store(os.path.join(workdir, 'history.db'))
+        result = poller.poll_all('bench', [sim], discovery_roots=())['simulations'][0]
+        fields = ['total_energy', 'temperature', 'density', 'speed_ns_day']
+        total_ns = sim['target_ns']
+        early, late = (total_ns * 0.25, total_ns * 0.25 + 1), (total_ns - 1, total_ns)
+        print(f"log of {args.rows} rows ({total_ns:.0f} ns), {args.max_points} max points")
+
+        t0 = time.perf_counter()
+        overview = result['log_data'].to_columns(fields + ['time_ns'], stop=result['log_rows'],
+                                                 max_points=args.max_points)
+        elapsed = time.perf_counter() - t0
+        body = json.dumps(overview).encode('utf-8')
+        t = np.array(overview['time_ns'])
+        inside = int(((t >= early[0]) & (t <= early[1])).sum())
+        print(f"/api/status overview   {elapsed * 1000:6.1f} ms  {len(t):5d} pts  "
+              f"{len(body) / 1e3:7.1f} kB JSON   {inside} pts inside a 1 ns window")
+
+        def report(label, start, end):
+            t0 = time.perf_counter()
+            window = poller.query_history('bench', sim, fields, start, end, args.max_points)
+            elapsed = time.perf_counter() - t0
+            columns = ['time_ns'] + fields
+            body = json.dumps({f: window[f].tolist() for f in columns}).encode('utf-8')
+            packed = sum(window[f].nbytes for f in columns)
+            print(f"{label:<22} {elapsed * 1000:6.1f} ms  {len(window['time_ns']):5d} pts  "
+                  f"{len(body) / 1e3:7.1f} kB JSON  {packed / 1e3:7.1f} kB binary   "
+                  f"({window['source']}, tier {window['tier']})")
+
+        report('memory, full range', None, None)
+        report('memory, 1 ns window', *early)
+        # Older rows rolled up, and the history spilled out of memory
+        poller._store.compact()
+        poller._spill_histories(0)
+        report('store, 1 ns, old', *early)
+        report('store, 1 ns, recent', *late)
+        poller.close_store()
+    finally:
+        shutil.rmtree(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    wire = sub.add_parser('wire', help='bytes transferred per poll')
+    wire.add_argument('--rows', type=int, default=500000)
+    wire.add_argument('--append', type=int, default=10)
+    wire.set_defaults(func=bench_wire)
+
+    parse = sub.add_parser('parse', help='production.log parse throughput')
+    parse.add_argument('--rows', type=int, default=1000000)
+    parse.set_defaults(func=bench_parse)
+
+    conc = sub.add_parser('concurrency', help='per-simulation poll concurrency')
+    conc.add_argument('--sims', type=int, default=12)
+    conc.add_argument('--workers', type=int, default=4)
+    conc.add_argument('--rtt', type=float, default=0.05, help='base latency of every ssh call')
+    conc.add_argument('--slow', type=float, default=2.0, help='latency of the one slow sim')
+    conc.set_defaults(func=bench_concurrency)
+
+    fleet = sub.add_parser('fleet', help='multi-host poll with unreachable hosts')
+    fleet.add_argument('--hosts', type=int, default=4)
+    fleet.add_argument('--sims', type=int, default=3)
+    fleet.add_argument('--down', type=int, default=1, help='hosts that never answer')
+    fleet.add_argument('--timeout', type=int, default=5, help='per-simulation deadline (s)')
+    fleet.add_argument('--window', type=int, default=20, help='seconds of polling loop to run')
+    fleet.add_argument('--interval', type=float, default=2.0, help='seconds between a host\'s polls')
+    fleet.set_defaults(func=bench_fleet)
+
+    breaker = sub.add_parser('breaker', help='poll cycles against an unreachable host')
+    breaker.add_argument('--sims', type=int, default=6)
+    breaker.add_argument('--cycles', type=int, default=6)
+    breaker.add_argument('--connect', type=float, default=2.0, help='connect timeout of the dead host (s)')
+    breaker.add_argument('--backoff', type=float, default=1.0, help='first probe delay (s)')
+    breaker.add_argument('--interval', type=float, default=0.5, help='pause between cycles (s)')
+    breaker.set_defaults(func=bench_breaker)
+
+    schedule = sub.add_parser('schedule', help='fixed vs. adaptive per-sim polling')
+    schedule.add_argument('--duration', type=float, default=60)
+    schedule.add_argument('--interval', type=int, default=10, help='poll_interval (s)')
+    schedule.add_argument('--idle', type=int, default=6, help='stopped + completed sims')
+    schedule.set_defaults(func=bench_schedule)
+
+    stream = sub.add_parser('stream', help='polled vs. streamed freshness of a running sim')
+    stream.add_argument('--duration', type=float, default=30)
+    stream.add_argument('--interval', type=int, default=10, help='poll_interval (s)')
+    stream.add_argument('--write', type=float, default=1.0, help='seconds between log rows')
+    stream.set_defaults(func=bench_stream)
+
+    coll = sub.add_parser('collector', help='shell script vs. remote collector per cycle')
+    coll.add_argument('--sims', type=int, default=8)
+    coll.add_argument('--rows', type=int, default=20000)
+    coll.add_argument('--append', type=int, default=10)
+    coll.add_argument('--cycles', type=int, default=10)
+    coll.set_defaults(func=bench_collector)
+
+    disc = sub.add_parser('discovery', help='discovery in every poll cycle vs. scheduled')
+    disc.add_argument('--sims', type=int, default=4)
+    disc.add_argument('--dirs', type=int, default=2000, help='other run directories under the root')
+    disc.add_argument('--cycles', type=int, default=10)
+    disc.set_defaults(func=bench_discovery)
+
+    store = sub.add_parser('store', help='first poll after a restart, with and without the store')
+    store.add_argument('--sims', type=int, default=4)
+    store.add_argument('--rows', type=int, default=200000)
+    store.add_argument('--append', type=int, default=100)
+    store.set_defaults(func=bench_store)
+
+    warm = sub.add_parser('warm', help='launch to first snapshot, cold vs. warm start')
+    warm.add_argument('--sims', type=int, default=4)
+    warm.add_argument('--rows', type=int, default=200000)
+    warm.add_argument('--rtt', type=float, default=0.3, help='latency of every ssh call')
+    warm.set_defaults(func=bench_warm)
+
+    memory = sub.add_parser('memory', help='history memory over weeks of sims coming and going')
+    memory.add_argument('--days', type=int, default=14)
+    memory.add_argument('--new', type=int, default=3, help='new sims a day')
+    memory.add_argument('--rows', type=int, default=40000, help='rows per new sim')
+    memory.add_argument('--budget-mb', type=int, default=64)
+    memory.set_defaults(func=bench_memory)
+
+    retention = sub.add_parser('retention', help='store size and query cost before/after rollups')
+    retention.add_argument('--days', type=int, default=90)
+    retention.add_argument('--interval', type=int, default=30, help='seconds between samples')
+    retention.add_argument('--rows', type=int, default=500000, help='rows in the campaign log')
+    retention.set_defaults(func=bench_retention)
+
+    history = sub.add_parser('history', help='zoomed plot data: overview vs. ranged queries')
+    history.add_argument('--rows', type=int, default=500000)
+    history.add_argument('--max-points', type=int, default=2000)
+    history.set_defaults(func=bench_history)
+
+    args = parser.parse_args()
+    # The poller appends debug output next to its source; keep bench runs out of the tree
+    workdir = tempfile.mkdtemp(prefix='simmon-bench-debug-')
+    poller.DEBUG_LOG = store.DEBUG_LOG = os.path.join(workdir, 'debug.log')
+    try:
+        args.func(args)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
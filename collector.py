@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Remote collector for sim-monitor.
+Installed on each monitored host by the poller and run once per poll cycle
+(`python3 collector.py <base64 JSON request>`). Discovery, log stat checks,
+incremental log reads, the process scan and the GPU query all happen in this
+one process, and the result comes back as a single compact JSON document.
+New log lines are parsed here too: the rows a poll adds travel as JSON number
+columns, so the poller doesn't parse CSV for them. Large reads (a first read,
+a rotated log) still come back as raw bytes, which the poller's NumPy loader
+parses faster than pure Python does here.
+
+Self-contained on purpose: standard library only (pynvml is used when the
+host has it), and no newer syntax than Python 3.6.
+"""
+
+import base64
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+GPU_QUERY = ['--query-gpu=utilization.gpu,utilization.memory,memory.used,memory.total,temperature.gpu,name',
+             '--format=csv,noheader,nounits']
+NVIDIA_SMI = ('/usr/lib/wsl/lib/nvidia-smi', 'nvidia-smi')
+
+# Discovery picks up logs written within this many seconds
+RECENT_SECONDS = 3600
+
+# Numeric fields per production.log row
+LOG_FIELDS = 9
+
+
+def _nvidia_smi(args):
+    for binary in NVIDIA_SMI:
+        try:
+            result = subprocess.run([binary] + args, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL, timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0:
+            return result.stdout.decode('utf-8', 'replace')
+    return None
+
+
+def gpu_stats():
+    """The nvidia-smi --query-gpu CSV line for the first GPU, or None."""
+    try:
+        import pynvml
+        pynvml.nvmlInit()
+        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+        util = pynvml.nvmlDeviceGetUtilizationRates(handle)
+        mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+        temp = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
+        name = pynvml.nvmlDeviceGetName(handle)
+        if isinstance(name, bytes):
+            name = name.decode()
+        return '{}, {}, {}, {}, {}, {}'.format(
+            util.gpu, util.memory, mem.used // 2 ** 20, mem.total // 2 ** 20, temp, name)
+    except Exception:
+        pass
+    output = _nvidia_smi(GPU_QUERY)
+    return output.strip().split('\n')[0] if output and output.strip() else None
+
+
+def gpu_pids():
+    """PIDs of python processes running on a GPU."""
+    try:
+        import pynvml
+        pynvml.nvmlInit()
+        pids = set()
+        for i in range(pynvml.nvmlDeviceGetCount()):
+            handle = pynvml.nvmlDeviceGetHandleByIndex(i)
+            pids.update(p.pid for p in pynvml.nvmlDeviceGetComputeRunningProcesses(handle))
+        return pids
+    except Exception:
+        pass
+    output = _nvidia_smi(['pmon', '-c', '1', '-s', 'u']) or ''
+    pids = set()
+    for line in output.split('\n'):
+        fields = line.split()
+        if 'python' in line and len(fields) > 1 and fields[1].isdigit():
+            pids.add(int(fields[1]))
+    return pids
+
+
+def process_table():
+    """
+    One pass over /proc for our own processes: dicts of pid, ppid, pgid,
+    cpu (% of one core over the process lifetime, like ps), rss (KiB), comm,
+    cwd and cmdline.
+    """
+    ticks = os.sysconf('SC_CLK_TCK')
+    page_kb = os.sysconf('SC_PAGE_SIZE') // 1024
+    with open('/proc/uptime') as f:
+        uptime = float(f.read().split()[0])
+    uid = os.getuid()
+    table = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        base = '/proc/' + entry
+        try:
+            if os.stat(base).st_uid != uid:
+                continue
+            with open(base + '/stat') as f:
+                stat = f.read()
+            with open(base + '/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode('utf-8', 'replace').strip()
+        except OSError:
+            continue
+        # "pid (comm) state ppid pgrp ..."; comm may itself contain spaces or parens
+        comm = stat[stat.index('(') + 1:stat.rindex(')')]
+        fields = stat[stat.rindex(')') + 2:].split()
+        elapsed = uptime - int(fields[19]) / ticks
+        cpu_time = (int(fields[11]) + int(fields[12])) / ticks
+        try:
+            cwd = os.readlink(base + '/cwd')
+        except OSError:
+            cwd = ''
+        table.append({
+            'pid': int(entry), 'ppid': int(fields[1]), 'pgid': int(fields[2]),
+            'cpu': 100.0 * cpu_time / elapsed if elapsed > 0 else 0.0,
+            'rss': int(fields[21]) * page_kb, 'comm': comm, 'cwd': cwd,
+            'cmdline': cmdline or '[{}]'.format(comm),
+        })
+    return table
+
+
+def process_sections(table):
+    """The table as the PS and CWD sections of the shell process scan."""
+    ps = ['{pid} {ppid} {pgid} {cpu:.1f} {rss} {comm} {cmdline}'.format(**p)
+          for p in table if p['pid'] != os.getpid()]
+    cwd = ['/proc/{} {}'.format(p['pid'], p['cwd']) for p in table if p['cwd']]
+    return {'PS': '\n'.join(ps), 'CWD': '\n'.join(cwd)}
+
+
+def _find(roots, name, depth, newer_than=None):
+    """Files called name at most depth levels below each root (find -maxdepth)."""
+    found = []
+    for root in roots:
+        root = os.path.expanduser(root).rstrip('/')
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Files directly in root are at depth 1
+            level = dirpath[len(root):].count(os.sep) + 1
+            if level >= depth:
+                dirnames[:] = []
+            if level > depth or name not in filenames:
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if newer_than is None or st.st_mtime >= newer_than:
+                found.append(path)
+    return found
+
+
+def discover(roots, depth, table):
+    """Discovery sections in the layout of the remote shell scan."""
+    on_gpu = gpu_pids()
+    gpu = ['{pid}:{cwd}:{cmdline}'.format(**p) for p in table if p['pid'] in on_gpu and p['cwd']]
+    meta = []
+    for path in _find(roots, 'sim_meta.json', depth):
+        try:
+            with open(path) as f:
+                meta.append(path + ':\n' + f.read())
+        except OSError:
+            pass
+    return {
+        'GPU': '\n'.join(gpu),
+        'RECENT': '\n'.join(_find(roots, 'production.log', depth, time.time() - RECENT_SECONDS)),
+        'META': '\n'.join(meta),
+    }
+
+
+def _stat_line(st):
+    return '{} {} {}'.format(st.st_ino, st.st_size, int(st.st_mtime))
+
+
+def parse_columns(lines):
+    """
+    The production.log rows among lines as LOG_FIELDS lists of values, one per
+    column. Headers, comments and lines that don't parse are skipped.
+    """
+    rows = []
+    for line in lines:
+        if not line.strip() or line.startswith('#'):
+            continue
+        fields = line.split(',')
+        if len(fields) < LOG_FIELDS:
+            continue
+        try:
+            rows.append([float(x) for x in fields[:LOG_FIELDS]])
+        except ValueError:
+            continue
+    return [list(column) for column in zip(*rows)] if rows else [[]] * LOG_FIELDS
+
+
+def collect_sim(sim, tail_lines, parse_bytes):
+    """
+    One sim's sections: UNCHANGED when the log's stat equals sim['known'],
+    otherwise LOGSTAT ("inode size mtime start") and the log from byte start
+    on, which is sim['offset'] (the start of the poller's held-back line) or 0
+    on a new or shrunk file. Up to parse_bytes of it come back parsed: ROWS
+    (see parse_columns) and TAIL (the last tail_lines complete lines), the
+    trailing half-written line as PARTIAL and END, the offset read up to.
+    More comes back raw, as HISTORY. Log bytes are decoded with
+    surrogateescape, so they survive JSON exactly.
+    """
+    path = os.path.expanduser(sim['log'])
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is not None and sim.get('known') and _stat_line(st) == sim['known']:
+        return {'UNCHANGED': ''}
+    if st is None:
+        return {'LOGSTAT': 'NO_LOG', 'HISTORY': ''}
+    start = sim.get('offset', 0)
+    if str(st.st_ino) != sim.get('inode') or st.st_size < start:
+        start = 0
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(st.st_size - start)
+    stat = '{} {}'.format(_stat_line(st), start)
+    if len(data) > parse_bytes:
+        return {'LOGSTAT': stat, 'HISTORY': data.decode('utf-8', 'surrogateescape')}
+    complete, _, partial = data.rpartition(b'\n')
+    lines = complete.decode('utf-8', 'replace').split('\n') if complete else []
+    return {
+        'LOGSTAT': stat,
+        'ROWS': parse_columns(lines),
+        'TAIL': [line for line in lines if line.strip()][-tail_lines:],
+        'PARTIAL': partial.decode('utf-8', 'surrogateescape'),
+        'END': start + len(data),
+    }
+
+
+def collect(request):
+    """
+    request: {'gpu': bool, 'discover': [roots] or None, 'depth': int,
+    'tail': int, 'parse_bytes': int, 'sims': [{'log', 'inode', 'offset', 'known'}]}. Processes are scanned once for the
+    process sections and discovery alike.
+    """
+    table = process_table()
+    result = {
+        'sims': [collect_sim(sim, request.get('tail', 30), request.get('parse_bytes', 0))
+                 for sim in request.get('sims', [])],
+        'processes': process_sections(table),
+    }
+    if request.get('gpu'):
+        result['gpu'] = gpu_stats()
+    if request.get('discover') is not None:
+        result['discover'] = discover(request['discover'], request.get('depth', 2), table)
+    return result
+
+
+def main():
+    request = json.loads(base64.b64decode(sys.argv[1]).decode('utf-8'))
+    json.dump(collect(request), sys.stdout, separators=(',', ':'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,145 @@
 """
 Flask web dashboard for simulation monitoring.
-Serves an interactive page with status cards, Plotly charts, GPU stats, and log tail.
+Serves an interactive page with status cards, Plotly charts, GPU stats, and log tail,
+grouped by host when monitoring a fleet.
 """
 
+import gzip
 import json
-from flask import Flask, render_template_string, jsonify, request
-from poller import poll_all
+import secrets
+import struct
+import threading
+import weakref
+from collections import OrderedDict
+
+from flask import Flask, Response, render_template_string, jsonify, request
+from history import SimHistory
+from poller import (HISTORY_MEMORY_BUDGET, add_publish_hook, cache_usage, discover_fleet, poll_fleet,
+                    query_history, query_metrics)
+from store import SERIES
 
 app = Flask(__name__)
 
+# Default per-simulation row budget for plot data; ?max_points=0 sends every row
+DEFAULT_MAX_POINTS = 2000
+
+# Columns /api/history returns when ?fields= is left out: the plotted ones
+HISTORY_FIELDS = ('total_energy', 'temperature', 'density', 'speed_ns_day')
+
 # Global state updated by the poller thread
 _latest_data = None
-_host = None
+# host -> {'simulations', 'discovery_roots'}, as built by poller.load_fleet
+_fleet = None
+# Every known sim config (manual and auto-detected), each tagged with its host
 _simulations = None
-
-
-def init_dashboard(host, simulations):
-    global _host, _simulations
-    _host = host
-    _simulations = simulations
+# Extra poll_fleet keyword arguments from config (worker cap, deadlines)
+_poll_kwargs = {}
+
+# Snapshot generation counter and, for the last MAX_CURSORS generations, each
+# simulation's (weakref to its SimHistory, row count) keyed by (host, name) —
+# what a client holding that cursor has seen. Weak, so a history the poller
+# spills or forgets is freed rather than pinned by old cursors. Cursors handed
+# out ("<boot id>-<generation>") carry a per-process boot id: the counter
+# restarts with the process, and a cursor or ETag from a previous run must not
+# match this run's snapshots.
+MAX_CURSORS = 64
+BOOT_ID = secrets.token_hex(4)
+_generation = 0
+_cursors = OrderedDict()
+_data_lock = threading.Lock()
+# Signalled on every update_data; /api/stream clients block on it between pushes
+_data_changed = threading.Condition(_data_lock)
+
+# Seconds between SSE keepalive comments on an idle /api/stream connection
+STREAM_KEEPALIVE = 15
+
+# Encoded responses for the current generation, keyed by (generation, max_points,
+# since): (json bytes, gzip bytes, etag). Cleared by update_data.
+MAX_CACHED_RESPONSES = 32
+_response_cache = {}
+_encode_lock = threading.Lock()
+
+
+def init_dashboard(fleet, poll_kwargs=None):
+    global _fleet, _simulations, _poll_kwargs
+    _fleet = fleet
+    _simulations = [dict(sim, host=host) for host, spec in fleet.items() for sim in spec['simulations']]
+    _poll_kwargs = poll_kwargs or {}
+    # Every completed poll cycle lands here, whoever triggered it
+    add_publish_hook(update_data)
 
 
 def update_data(data):
-    global _latest_data
-    _latest_data = data
+    """Publish a new poll snapshot under the next generation number."""
+    global _latest_data, _generation
+    with _data_lock:
+        _generation += 1
+        data['generation'] = f'{BOOT_ID}-{_generation}'
+        _cursors[data['generation']] = {
+            _sim_key(s): (_history_ref(s.get('log_data')), s.get('log_rows', 0))
+            for s in data.get('simulations', [])
+        }
+        while len(_cursors) > MAX_CURSORS:
+            _cursors.popitem(last=False)
+        _latest_data = data
+        _response_cache.clear()
+        _data_changed.notify_all()
+
+
+def _history_ref(history):
+    return weakref.ref(history) if isinstance(history, SimHistory) else None
+
+
+def _sim_key(sim):
+    # Sim names are only unique per host
+    return (sim.get('host'), sim['name'])
+
+
+def _serialize(data, max_points=None):
+    """
+    JSON-ready copy of a poll snapshot: each SimHistory becomes {field: [values]},
+    LTTB-downsampled to at most max_points rows per simulation.
+    """
+    sims = []
+    for s in data.get('simulations', []):
+        history = s.get('log_data')
+        if isinstance(history, SimHistory):
+            s = dict(s, log_data=history.to_columns(stop=s.get('log_rows'), max_points=max_points))
+        sims.append(s)
+    return dict(data, simulations=sims, delta=False)
+
+
+def _serialize_delta(data, since, max_points=None):
+    """
+    Summary fields for every simulation plus only the log rows appended since
+    generation `since`. A simulation whose history was reset comes back whole,
+    flagged log_mode='full'. Returns None when the cursor is too old to diff
+    against, and the client must resync from a full snapshot.
+    """
+    seen = _cursors.get(since)
+    if seen is None:
+        return None
+    sims = []
+    for s in data.get('simulations', []):
+        history = s.get('log_data')
+        if isinstance(history, SimHistory):
+            rows = s.get('log_rows', 0)
+            seen_ref, seen_rows = seen.get(_sim_key(s), (None, 0))
+            if seen_ref is not None and seen_ref() is history and seen_rows <= rows:
+                start, mode = seen_rows, 'append'
+            else:
+                start, mode = 0, 'append' if seen_rows == 0 else 'full'
+            s = dict(s, log_mode=mode, log_data=history.to_columns(
+                start=start, stop=rows, max_points=max_points))
+        sims.append(s)
+    return dict(data, simulations=sims, delta=True, since=since)
 
 
 def update_simulations(simulations):
-    """Update the simulations list (called when auto-detected sims are found)."""
+    """
+    Update the simulations list (called when auto-detected sims are found).
+    Each config carries the host it runs on.
+    """
     global _simulations
     _simulations = simulations
 
@@ -56,6 +168,9 @@ DASHBOARD_HTML = """
   .status-stopped { background: #3d1d00; color: #d29922; border: 1px solid #9e6a03; }
   .status-unreachable { background: #3d0000; color: #f85149; border: 1px solid #da3633; }
   .auto-badge { font-size: 10px; color: #8b949e; font-weight: 400; margin-left: 6px; }
+  .host-heading { display: flex; justify-content: space-between; align-items: center;
+                  font-size: 13px; color: #8b949e; margin-top: 4px; }
+  .host-heading strong { color: #c9d1d9; font-size: 14px; }
 
   .progress-bar { background: #21262d; border-radius: 4px; height: 24px; margin: 8px 0; position: relative; overflow: hidden; }
   .progress-fill { height: 100%; border-radius: 4px; transition: width 0.5s ease; }
@@ -102,6 +217,7 @@ DASHBOARD_HTML = """
   <div class="controls">
     <span class="last-update" id="lastUpdate"></span>
     <button class="btn" id="refreshBtn" onclick="doRefresh()">Refresh</button>
+    <button class="btn" id="discoverBtn" onclick="doDiscover()">Find sims</button>
     <button class="btn btn-quit" id="quitBtn" onclick="quitApp()">Quit</button>
   </div>
 </div>
@@ -124,12 +240,38 @@ DASHBOARD_HTML = """
 
 <script>
 let data = null;
+let generation = null;  // cursor for /api/status?since=
+// Server downsamples plot series to this many points (~2 per horizontal pixel)
+const MAX_POINTS = Math.max(500, Math.round(window.innerWidth * 2));
 
 function statusClass(s) { return 'status-' + (s || 'stopped'); }
 
+// Sim names are only unique per host
+function simKey(s) { return (s.host || '') + '/' + s.name; }
+function isFleet() { return !!(data && data.hosts && data.hosts.length > 1); }
+function simLabel(s) { return isFleet() && s.host ? `${s.name} @ ${s.host}` : s.name; }
+
+function hostHeading(h) {
+  return `<div class="host-heading">
+    <strong>${h.host}</strong>
+    <span>${h.running}/${h.simulations} running${h.ns_per_day ? ' · ' + h.ns_per_day + ' ns/day' : ''}
+      ${h.reachable ? '' : `<span class="status-badge status-unreachable" style="margin-left:6px">${unreachableLabel(h)}</span>`}</span>
+  </div>`;
+}
+
+// An open circuit breaker means the host is skipped until its next probe
+function unreachableLabel(h) {
+  const b = h.breaker || {};
+  return b.state === 'open' ? `unreachable · retry in ${b.retry_in}s` : 'unreachable';
+}
+
 function renderSimCards(sims) {
   const container = document.getElementById('simCards');
+  const hosts = {};
+  (data.hosts || []).forEach(h => { hosts[h.host] = h; });
+  // Sims arrive grouped by host; head each group with the host's aggregates
   container.innerHTML = sims.map((s, i) => `
+    ${isFleet() && (i === 0 || sims[i - 1].host !== s.host) && hosts[s.host] ? hostHeading(hosts[s.host]) : ''}
     <div class="card">
       <div style="display:flex;justify-content:space-between;align-items:center">
         <h2>${s.name}${s._auto_detected ? '<span class="auto-badge">(auto)</span>' : ''}</h2>
@@ -168,16 +310,25 @@ function renderSimCards(sims) {
           <div class="stat-label">Total E (kJ/mol)</div>
         </div>
       </div>
-      ${s.status === 'running' ? `<div style="margin-top:12px;text-align:right"><button class="btn btn-danger" onclick="stopSim('${s.name.replace(/'/g,"\\'")}')">Stop</button></div>` : ''}
-      ${s.status === 'stopped' ? `<div style="margin-top:12px;text-align:right"><button class="btn" style="border-color:#3fb950;color:#3fb950" onclick="restartSim('${s.name.replace(/'/g,"\\'")}')">Restart</button></div>` : ''}
+      ${s.status === 'running' ? `<div style="margin-top:12px;text-align:right"><button class="btn btn-danger" onclick="stopSim(${i})">Stop</button></div>` : ''}
+      ${s.status === 'stopped' ? `<div style="margin-top:12px;text-align:right"><button class="btn" style="border-color:#3fb950;color:#3fb950" onclick="restartSim(${i})">Restart</button></div>` : ''}
     </div>
   `).join('');
 }
 
-function renderGPU(gpu) {
+function renderGPU(d) {
   const el = document.getElementById('gpuContent');
-  if (gpu.error) { el.innerHTML = `<span style="color:#f85149">${gpu.error}</span>`; return; }
-  el.innerHTML = `
+  if (!isFleet()) {
+    const h = (d.hosts || [])[0];
+    el.innerHTML = gpuHTML(h && (h.breaker || {}).state === 'open' ? { error: unreachableLabel(h) } : d.gpu);
+    return;
+  }
+  el.innerHTML = d.hosts.map(h => `<h3 style="margin-top:8px">${h.host}</h3>${gpuHTML(h.gpu)}`).join('');
+}
+
+function gpuHTML(gpu) {
+  if (gpu.error) return `<span style="color:#f85149">${gpu.error}</span>`;
+  return `
     <div style="font-size:13px;color:#8b949e;margin-bottom:8px">${gpu.name}</div>
     <div class="gpu-row">
       <span>GPU Util</span>
@@ -196,6 +347,66 @@ function renderGPU(gpu) {
   `;
 }
 
+// [plot div key, log_data field] for the four per-simulation plots
+const PLOT_FIELDS = [['energy', 'total_energy'], ['temp', 'temperature'], ['density', 'density'], ['speed', 'speed_ns_day']];
+
+function plotId(s) { return simKey(s).replace(/\\W/g, ''); }
+
+// simKey -> [t0, t1] (production ns) while that sim's plots are zoomed in; those
+// traces then hold /api/history rows for the window instead of the overview
+const zoomed = {};
+const zoomSeq = {};
+
+// Decode an /api/history?encoding=binary body into {field: Float64Array}
+function parseColumns(buf) {
+  const headLen = new DataView(buf).getUint32(0, true);
+  const head = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 4, headLen)));
+  const cols = {};
+  let offset = 4 + headLen;
+  head.fields.forEach(f => { cols[f] = new Float64Array(buf, offset, head.rows); offset += 8 * head.rows; });
+  return cols;
+}
+
+// Fill a sim's traces with full-resolution rows for range, or the overview when range is null
+async function loadWindow(s, range) {
+  const key = simKey(s);
+  const seq = zoomSeq[key] = (zoomSeq[key] || 0) + 1;
+  let cols = s.log_data;
+  if (range) {
+    const params = new URLSearchParams({ sim: s.name, host: s.host || '', t_start: range[0], t_end: range[1],
+                                         max_points: MAX_POINTS, encoding: 'binary' });
+    try {
+      const resp = await fetch('/api/history?' + params);
+      if (!resp.ok) return;
+      cols = parseColumns(await resp.arrayBuffer());
+    } catch (e) { return; }
+  }
+  // A newer zoom (or a reset) superseded this one while it was in flight
+  if (zoomSeq[key] !== seq || !cols || !cols.time_ns) return;
+  PLOT_FIELDS.forEach(([k, field]) => {
+    const el = document.getElementById('plot-' + k + '-' + plotId(s));
+    if (el) Plotly.restyle(el, { x: [cols.time_ns], y: [cols[field]] }, [0]);
+  });
+}
+
+// plotly_relayout on any of a sim's plots: sync the x range across all four and reload
+function onZoom(key, ev) {
+  const s = data && data.simulations.find(x => simKey(x) === key);
+  if (!s) return;
+  let range = ev['xaxis.range'] || (ev['xaxis.range[0]'] !== undefined ? [ev['xaxis.range[0]'], ev['xaxis.range[1]']] : null);
+  if (!range && !ev['xaxis.autorange']) return;  // y-only zoom
+  // Double-click resets to the full [0, target] axis: back to the overview
+  if (range && range[0] <= 0 && range[1] >= s.target_ns) range = null;
+  const prev = zoomed[key];
+  // Our own relayout calls below come back through here
+  if (range ? (prev && prev[0] === range[0] && prev[1] === range[1]) : !prev) return;
+  if (range) zoomed[key] = range; else delete zoomed[key];
+  PLOT_FIELDS.forEach(([k]) => {
+    Plotly.relayout('plot-' + k + '-' + plotId(s), { 'xaxis.range': range || [0, s.target_ns] });
+  });
+  loadWindow(s, range);
+}
+
 function renderPlots(sims) {
   const container = document.getElementById('plotCards');
   container.innerHTML = '';
@@ -210,42 +421,49 @@ function renderPlots(sims) {
   };
 
   sims.forEach(s => {
-    if (!s.log_data || s.log_data.length < 2) return;
-    const t = s.log_data.map(d => d.time_ns);
+    // log_data is columnar: { time_ns: [...], total_energy: [...], ... }
+    if (!s.log_data || !s.log_data.time_ns || s.log_data.time_ns.length < 2) return;
+    const t = s.log_data.time_ns;
 
     const card = document.createElement('div');
     card.className = 'card';
     card.style.gridColumn = '1 / -1';
-    card.innerHTML = `<h2>${s.name} — Time Series</h2>
+    card.innerHTML = `<h2>${simLabel(s)} — Time Series</h2>
       <div class="plot-container" style="display:grid;grid-template-columns:1fr;gap:8px;">
-        <div id="plot-energy-${s.name.replace(/\\W/g,'')}"></div>
-        <div id="plot-temp-${s.name.replace(/\\W/g,'')}"></div>
-        <div id="plot-density-${s.name.replace(/\\W/g,'')}"></div>
-        <div id="plot-speed-${s.name.replace(/\\W/g,'')}"></div>
+        <div id="plot-energy-${plotId(s)}"></div>
+        <div id="plot-temp-${plotId(s)}"></div>
+        <div id="plot-density-${plotId(s)}"></div>
+        <div id="plot-speed-${plotId(s)}"></div>
       </div>`;
     container.appendChild(card);
 
-    const id = s.name.replace(/\\W/g, '');
-    const simLayout = { ...plotLayout, xaxis: { ...plotLayout.xaxis, range: [0, s.target_ns] } };
+    const id = plotId(s);
+    const range = zoomed[simKey(s)];
+    const simLayout = { ...plotLayout, xaxis: { ...plotLayout.xaxis, range: range || [0, s.target_ns] } };
     Plotly.newPlot('plot-energy-' + id, [
-      { x: t, y: s.log_data.map(d => d.total_energy), type: 'scatter', mode: 'lines',
+      { x: t, y: s.log_data.total_energy, type: 'scatter', mode: 'lines',
         line: { color: '#58a6ff', width: 1 }, name: 'Total Energy' },
     ], { ...simLayout, yaxis: { ...plotLayout.yaxis, title: 'kJ/mol' }, title: { text: 'Total Energy', font: { size: 13 } } }, { responsive: true });
 
     Plotly.newPlot('plot-temp-' + id, [
-      { x: t, y: s.log_data.map(d => d.temperature), type: 'scatter', mode: 'lines',
+      { x: t, y: s.log_data.temperature, type: 'scatter', mode: 'lines',
         line: { color: '#f85149', width: 1 }, name: 'Temperature' },
     ], { ...simLayout, yaxis: { ...plotLayout.yaxis, title: 'K' }, title: { text: 'Temperature', font: { size: 13 } } }, { responsive: true });
 
     Plotly.newPlot('plot-density-' + id, [
-      { x: t, y: s.log_data.map(d => d.density), type: 'scatter', mode: 'lines',
+      { x: t, y: s.log_data.density, type: 'scatter', mode: 'lines',
         line: { color: '#3fb950', width: 1 }, name: 'Density' },
     ], { ...simLayout, yaxis: { ...plotLayout.yaxis, title: 'g/mL' }, title: { text: 'Density', font: { size: 13 } } }, { responsive: true });
 
     Plotly.newPlot('plot-speed-' + id, [
-      { x: t, y: s.log_data.map(d => d.speed_ns_day), type: 'scatter', mode: 'lines',
+      { x: t, y: s.log_data.speed_ns_day, type: 'scatter', mode: 'lines',
         line: { color: '#d29922', width: 1 }, name: 'Speed' },
     ], { ...simLayout, yaxis: { ...plotLayout.yaxis, title: 'ns/day' }, title: { text: 'Speed', font: { size: 13 } } }, { responsive: true });
+
+    PLOT_FIELDS.forEach(([k]) => {
+      document.getElementById('plot-' + k + '-' + id).on('plotly_relayout', ev => onZoom(simKey(s), ev));
+    });
+    if (range) loadWindow(s, range);
   });
 }
 
@@ -266,7 +484,7 @@ function updateLogTail() {
 function renderLogSelect(sims) {
   const sel = document.getElementById('logSelect');
   const prev = sel.value;
-  sel.innerHTML = sims.map((s, i) => `<option value="${i}">${s.name}</option>`).join('');
+  sel.innerHTML = sims.map((s, i) => `<option value="${i}">${simLabel(s)}</option>`).join('');
   if (prev !== '') { sel.value = prev; }
   else {
     const runIdx = sims.findIndex(s => s.status === 'running');
@@ -274,10 +492,16 @@ function renderLogSelect(sims) {
   }
 }
 
-function render(d) {
+function render(d, replot = true) {
   data = d;
-  // Sort: running first, then stopped, then completed — within each group, auto-detected (recent) before manual
+  // Group by host in fleet order, then sort: running first, then stopped, then
+  // completed — within each group, auto-detected (recent) before manual
+  const hostOrder = {};
+  (d.hosts || []).forEach((h, i) => { hostOrder[h.host] = i; });
   d.simulations.sort((a, b) => {
+    const aHost = hostOrder[a.host] ?? 0;
+    const bHost = hostOrder[b.host] ?? 0;
+    if (aHost !== bHost) return aHost - bHost;
     const order = { running: 0, unreachable: 1, stopped: 2, completed: 3, error: 4 };
     const aOrd = order[a.status] ?? 5;
     const bOrd = order[b.status] ?? 5;
@@ -287,19 +511,74 @@ function render(d) {
     const bAuto = b._auto_detected ? 0 : 1;
     return aAuto - bAuto;
   });
-  document.getElementById('lastUpdate').textContent = 'Updated: ' + new Date(d.timestamp).toLocaleTimeString();
+  document.getElementById('lastUpdate').textContent =
+    (d.stale ? 'Cached from ' : 'Updated: ') + new Date(d.timestamp).toLocaleTimeString();
   renderSimCards(d.simulations);
-  renderGPU(d.gpu);
+  renderGPU(d);
   renderLogSelect(d.simulations);
   updateLogTail();
-  renderPlots(d.simulations);
+  if (replot) renderPlots(d.simulations);
+}
+
+// Merge a ?since= delta into the current data: append new rows to each sim's
+// columns and extend the existing Plotly traces in place.
+function applyDelta(d) {
+  const prev = {};
+  data.simulations.forEach(s => { prev[simKey(s)] = s; });
+  const order = sims => sims.map(simKey).join('\\n');
+  const oldOrder = order(data.simulations);
+  let replot = d.simulations.length !== data.simulations.length;
+  const appended = [];
+  d.simulations.forEach(s => {
+    const old = prev[simKey(s)];
+    if (!old) { replot = true; return; }
+    if (s.log_mode === 'full') { replot = true; return; }
+    if (s.log_mode !== 'append' || !s.log_data) return;
+    const added = s.log_data;
+    const merged = {};
+    for (const k in added) merged[k] = ((old.log_data || {})[k] || []).concat(added[k]);
+    s.log_data = merged;
+    if (!added.time_ns || !added.time_ns.length) return;
+    if (!document.getElementById('plot-energy-' + plotId(s))) replot = true;
+    // Appended rows are raw; once a sim has drifted far past the point budget, resync
+    if (merged.time_ns.length > 2 * MAX_POINTS) generation = null;
+    appended.push([s, added]);
+  });
+  render(d, false);
+  if (replot || order(d.simulations) !== oldOrder) {
+    renderPlots(d.simulations);
+    return;
+  }
+  appended.forEach(([s, added]) => {
+    // Zoomed traces hold a window; the new rows show up again on zooming out
+    if (zoomed[simKey(s)]) return;
+    PLOT_FIELDS.forEach(([key, field]) => {
+      Plotly.extendTraces('plot-' + key + '-' + plotId(s), { x: [added.time_ns], y: [added[field]] }, [0]);
+    });
+  });
+}
+
+// Take a snapshot from /api/status or the stream. Both can deliver the same
+// generation, and a delta only applies on top of the one it was computed
+// from: returns false when it doesn't fit and the client must resync in full.
+function receive(d) {
+  if (data && d.generation === generation) return true;
+  if (d.delta && (!data || d.since !== generation)) return false;
+  generation = d.generation ?? null;
+  // applyDelta may clear the cursor again to force a full resync next time
+  if (d.delta) applyDelta(d); else render(d);
+  return true;
 }
 
 async function refresh() {
   try {
-    const resp = await fetch('/api/status');
-    const d = await resp.json();
-    render(d);
+    let url = '/api/status?max_points=' + MAX_POINTS;
+    if (generation !== null && data) url += '&since=' + generation;
+    const resp = await fetch(url);
+    if (!receive(await resp.json())) {
+      generation = null;
+      await refresh();
+    }
   } catch (e) {
     document.getElementById('lastUpdate').textContent = 'Error: ' + e.message;
   }
@@ -318,30 +597,48 @@ async function doRefresh() {
   }
 }
 
+async function doDiscover() {
+  const btn = document.getElementById('discoverBtn');
+  btn.textContent = 'Scanning...';
+  btn.disabled = true;
+  try {
+    const resp = await fetch('/api/discover', { method: 'POST' });
+    const d = await resp.json();
+    const added = Object.values(d.changes || {}).reduce((n, c) => n + ((c && c.added) || []).length, 0);
+    btn.textContent = added ? `${added} new` : 'No new sims';
+    await refresh();
+  } catch (e) {
+    btn.textContent = 'Error';
+  }
+  setTimeout(() => { btn.textContent = 'Find sims'; btn.disabled = false; }, 2000);
+}
+
 // Popover detection — WKWebView doesn't support confirm()/alert()
 const isPopover = new URLSearchParams(window.location.search).has('popover');
 if (isPopover) {
   document.getElementById('quitBtn').style.display = 'inline-block';
 }
 
-async function stopSim(name) {
+async function stopSim(i) {
+  const sim = data.simulations[i];
   if (!isPopover && !confirm('Stop this simulation?')) return;
   const btn = event.target;
   btn.textContent = 'Stopping...';
   btn.disabled = true;
   try {
-    await fetch('/api/stop', { method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({name: name}) });
+    await fetch('/api/stop', { method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({name: sim.name, host: sim.host}) });
     setTimeout(async () => { await fetch('/api/refresh', {method:'POST'}); setTimeout(refresh, 3000); }, 2000);
   } catch (e) { btn.textContent = 'Error'; if (!isPopover) alert('Error: ' + e.message); }
 }
 
-async function restartSim(name) {
+async function restartSim(i) {
+  const sim = data.simulations[i];
   if (!isPopover && !confirm('Restart this simulation?')) return;
   const btn = event.target;
   btn.textContent = 'Starting...';
   btn.disabled = true;
   try {
-    await fetch('/api/restart', { method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({name: name}) });
+    await fetch('/api/restart', { method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({name: sim.name, host: sim.host}) });
     setTimeout(async () => { await fetch('/api/refresh', {method:'POST'}); setTimeout(refresh, 5000); }, 3000);
   } catch (e) { btn.textContent = 'Error'; if (!isPopover) alert('Error: ' + e.message); }
 }
@@ -352,9 +649,27 @@ async function quitApp() {
   } catch (e) { /* app is terminating */ }
 }
 
-// Initial load + auto-refresh
-refresh();
-setInterval(refresh, 30000);
+// Live updates: the server pushes every poll over SSE. EventSource reconnects
+// by itself, sending Last-Event-ID so the server can reply with just a delta.
+let stream = null;
+function connectStream() {
+  stream = new EventSource('/api/stream?max_points=' + MAX_POINTS);
+  stream.addEventListener('snapshot', e => {
+    if (!receive(JSON.parse(e.data)) || generation === null) {
+      // Out of step with the stream (a refresh() got ahead of it), or the client
+      // copy drifted past the point budget: reconnect fresh for a full snapshot
+      stream.close();
+      connectStream();
+    }
+  });
+}
+
+if (window.EventSource) {
+  connectStream();
+} else {
+  refresh();
+  setInterval(refresh, 30000);
+}
 </script>
 </body>
 </html>
@@ -366,55 +681,127 @@ def index():
     return render_template_string(DASHBOARD_HTML)
 
 
+def _encoded(data, max_points, since=None):
+    """
+    (json bytes, gzip bytes, unquoted etag) for a snapshot, or for a delta when since
+    is a known cursor. Each variant is serialized once per generation and
+    shared by every client asking for it.
+    """
+    if since is not None and since not in _cursors:
+        since = None  # stale cursor, or one from a previous run: a full snapshot
+    key = (data['generation'], max_points, since)
+    with _encode_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            payload = _serialize_delta(data, since, max_points) if since is not None else None
+            if payload is None:
+                payload = _serialize(data, max_points)
+            body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            entry = (body, gzip.compress(body, 6), f'g{key[0]}-m{max_points}-s{since}')
+            with _data_lock:
+                # Only cache if no newer generation was published meanwhile
+                if _latest_data is data and len(_response_cache) < MAX_CACHED_RESPONSES:
+                    _response_cache[key] = entry
+    return entry
+
+
 @app.route('/api/status')
 def api_status():
-    global _latest_data, _host, _simulations
-    # Do a fresh poll if no data yet or if requested
-    if _latest_data is None and _host and _simulations:
-        _latest_data = poll_all(_host, _simulations)
-    if _latest_data is None:
+    global _latest_data
+    max_points = request.args.get('max_points', DEFAULT_MAX_POINTS, type=int)
+    since = request.args.get('since')
+    # Do a fresh poll if no data yet or if requested (published via update_data)
+    if _latest_data is None and _fleet:
+        poll_fleet(_fleet, **_poll_kwargs)
+    data = _latest_data
+    if data is None:
         return jsonify({'error': 'No data yet', 'simulations': [], 'gpu': {}, 'timestamp': None})
-    # Serialize log_data for JSON (it's already a list of dicts)
-    return jsonify(_latest_data)
-
-
-def _find_sim_by_name(name):
-    """Look up a simulation config by name."""
+    # ?since=<generation>: only rows appended after the client's cursor
+    body, gz_body, etag = _encoded(data, max_points, since)
+    use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    if use_gzip:
+        # Strong ETags must differ between encodings of the same snapshot
+        etag += '-gz'
+    headers = {'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        body = gz_body
+    return Response(body, mimetype='application/json', headers=headers)
+
+
+@app.route('/api/stream')
+def api_stream():
+    """
+    Server-Sent Events push of poll snapshots. The first event is a full
+    snapshot (or a delta, when reconnecting with Last-Event-ID); each later
+    poll is pushed as a delta against the previous event's generation.
+    """
+    max_points = request.args.get('max_points', DEFAULT_MAX_POINTS, type=int)
+    last_id = request.headers.get('Last-Event-ID')
+
+    def events():
+        sent = last_id
+        yield 'retry: 5000\n\n'
+        while True:
+            with _data_changed:
+                _data_changed.wait_for(
+                    lambda: _latest_data is not None and _latest_data['generation'] != sent,
+                    timeout=STREAM_KEEPALIVE)
+                data = _latest_data
+            if data is None or data['generation'] == sent:
+                yield ': keepalive\n\n'
+                continue
+            body = _encoded(data, max_points, sent)[0].decode('utf-8')
+            sent = data['generation']
+            yield f"id: {sent}\nevent: snapshot\ndata: {body}\n\n"
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _find_sim(host, name):
+    """Look up a simulation config by host and name (any host when host is None)."""
     for s in (_simulations or []):
-        if s.get('name') == name:
+        if s.get('name') == name and host in (None, s.get('host')):
             return s
     return None
 
 
 @app.route('/api/stop', methods=['POST'])
 def api_stop():
-    global _host, _simulations
     data = request.get_json()
     name = data.get('name', '')
-    sim = _find_sim_by_name(name)
+    sim = _find_sim(data.get('host'), name)
     if not sim:
         return jsonify({'error': f'Simulation not found: {name}'}), 400
     directory = sim.get('directory', '')
     if not directory:
         return jsonify({'error': 'No directory configured'}), 400
 
-    from poller import ssh_run
-    # Kill python processes whose cwd matches the sim directory + kill process group
-    result = ssh_run(_host,
-        f"for pid in $(pgrep '[p]ython' 2>/dev/null); do "
-        f"cwd=$(readlink /proc/$pid/cwd 2>/dev/null); "
-        f"[ \"$cwd\" = \"{directory}\" ] && kill -- -$(ps -o pgid= -p $pid | tr -d ' ') 2>/dev/null; "
-        f"kill $pid 2>/dev/null; done")
+    from poller import sim_stop_targets, ssh_run
+    # Target exactly the sim's processes in a fresh process table snapshot
+    targets = sim_stop_targets(sim['host'], sim)
+    if targets is None:
+        return jsonify({'error': 'SSH connection failed'}), 502
+    processes, pgids = targets
+    if not processes:
+        return jsonify({'ok': True, 'result': 'No running processes found'})
+    # Kill the groups only the sim runs in (conda run wrappers and workers) and the processes themselves
+    pids = ' '.join(str(p['pid']) for p in processes)
+    commands = [f"kill -- -{pgid} 2>/dev/null" for pgid in pgids]
+    commands += [f"kill {pids} 2>/dev/null", f"echo 'killed {pids}'"]
+    result = ssh_run(sim['host'], ' ; '.join(commands))
     return jsonify({'ok': True, 'result': result})
 
 
 @app.route('/api/restart', methods=['POST'])
 def api_restart():
     """Restart a stopped simulation."""
-    global _host, _simulations
     data = request.get_json()
     name = data.get('name', '')
-    sim = _find_sim_by_name(name)
+    sim = _find_sim(data.get('host'), name)
     if not sim:
         return jsonify({'error': f'Simulation not found: {name}'}), 400
     directory = sim.get('directory', '')
@@ -429,7 +816,7 @@ def api_restart():
     from poller import ssh_run
     # Source conda init for non-interactive SSH, then run the launch command
     conda_init = "source /home/max/miniforge3/etc/profile.d/conda.sh && conda activate md-env && "
-    result = ssh_run(_host, conda_init + launch_cmd)
+    result = ssh_run(sim['host'], conda_init + launch_cmd)
     return jsonify({'ok': True, 'result': result})
 
 
@@ -441,9 +828,98 @@ def api_quit():
     return jsonify({'ok': True})
 
 
+@app.route('/api/discover', methods=['POST'])
+def api_discover():
+    """Scan every host for new simulations now, and poll the fleet if any turned up."""
+    if not _fleet:
+        return jsonify({'ok': True, 'changes': {}})
+    changes = discover_fleet(_fleet)
+    if any(c and c['added'] for c in changes.values()):
+        poll_fleet(_fleet, **_poll_kwargs)
+    return jsonify({'ok': True, 'changes': changes})
+
+
+@app.route('/api/cache')
+def api_cache():
+    """How full the poller's caches are: history bytes against the budget, per log."""
+    return jsonify(cache_usage(_poll_kwargs.get('memory_budget', HISTORY_MEMORY_BUDGET)))
+
+
+@app.route('/api/metrics')
+def api_metrics():
+    """
+    Long-term GPU (?series=gpu&host=) or per-sim status (?series=status&host=&name=)
+    samples over ?t_start=&t_end= (unix seconds), read from the coarsest stored
+    tier that still gives ?max_points= points; rolled-up buckets carry
+    <field>_min / <field>_max next to the mean.
+    """
+    series = request.args.get('series', 'gpu')
+    host = request.args.get('host') or next(iter(_fleet or {}), None)
+    if series not in ('gpu', 'status') or host is None:
+        return jsonify({'error': 'unknown series or host'}), 400
+    key = (host,) if series == 'gpu' else (host, request.args.get('name', ''))
+    fields = [f for f in request.args.get('fields', '').split(',') if f] or None
+    unknown = sorted(set(fields or ()) - set(SERIES[series][2]))
+    if unknown:
+        return jsonify({'error': f"unknown {series} fields: {', '.join(unknown)}"}), 400
+    result = query_metrics(series, key, fields, request.args.get('t_start', type=float),
+                           request.args.get('t_end', type=float),
+                           request.args.get('max_points', DEFAULT_MAX_POINTS, type=int))
+    if result is None:
+        return jsonify({'error': 'history store not enabled (history_db)'}), 404
+    # NaN (a sim with no speed yet) is not JSON
+    return jsonify({name: value if name == 'tier' else
+                    [None if v != v else v for v in value.tolist()]
+                    for name, value in result.items()})
+
+
+def _pack_columns(header, columns):
+    """
+    ?encoding=binary body: a little-endian uint32 header length, the JSON
+    header (with 'fields' and 'rows') padded with spaces to a multiple of 8
+    bytes, then each field's rows as little-endian float64 in 'fields' order,
+    so the client can view them as Float64Arrays without copying.
+    """
+    head = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    head += b' ' * (-(len(head) + 4) % 8)
+    parts = [struct.pack('<I', len(head)), head]
+    parts.extend(columns[f].astype('<f8').tobytes() for f in header['fields'])
+    return b''.join(parts)
+
+
+@app.route('/api/history')
+def api_history():
+    """
+    One simulation's log columns (?fields=, default the plotted ones; time_ns
+    always comes along) over production time ?t_start=&t_end= (ns, the plot x
+    axis) with at most ?max_points= rows, so a zoomed-in window comes back at
+    full resolution. ?encoding=binary packs them as typed arrays (_pack_columns).
+    """
+    name = request.args.get('sim', '')
+    sim = _find_sim(request.args.get('host') or None, name)
+    if not sim:
+        return jsonify({'error': f'Simulation not found: {name}'}), 404
+    fields = [f for f in request.args.get('fields', '').split(',') if f and f != 'time_ns'] or list(HISTORY_FIELDS)
+    try:
+        result = query_history(sim['host'], sim, fields, request.args.get('t_start', type=float),
+                               request.args.get('t_end', type=float),
+                               request.args.get('max_points', DEFAULT_MAX_POINTS, type=int))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if result is None:
+        return jsonify({'error': f'No history for {name} yet'}), 404
+    header = {'sim': sim['name'], 'host': sim['host'], 'source': result['source'], 'tier': result['tier'],
+              'fields': ['time_ns'] + fields, 'rows': len(result['time_ns'])}
+    if request.args.get('encoding') == 'binary':
+        return Response(_pack_columns(header, result), mimetype='application/octet-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # NaN (a sim with no speed yet) is not JSON
+    header['columns'] = {f: [None if v != v else v for v in result[f].tolist()] for f in header['fields']}
+    return jsonify(header)
+
+
 @app.route('/api/refresh', methods=['POST'])
 def api_refresh():
-    global _latest_data, _host, _simulations
-    if _host and _simulations:
-        _latest_data = poll_all(_host, _simulations)
+    if _fleet:
+        poll_fleet(_fleet, **_poll_kwargs)
     return jsonify({'ok': True})
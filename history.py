@@ -0,0 +1,164 @@
+"""
+Columnar in-memory history of production.log rows.
+One contiguous typed NumPy array per field, grown by doubling, so appends are
+amortized O(1) and slices are zero-copy views. Also holds the server-side
+downsampling used to keep plot payloads bounded.
+"""
+
+import numpy as np
+
+
+# production.log CSV columns, in file order
+LOG_COLUMNS = (
+    'step', 'time_ps', 'potential_energy', 'kinetic_energy', 'total_energy',
+    'temperature', 'volume', 'density', 'speed_ns_day',
+)
+
+COLUMN_DTYPES = {name: (np.int64 if name == 'step' else np.float64) for name in LOG_COLUMNS}
+
+# Axis-like columns: monotonic in time, so they carry no shape worth preserving
+AXIS_COLUMNS = ('step', 'time_ps', 'time_ns')
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points of (x, y) that best
+    preserve its visual shape. The first and last points are always kept, and
+    a spike survives because it forms the largest triangle in its bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n - 2 interior points split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        cx = x[nlo:nhi].mean()
+        cy = y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(x, signals, max_points):
+    """
+    Indices of at most max_points of the rows sampled at x, or None when they
+    all fit. Each column of signals ({name: values}) gets an equal share of
+    the budget via LTTB against x; the union keeps every one's shape intact.
+    """
+    n = len(x)
+    if not max_points or n <= max_points:
+        return None
+    if not signals:
+        return np.unique(np.linspace(0, n - 1, max_points).astype(np.int64))
+    share = max(3, max_points // len(signals))
+    return np.unique(np.concatenate([lttb_indices(x, y, share) for y in signals.values()]))
+
+
+class SimHistory:
+    """Append-only columnar store for one simulation's log rows."""
+
+    def __init__(self, capacity=1024):
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def capacity(self):
+        return len(self._columns['step'])
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column buffers (including unused capacity)."""
+        return sum(col.nbytes for col in self._columns.values())
+
+    def _reserve(self, n):
+        if n <= self.capacity:
+            return
+        capacity = max(self.capacity, 1)
+        while capacity < n:
+            capacity *= 2
+        for name, col in self._columns.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self._len] = col[:self._len]
+            self._columns[name] = grown
+
+    def append(self, columns):
+        """Append rows given as {column: array} (as returned by poller.parse_log_columns)."""
+        n = len(columns['step'])
+        if n == 0:
+            return
+        self._reserve(self._len + n)
+        for name, col in self._columns.items():
+            col[self._len:self._len + n] = columns[name]
+        self._len += n
+
+    def column(self, name, start=0, stop=None):
+        """Zero-copy view of one column over rows [start, stop)."""
+        stop = self._len if stop is None else min(stop, self._len)
+        return self._columns[name][start:stop]
+
+    def __getitem__(self, index):
+        """history[a:b] -> {column: view}; history[i] -> row dict of Python scalars."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            return {name: col[start:stop:step] for name, col in self._columns.items()}
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('history index out of range')
+        row = {name: col[index].item() for name, col in self._columns.items()}
+        row['time_ns'] = row['time_ps'] / 1000.0
+        return row
+
+    def last(self):
+        """The most recent row as a dict, or None when empty."""
+        return self[-1] if self._len else None
+
+    def production_ns(self, start=0, stop=None):
+        """Simulation time in ns relative to the first row (start of production)."""
+        if not self._len:
+            return np.empty(0)
+        first_ns = self._columns['time_ps'][0] / 1000.0
+        return self.column('time_ps', start, stop) / 1000.0 - first_ns
+
+    def downsample_indices(self, fields, max_points, start=0, stop=None):
+        """
+        Row indices (relative to start) that keep at most max_points rows of
+        [start, stop). Each non-axis field gets an equal share of the budget
+        via LTTB against time; the union keeps every field's shape intact.
+        """
+        stop = self._len if stop is None else min(stop, self._len)
+        if not max_points or stop - start <= max_points:
+            return None
+        signals = [f for f in fields if f not in AXIS_COLUMNS] or ['total_energy']
+        return downsample(self.column('time_ps', start, stop),
+                          {f: self.column(f, start, stop) for f in signals}, max_points)
+
+    def to_columns(self, fields=None, start=0, stop=None, max_points=None):
+        """
+        JSON-ready {field: list} over rows [start, stop), downsampled to at
+        most max_points rows when given. `time_ns` is production-relative,
+        like the dashboard plots expect.
+        """
+        fields = fields or LOG_COLUMNS + ('time_ns',)
+        keep = self.downsample_indices(fields, max_points, start, stop)
+        out = {}
+        for name in fields:
+            if name == 'time_ns':
+                values = self.production_ns(start, stop)
+            else:
+                values = self.column(name, start, stop)
+            out[name] = (values if keep is None else values[keep]).tolist()
+        return out
@@ -13,6 +13,7 @@ Usage:
 import os
 import sys
 import threading
+import time
 import queue
 import logging
 
@@ -23,7 +24,9 @@ logging.getLogger('werkzeug').setLevel(logging.ERROR)
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from poller import poll_all
+from poller import (DISCOVERY_INTERVAL, HISTORY_MEMORY_BUDGET, MAX_WORKERS_PER_HOST, SIM_TIMEOUT,
+                    discover_fleet, discovery_due_at, host_due_at, load_fleet, load_warm_start,
+                    open_store, poll_fleet, save_warm_start)
 from dashboard import app as flask_app, init_dashboard, update_data, update_simulations
 from popover import setup_popover
 
@@ -37,14 +40,25 @@ def load_config():
 class SimMonitorApp(rumps.App):
     def __init__(self, config):
         self.config = config
-        self.host = config['host']
-        self.simulations = config['simulations']
+        # host -> {'simulations', 'discovery_roots'}; a single `host:` config is a fleet of one
+        self.fleet = load_fleet(config)
         self.poll_interval = config.get('poll_interval', 30)
+        self.discovery_interval = config.get('discovery_interval', DISCOVERY_INTERVAL)
         self.port = config.get('dashboard_port', 5050)
+        self.poll_kwargs = {
+            'max_workers': config.get('max_workers_per_host', MAX_WORKERS_PER_HOST),
+            'sim_timeout': config.get('sim_timeout', SIM_TIMEOUT),
+            'poll_interval': self.poll_interval,
+            'stream': config.get('stream_logs', False),
+            'collector': config.get('remote_collector', False),
+            'memory_budget': int(config.get('history_memory_mb', HISTORY_MEMORY_BUDGET // 2 ** 20) * 2 ** 20),
+        }
+        self.state_file = os.path.expanduser(config.get('state_file') or '')
         self.latest_data = None
         self._update_queue = queue.Queue()
-        self._poll_count = 0
-        self._polling = False
+        # Hosts with a poll in flight; each host is polled on its own thread and schedule
+        self._polling = set()
+        self._discovering = False
         self._popover_ready = False
 
         super().__init__(
@@ -53,12 +67,27 @@ class SimMonitorApp(rumps.App):
             quit_button=None,
         )
 
+        # Reload stored history so the first poll only fetches what is new
+        if config.get('history_db'):
+            db_path = os.path.expanduser(config['history_db'])
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            open_store(db_path)
+
         # Start Flask in background
-        init_dashboard(self.host, self.simulations)
+        init_dashboard(self.fleet, self.poll_kwargs)
+
+        # Serve the previous run's last snapshot (flagged stale) until the first poll lands
+        if self.state_file:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            warm = load_warm_start(self.state_file)
+            if warm is not None:
+                update_data(warm)
+                self._update_queue.put(warm)
         threading.Thread(target=self._run_flask, daemon=True).start()
 
-        # Kick off initial poll immediately
-        threading.Thread(target=self._do_poll, daemon=True).start()
+        # Kick off the initial poll of every host immediately
+        for host in self.fleet:
+            self._start_poll(host)
 
     def _run_flask(self):
         import logging as lg
@@ -82,32 +111,48 @@ class SimMonitorApp(rumps.App):
         except queue.Empty:
             pass
 
-        # Trigger a new poll every poll_interval seconds (poll_interval / 2s ticks)
-        self._poll_count += 1
-        if self._poll_count >= self.poll_interval // 2 and not self._polling:
-            self._poll_count = 0
-            threading.Thread(target=self._do_poll, daemon=True).start()
-
-    def _do_poll(self):
-        """Runs in background thread — NO UI updates here."""
-        self._polling = True
+        # Poll a host as soon as any of its sims (or its heartbeat) is due; each sim
+        # has its own schedule, with poll_interval as the ceiling for running ones.
+        # A host still in flight (hung, timing out) doesn't hold up the others.
+        now = time.monotonic()
+        for host, spec in self.fleet.items():
+            if host not in self._polling and host_due_at(
+                    host, spec.get('simulations', []), self.poll_interval) <= now:
+                self._start_poll(host)
+
+        # Discovery runs on its own, slower schedule; sims it finds are due at once
+        if not self._discovering and discovery_due_at(self.fleet, self.discovery_interval) <= time.monotonic():
+            threading.Thread(target=self._do_discovery, daemon=True).start()
+
+    def _start_poll(self, host):
+        self._polling.add(host)
+        threading.Thread(target=self._do_poll, args=(host,), daemon=True).start()
+
+    def _do_poll(self, host):
+        """Runs in background thread — NO UI updates here. Polls one host."""
         try:
-            data = poll_all(self.host, self.simulations)
+            data = poll_fleet(self.fleet, hosts=(host,), scheduled=True, **self.poll_kwargs)
+            # poll_fleet publishes the snapshot to the dashboard itself
             self.latest_data = data
-            update_data(data)
+            if self.state_file:
+                save_warm_start(self.state_file)
             # Sync simulations list so dashboard stop/restart works for auto-detected sims
             if data.get('simulations'):
                 sim_configs = []
                 for s in data['simulations']:
                     cfg = {
                         'name': s.get('name', ''),
+                        'host': s.get('host', ''),
                         'directory': s.get('_directory', ''),
                         'script': s.get('_script', ''),
-                        'log': 'production.log',
+                        'log': s.get('_log', 'production.log'),
                         'target_ns': s.get('target_ns', 500),
                     }
                     if s.get('status') == 'completed':
                         cfg['status'] = 'completed'
+                    if s.get('_auto_detected'):
+                        # Matched to its processes by working directory, not script
+                        cfg['_auto_detected'] = True
                     if s.get('_launch_cmd'):
                         cfg['launch_cmd'] = s['_launch_cmd']
                     sim_configs.append(cfg)
@@ -116,7 +161,17 @@ class SimMonitorApp(rumps.App):
         except Exception:
             self._update_queue.put(None)
         finally:
-            self._polling = False
+            self._polling.discard(host)
+
+    def _do_discovery(self):
+        """Runs in background thread — scans every host for new simulations."""
+        self._discovering = True
+        try:
+            discover_fleet(self.fleet)
+        except Exception:
+            pass
+        finally:
+            self._discovering = False
 
     def _apply_data(self, data):
         """Called on the MAIN thread only — safe to update menu bar."""
@@ -2,37 +2,332 @@
 SSH poller for remote simulation monitoring.
 Connects to the remote host via subprocess ssh, collects simulation
 status, log data, process info, and GPU stats in a single SSH call.
+Poll cycles run on an asyncio engine (poll_all_async / poll_fleet_async);
+poll_all and poll_fleet are the synchronous entry points.
 """
 
+import asyncio
+import atexit
+import base64
 import csv
+import hashlib
 import io
 import json
+import math
 import os
+import re
+import select
 import subprocess
+import threading
 import time
+import warnings
+from collections import deque
 from datetime import datetime, timedelta
 
+import numpy as np
 
-# Cache of last successful poll result per simulation name.
+from history import AXIS_COLUMNS, LOG_COLUMNS, SimHistory, downsample
+from store import HistoryStore
+
+
+# Cache of last successful poll result per (host, simulation name).
 # Used to preserve "completed" state when SSH becomes unreachable.
 _last_known = {}
 
-# Cache of previously discovered sim configs (keyed by normalized directory).
-# Keeps sims visible after their process stops or log ages past the -mmin window.
+# Cache of previously discovered sim configs (keyed by (host, normalized directory)).
+# Keeps sims visible after their process stops or log ages past the -mmin window,
+# until no discovery run has found them for DISCOVERED_MAX_AGE seconds.
 _discovered_cache = {}
+# Same keys -> wall-clock time the sim was last found by discovery
+_discovered_seen = {}
+DISCOVERED_MAX_AGE = 14 * 86400
 
+# Remote directories scanned for simulations when a host doesn't list its own,
+# and how deep below them production.log / sim_meta.json are looked for
+# (2: the root itself and its direct subdirectories)
+DISCOVERY_ROOTS = ('~/code/md-learning/simulations', '~/code/md/simulations')
+DISCOVERY_DEPTH = 2
 
-def ssh_run(host, command, timeout=15):
-    """Run a command on the remote host via SSH."""
+# Discovery runs on its own schedule (see discover_fleet), not in poll cycles:
+# a host's discovered sims are served from _discovered_cache for this many
+# seconds before it is scanned again. Only a host's first cycle scans inline.
+DISCOVERY_INTERVAL = 600
+
+# host -> what its last discovery run found: {'at', 'found', 'added', 'missing'}
+_discovery_changes = {}
+
+# Last completed poll_all snapshot per host, so a fleet snapshot published
+# while some hosts are still being polled shows their previous state
+_host_snapshots = {}
+# Serializes save_warm_start: hosts polled on their own threads each save after their cycle
+_warm_lock = threading.Lock()
+# Guards writes to _last_known and _host_snapshots: poll cycles replace entries
+# while log streams (see _stream_update) read-modify-write them from their threads
+_results_lock = threading.Lock()
+
+# Incremental tail state per (host, log path): inode, byte offset consumed,
+# held-back partial trailing line (raw bytes), the SimHistory of rows read so
+# far, the last LOG_TAIL_LINES raw lines for the dashboard's log view, and the
+# "inode size mtime" stat plus monotonic time of the last full read.
+_log_state = {}
+# Guards _log_state: polls and log streams (see LogStream) both feed it
+_log_lock = threading.Lock()
+
+# On-disk history store (see open_store), or None to keep history in memory only
+_store = None
+
+LOG_TAIL_LINES = 30
+
+# Memory budget for parsed log histories (_log_state, whose SimHistory objects
+# _last_known shares). A log that hasn't grown for HISTORY_IDLE seconds, and
+# the least recently grown logs while the total is over the budget, are
+# spilled: only an LTTB preview of HISTORY_PREVIEW_POINTS rows stays in memory,
+# and the full history is loaded back from the history store when the log
+# grows again. Without a store the preview is all that is kept.
+HISTORY_MEMORY_BUDGET = 256 * 2 ** 20
+HISTORY_IDLE = 6 * 3600
+HISTORY_PREVIEW_POINTS = 2000
+
+# Seconds a sim whose log is unchanged may be served from its last full poll
+# before it is polled in full again (process check included)
+UNCHANGED_REFRESH = 300
+
+# Default cap on concurrent per-simulation SSH calls to one host, and the
+# per-simulation poll deadline in seconds
+MAX_WORKERS_PER_HOST = 4
+SIM_TIMEOUT = 15
+
+# Adaptive scheduling (scheduled=True): every sim gets its own next-poll time
+# from its status, how often its log is written and how close it is to the
+# target; poll_interval is the ceiling for a running sim. Hosts are never
+# cycled more often than HOST_MIN_INTERVAL, and every host is cycled at least
+# once per poll_interval.
+POLL_INTERVAL = 30
+SCHEDULE_MIN_INTERVAL = 5
+HOST_MIN_INTERVAL = 5
+STOPPED_INTERVAL_FACTOR = 4
+COMPLETED_INTERVAL_FACTOR = 30
+
+# (host, sim name) -> monotonic time the sim is next due
+_next_poll = {}
+# host -> monotonic time of its last poll cycle and of its last discovery run
+_host_polled_at = {}
+_host_discovered_at = {}
+
+# Callbacks invoked with every completed poll_all snapshot (e.g. dashboard.update_data)
+_publish_hooks = []
+
+# Remote collector (collector=True): collector.py is installed on each host
+# under a content-hashed name and run once per batched cycle in place of the
+# shell script. A host where it fails is polled by shell for COLLECTOR_RETRY
+# seconds before the collector is tried again.
+COLLECTOR_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'collector.py')
+COLLECTOR_DIR = '~/.cache/sim-monitor'
+COLLECTOR_PYTHON = 'python3'
+COLLECTOR_RETRY = 600
+# Log reads up to this many bytes come back from the collector parsed; larger
+# ones come back raw, for parse_log_columns (faster than the collector's Python)
+COLLECTOR_PARSE_BYTES = 65536
+
+# host -> monotonic time the collector last failed there
+_collector_failed = {}
+
+
+# Where debug output is appended (bench.py points it elsewhere)
+DEBUG_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug.log')
+
+# Persistent SSH connection pool: one ControlMaster connection per host.
+# Every ssh_run call is multiplexed over the host's master socket, so only the
+# first call (or the first after a drop) pays the TCP + key-exchange handshake.
+SSH_BINARY = 'ssh'
+SSH_CONTROL_PATH = os.path.expanduser('~/.ssh/sim-monitor-%C')
+SSH_HEALTH_INTERVAL = 60  # seconds between `ssh -O check` probes of a live master
+# Idle seconds before a master exits on its own. Finite because the app can be
+# killed without running atexit (/api/quit uses os._exit), orphaning masters.
+SSH_CONTROL_PERSIST = 600
+
+# host -> monotonic time of the last successful master health check
+_ssh_masters = {}
+# host -> lock serializing that host's master upkeep; one host's slow connect
+# attempt must never hold up another's
+_ssh_locks = {}
+
+
+def _ssh_lock(host):
+    # dict.setdefault is atomic, so concurrent first calls share one lock
+    return _ssh_locks.setdefault(host, threading.Lock())
+
+
+def _ssh_options():
+    return [
+        '-o', 'ConnectTimeout=10',
+        '-o', f'ControlPath={SSH_CONTROL_PATH}',
+        '-o', 'ServerAliveInterval=15',
+        '-o', 'ServerAliveCountMax=3',
+    ]
+
+
+def _ssh_master_alive(host):
+    """Ask the local master process for this host whether it is still up."""
     try:
         result = subprocess.run(
-            ['ssh', '-o', 'ConnectTimeout=10', host, command],
-            capture_output=True, text=True, timeout=timeout
+            [SSH_BINARY, *_ssh_options(), '-O', 'check', host],
+            stdin=subprocess.DEVNULL, capture_output=True, timeout=5
         )
+        return result.returncode == 0
+    except (subprocess.TimeoutExpired, OSError):
+        return False
+
+
+def _ensure_ssh_master(host):
+    """
+    Make sure a live master connection exists for host, starting one if needed.
+    Returns True when commands can be multiplexed over it.
+    """
+    with _ssh_lock(host):
+        checked = _ssh_masters.get(host)
+        if checked is not None and time.monotonic() - checked < SSH_HEALTH_INTERVAL:
+            return True
+        if _ssh_master_alive(host):
+            _ssh_masters[host] = time.monotonic()
+            return True
+        _ssh_masters.pop(host, None)
+        # -M -N -f: authenticate, then background as a command-less master.
+        # stdio must not be our pipes, or the backgrounded master holds them open.
+        try:
+            subprocess.run(
+                [SSH_BINARY, *_ssh_options(), '-o', 'ControlMaster=yes',
+                 '-o', f'ControlPersist={SSH_CONTROL_PERSIST}', '-M', '-N', '-f', host],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, timeout=15
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            return False
+        if _ssh_master_alive(host):
+            _ssh_masters[host] = time.monotonic()
+            return True
+        return False
+
+
+def _drop_ssh_master(host):
+    """Tear down a (possibly wedged) master so the next call re-establishes it."""
+    with _ssh_lock(host):
+        _ssh_masters.pop(host, None)
+        try:
+            subprocess.run(
+                [SSH_BINARY, *_ssh_options(), '-O', 'exit', host],
+                stdin=subprocess.DEVNULL, capture_output=True, timeout=5
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            pass
+
+
+def close_ssh_masters():
+    """Shut down every pooled master connection (called at interpreter exit)."""
+    for host in list(_ssh_masters):
+        _drop_ssh_master(host)
+
+
+atexit.register(close_ssh_masters)
+
+
+# Per-host circuit breaker. After BREAKER_THRESHOLD consecutive connection
+# failures a host's breaker opens: SSH calls to it fail fast and poll cycles
+# serve last known data, while one cheap probe connection is attempted on an
+# exponential backoff schedule. Any successful connection closes it again.
+BREAKER_THRESHOLD = 3
+BREAKER_BACKOFF = 30  # seconds before the first probe of an open breaker
+BREAKER_BACKOFF_MAX = 900
+BREAKER_PROBE_TIMEOUT = 12
+
+# host -> {'state', 'failures', 'backoff', 'next_probe' (monotonic), 'opened_at'}
+_breakers = {}
+_breaker_lock = threading.Lock()
+
+
+def _breaker(host):
+    return _breakers.setdefault(host, {
+        'state': 'closed', 'failures': 0, 'backoff': BREAKER_BACKOFF,
+        'next_probe': None, 'opened_at': None,
+    })
+
+
+def _breaker_open(host):
+    """True while host's breaker is open and SSH calls to it should fail fast."""
+    with _breaker_lock:
+        return _breaker(host)['state'] == 'open'
+
+
+def _record_connection(host, connected):
+    """Count a connection success or failure toward host's breaker."""
+    with _breaker_lock:
+        breaker = _breaker(host)
+        if connected:
+            breaker.update(state='closed', failures=0, backoff=BREAKER_BACKOFF,
+                           next_probe=None, opened_at=None)
+            return
+        breaker['failures'] += 1
+        if breaker['state'] == 'closed' and breaker['failures'] >= BREAKER_THRESHOLD:
+            breaker.update(state='open', opened_at=datetime.now().isoformat(),
+                           next_probe=time.monotonic() + breaker['backoff'])
+
+
+def _claim_probe(host):
+    """
+    True if an open breaker's next probe is due. The caller owns that probe:
+    the following one is pushed out by the doubled backoff straight away, so
+    concurrent poll cycles never probe the same host twice.
+    """
+    with _breaker_lock:
+        breaker = _breaker(host)
+        if breaker['state'] != 'open' or time.monotonic() < breaker['next_probe']:
+            return False
+        breaker['backoff'] = min(breaker['backoff'] * 2, BREAKER_BACKOFF_MAX)
+        breaker['next_probe'] = time.monotonic() + breaker['backoff']
+        return True
+
+
+def breaker_state(host):
+    """JSON-ready view of host's breaker for the status payload."""
+    with _breaker_lock:
+        breaker = _breaker(host)
+        state = {'state': breaker['state'], 'failures': breaker['failures'],
+                 'opened_at': breaker['opened_at']}
+        if breaker['state'] == 'open':
+            state['retry_in'] = max(0, round(breaker['next_probe'] - time.monotonic()))
+        return state
+
+
+def _ssh_exec(host, command, timeout):
+    # ControlMaster=no: use the pooled socket if present, otherwise connect directly
+    return subprocess.run(
+        [SSH_BINARY, *_ssh_options(), '-o', 'ControlMaster=no', host, command],
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, errors='surrogateescape',
+        timeout=timeout
+    )
+
+
+def ssh_run(host, command, timeout=15):
+    """
+    Run a command on the remote host via the pooled SSH connection.
+    Returns None at once, without connecting, while host's breaker is open.
+    """
+    if _breaker_open(host):
+        return None
+    try:
+        pooled = _ensure_ssh_master(host)
+        result = _ssh_exec(host, command, timeout)
+        if result.returncode == 255 and pooled:
+            # 255 is ssh's own failure code — the master likely dropped under us.
+            # Re-establish it and retry once.
+            _drop_ssh_master(host)
+            _ensure_ssh_master(host)
+            result = _ssh_exec(host, command, timeout)
+        _record_connection(host, result.returncode != 255)
         # Log errors for debugging
-        debug_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug.log')
+        debug_path = DEBUG_LOG
         if result.returncode != 0 or not result.stdout.strip():
-            with open(debug_path, 'a') as f:
+            with open(debug_path, 'a', errors='replace') as f:
                 f.write(f"ssh_run returncode={result.returncode}\n")
                 f.write(f"ssh_run stderr={result.stderr[:300]}\n")
                 f.write(f"ssh_run stdout={result.stdout[:300]}\n")
@@ -41,7 +336,11 @@ def ssh_run(host, command, timeout=15):
             return result.stdout.strip()
         return None
     except (subprocess.TimeoutExpired, subprocess.CalledProcessError, OSError) as e:
-        debug_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug.log')
+        _record_connection(host, False)
+        if isinstance(e, subprocess.TimeoutExpired):
+            # A hung call may mean a half-dead master; force a fresh one next time
+            _drop_ssh_master(host)
+        debug_path = DEBUG_LOG
         with open(debug_path, 'a') as f:
             f.write(f"ssh_run exception: {e}\n")
         return None
@@ -70,8 +369,8 @@ def parse_log_line(line):
         return None
 
 
-def parse_log_lines(text):
-    """Parse multiple CSV lines from production.log, skipping the header."""
+def _parse_log_rows(text):
+    """Parse CSV lines one at a time with parse_log_line (slow, but tolerant of malformed rows)."""
     results = []
     for line in text.strip().split('\n'):
         if line.startswith('#') or not line.strip():
@@ -82,69 +381,622 @@ def parse_log_lines(text):
     return results
 
 
-def poll_simulation(host, sim_config):
-    """Poll a single simulation's status."""
-    name = sim_config['name']
-    directory = sim_config['directory']
-    log_file = sim_config.get('log', 'production.log')
+# Lines handed to NumPy's bulk loader at a time; a malformed row only sends its
+# own chunk down the slow path
+PARSE_CHUNK_LINES = 10000
+
+_LOG_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+# A row the bulk loader is sure to accept: nine plain numbers, then anything
+_LOG_ROW = re.compile(rf'{_LOG_NUMBER}(?:,{_LOG_NUMBER}){{8}}(?:,.*)?\s*$')
+
+
+def _load_rows(lines):
+    """Bulk-parse CSV lines into an (n, len(LOG_COLUMNS)) float table; ValueError on a bad row."""
+    table = np.loadtxt(lines, delimiter=',', comments='#', usecols=range(len(LOG_COLUMNS)),
+                       ndmin=2, dtype=np.float64)
+    return table if table.size else np.empty((0, len(LOG_COLUMNS)), dtype=np.float64)
+
+
+def _load_chunk(lines):
+    """
+    _load_rows for a chunk the bulk loader rejected: runs of clean rows (per
+    _LOG_ROW) still go through it, and only the other lines through
+    parse_log_line, keeping their order.
+    """
+    pieces, clean = [], []
+    for line in lines:
+        if _LOG_ROW.match(line):
+            clean.append(line)
+            continue
+        parsed = parse_log_line(line) if line.strip() and not line.startswith('#') else None
+        if parsed:
+            pieces.append(_load_rows(clean))
+            pieces.append(np.array([[parsed[c] for c in LOG_COLUMNS]], dtype=np.float64))
+            clean = []
+    pieces.append(_load_rows(clean))
+    return np.concatenate(pieces)
+
+
+def parse_log_columns(text):
+    """
+    Parse a block of production.log CSV into typed column arrays.
+    Returns {column: ndarray} for LOG_COLUMNS plus the derived time_ns.
+    Lines go to NumPy's bulk loader PARSE_CHUNK_LINES at a time; in a chunk
+    it rejects (a malformed or truncated row) the clean rows are split out and
+    bulk-loaded, and only the rest are parsed line by line.
+    """
+    lines = text.split('\n')
+    pieces = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for i in range(0, len(lines), PARSE_CHUNK_LINES):
+            chunk = lines[i:i + PARSE_CHUNK_LINES]
+            try:
+                pieces.append(_load_rows(chunk))
+            except ValueError:
+                pieces.append(_load_chunk(chunk))
+    table = np.concatenate(pieces) if pieces else np.empty((0, len(LOG_COLUMNS)), dtype=np.float64)
+    return _table_columns(table)
+
+
+def _table_columns(table):
+    """Typed LOG_COLUMNS arrays plus time_ns from an (n, len(LOG_COLUMNS)) float64 table."""
+    columns = {name: table[:, i] for i, name in enumerate(LOG_COLUMNS)}
+    columns['step'] = columns['step'].astype(np.int64)
+    columns['time_ns'] = columns['time_ps'] / 1000.0
+    return columns
+
+
+def parse_log_lines(text):
+    """Parse multiple CSV lines from production.log, skipping the header."""
+    columns = parse_log_columns(text)
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[n].tolist() for n in names))]
+
+
+def _split_sections(output):
+    """
+    Split ===NAME=== delimited command output into {NAME: text}. SSH output is
+    decoded with surrogateescape so that log bytes survive exactly: HISTORY
+    sections keep that (see _ingest_history), every other section gets any
+    undecodable bytes replaced.
+    """
+    sections = {}
+    current_section = None
+    current_lines = []
+    for line in output.split('\n'):
+        if line.startswith('===') and line.endswith('==='):
+            if current_section:
+                sections[current_section] = '\n'.join(current_lines)
+            current_section = line.strip('=')
+            current_lines = []
+        else:
+            current_lines.append(line)
+    if current_section:
+        sections[current_section] = '\n'.join(current_lines)
+    for name, text in sections.items():
+        if not name.endswith('HISTORY'):
+            sections[name] = text.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+    return sections
+
+
+def _namespace(sections, prefix):
+    """Select the sections written under a batch namespace, with the prefix removed."""
+    return {k[len(prefix):]: v for k, v in sections.items() if k.startswith(prefix)}
+
+
+def _completed_result(host, sim_config):
+    """Static status for a simulation marked as completed in config."""
     target_ns = sim_config.get('target_ns', 500)
-    log_path = f"{directory}/{log_file}"
-    script_name = sim_config.get('script', '')
+    return {
+        'name': sim_config['name'],
+        'host': host,
+        'status': 'completed',
+        'current_ns': target_ns,
+        'target_ns': target_ns,
+        'percent': 100.0,
+        'eta': None,
+        'speed': None,
+        'last_update': None,
+        'log_data': SimHistory(0),
+        'log_rows': 0,
+        'log_tail': [],
+        'process_running': False,
+    }
 
-    # If marked as completed in config, return static status
-    if sim_config.get('status') == 'completed':
-        return {
-            'name': name,
-            'status': 'completed',
-            'current_ns': target_ns,
-            'target_ns': target_ns,
-            'percent': 100.0,
-            'eta': None,
-            'speed': None,
-            'last_update': None,
-            'log_data': [],
-            'log_tail': [],
-            'process_running': False,
-        }
 
-    # Build a single SSH command that gathers everything
-    # Use markers to separate outputs
-    if script_name and not sim_config.get('_auto_detected'):
-        # Use [c]haracter class trick so pgrep doesn't match its own bash -c command
-        escaped = '[' + script_name[0] + ']' + script_name[1:]
-        process_cmd = f"pgrep -af '{escaped}' 2>/dev/null || echo 'NOT_RUNNING'"
+def _log_path(sim_config):
+    return f"{sim_config['directory']}/{sim_config.get('log', 'production.log')}"
+
+
+def _history_command(host, log_path, prefix=''):
+    """
+    Remote command that emits ===LOGSTAT=== ("inode size mtime start") followed
+    by ===HISTORY=== holding the log bytes from `start` up to the stat'd size.
+    start is our saved offset when the file is the same inode and hasn't shrunk,
+    otherwise 0 (first read, truncation or rotation) for a full re-read.
+    """
+    state = _log_state.get((host, log_path))
+    inode = state['inode'] if state else ''
+    offset = state['offset'] if state else 0
+    return (
+        f"echo '==={prefix}LOGSTAT===' ; "
+        f"if [ -f {log_path} ]; then "
+        f"st=$(stat -c '%i %s %Y' {log_path}); ino=${{st%% *}}; size=${{st#* }}; size=${{size%% *}}; "
+        f"if [ \"$ino\" = \"{inode}\" ] && [ \"$size\" -ge {offset} ]; then start={offset}; else start=0; fi; "
+        f"echo \"$st $start\"; echo '==={prefix}HISTORY==='; "
+        f"tail -c +$((start+1)) {log_path} | head -c $((size-start)); "
+        f"else echo 'NO_LOG'; echo '==={prefix}HISTORY==='; fi ; "
+        # Terminate the raw bytes so the end marker starts on its own line;
+        # the section splitter drops exactly this one newline again. The
+        # marker keeps whatever follows (or stdout stripping) off the bytes.
+        f"echo ; echo '==={prefix}LOGEND==='"
+    )
+
+
+def _unchanged_stat(host, sim_config):
+    """
+    The (inode, size, mtime) stat line recorded at the last full read of this
+    sim's log, if a repeat of it may be answered from _last_known without
+    fetching or parsing anything; None when the sim must be polled in full.
+    """
+    state = _log_state.get((host, _log_path(sim_config)))
+    if not state or not state.get('stat') or (host, sim_config['name']) not in _last_known:
+        return None
+    # Re-poll in full now and then, so a process that died without touching
+    # its log still shows up as stopped
+    if time.monotonic() - state['read_at'] > UNCHANGED_REFRESH:
+        return None
+    return state['stat']
+
+
+def _unchanged_result(host, sim_config, processes=None):
+    """
+    Last full result for a sim whose log hasn't changed, with a fresh timestamp.
+    Given the cycle's ProcessTable, its process state is re-read from that, so
+    a killed sim shows as stopped even though its log stays the same.
+    """
+    key = (host, sim_config['name'])
+    result = dict(_last_known[key], last_update=datetime.now().isoformat())
+    if processes is not None:
+        matched = processes.for_sim(sim_config)
+        result.update(
+            process_running=bool(matched),
+            process_cpu=round(sum(p['cpu'] for p in matched), 1),
+            process_rss_mb=round(sum(p['rss'] for p in matched) / 1024),
+        )
+        if result['status'] != 'completed':
+            result['status'] = 'running' if matched else 'stopped'
+        with _results_lock:
+            _last_known[key] = result
+    return result
+
+
+def _ingest_history(host, log_path, sections):
+    """
+    Apply one incremental read to the per-log tail state and return the full
+    SimHistory plus the last LOG_TAIL_LINES raw lines for display.
+    Only the new bytes are parsed; a trailing line without a newline is held
+    back until the rest of it arrives.
+    """
+    key = (host, log_path)
+    stat_text = sections.get('LOGSTAT', '').strip()
+    with _log_lock:
+        state = _log_state.get(key)
+        if stat_text == 'NO_LOG':
+            if _log_state.pop(key, None) is not None and _store is not None:
+                _store.drop_log(key)
+            return SimHistory(0), []
+        try:
+            inode, size, mtime, start = stat_text.split()
+            start = int(start)
+        except ValueError:
+            # Section missing or garbled — keep what we had
+            if state is None:
+                return SimHistory(0), []
+            return state['history'], _display_tail(state)
+
+        reset = state is None or start == 0 or state['inode'] != inode
+        if reset:
+            # First read, truncation or rotation — start the history over.
+            # A fresh SimHistory (not a cleared one) so earlier snapshots stay intact.
+            state = {
+                'inode': inode, 'offset': 0, 'partial': b'', 'history': SimHistory(),
+                'tail': deque(maxlen=LOG_TAIL_LINES),
+            }
+            _log_state[key] = state
+
+        if sections.get('HISTORY') or len(sections.get('ROWS', ())):
+            _unspill(key, state)
+        rows = len(state['history'])
+        if 'ROWS' in sections:
+            _apply_rows(state, start, sections)
+        else:
+            _consume(state, start, sections.get('HISTORY', '').encode('utf-8', 'surrogateescape'))
+        state['stat'] = f"{inode} {size} {mtime}"
+        state['read_at'] = time.monotonic()
+        _save_log(key, state, rows, reset)
+        return state['history'], _display_tail(state)
+
+
+def _consume(state, start, data):
+    """
+    Apply log bytes read from byte offset start to a tail state (under
+    _log_lock). Bytes the state has already consumed — a log stream and a poll
+    can both deliver the same stretch — are dropped, complete lines are parsed
+    and a trailing partial line is held back, as bytes: offsets only ever count
+    raw bytes, and only complete lines are decoded. Returns False when data
+    starts past the state's offset, i.e. it belongs to an older read of the file.
+    """
+    skip = state['offset'] - start
+    if skip < 0:
+        return False
+    data = data[skip:]
+    if not data:
+        return True
+    complete, _, partial = (state['partial'] + data).rpartition(b'\n')
+    state['partial'] = partial
+    state['offset'] += len(data)
+    if complete:
+        complete = complete.decode('utf-8', 'replace')
+        state['history'].append(parse_log_columns(complete))
+        state['grown_at'] = time.monotonic()
+        state['tail'].extend(l for l in complete.rsplit('\n', LOG_TAIL_LINES)[-LOG_TAIL_LINES:] if l.strip())
+    return True
+
+
+def _apply_rows(state, start, sections):
+    """
+    Apply a collector read to a tail state (under _log_lock): the rows it
+    parsed from the log's complete lines from byte offset start on, read up to
+    offset END (see collector.collect_sim). start is where the state's held-back
+    line begins; when that no longer matches, a log stream has consumed those
+    bytes since the read was asked for and the read is dropped (returns False).
+    """
+    if start != state['offset'] - len(state['partial']):
+        return False
+    state['offset'] = sections['END']
+    state['partial'] = sections['PARTIAL'].encode('utf-8', 'surrogateescape')
+    if len(sections['ROWS']):
+        state['history'].append(_table_columns(sections['ROWS']))
+        state['grown_at'] = time.monotonic()
+    state['tail'].extend(sections['TAIL'])
+    return True
+
+
+def _save_log(key, state, rows, reset=False):
+    """Queue a tail state and the rows appended to it since `rows` for the store."""
+    if _store is not None:
+        _store.save_log(key, state, state['history'][rows:], reset)
+
+
+def open_store(path):
+    """
+    Keep history in the on-disk store at path from now on, and restore the
+    tail states saved there: the first poll of each log then resumes from
+    its stored offset instead of reading the whole file again.
+    """
+    global _store
+    if _store is not None:
+        _store.close()
+    _store = HistoryStore(path)
+    with _log_lock:
+        for key, saved in _store.load_logs().items():
+            tail = deque(saved['tail'], maxlen=LOG_TAIL_LINES)
+            # Never answered from the stat alone before a real poll. Not 0:
+            # time.monotonic() counts from boot, so right after a reboot a
+            # read_at of 0 would still look fresh.
+            _log_state.setdefault(key, dict(saved, tail=tail, read_at=-math.inf))
+    atexit.register(close_store)
+    return _store
+
+
+def close_store():
+    """Commit and close the history store, if one is open."""
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def query_metrics(series, key, fields=None, start=None, end=None, max_points=None):
+    """
+    A long-term series from the history store at the coarsest resolution that
+    still gives max_points over [start, end] (see HistoryStore.query): 'gpu'
+    by (host,), 'status' by (host, name), 'log' by (host, log path).
+    None when no store is open.
+    """
+    if _store is None:
+        return None
+    return _store.query(series, key, fields, start, end, max_points)
+
+
+def query_history(host, sim_config, fields=None, start=None, end=None, max_points=None):
+    """
+    One sim's log columns over production time [start, end] (ns from the first
+    row, the dashboard's x axis), with at most max_points rows. Served from
+    the in-memory history; a spilled one is read back from the store instead,
+    at the finest tier that fits. Returns {'source', 'tier', 'time_ns', field:
+    ndarray}, or None before the log has been read.
+    """
+    fields = [f for f in (fields or LOG_COLUMNS) if f != 'time_ns']
+    unknown = set(fields) - set(LOG_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown log columns: {', '.join(sorted(unknown))}")
+    key = (host, _log_path(sim_config))
+    with _log_lock:
+        state = _log_state.get(key)
+        if state is None or not len(state['history']):
+            return None
+        history, rows = state['history'], len(state['history'])
+        from_store = state.get('spilled') and _store is not None
+    # A spilled preview still starts at the first row, so the origin is the same
+    first_ps = float(history.column('time_ps')[0])
+    start_ps = -math.inf if start is None else first_ps + start * 1000.0
+    end_ps = math.inf if end is None else first_ps + end * 1000.0
+    if from_store:
+        stored = _store.query('log', key, fields or ['time_ps'],
+                              None if start is None else start_ps, None if end is None else end_ps, max_points)
+        t, columns, tier = stored['t'], {f: stored[f] for f in fields}, stored['tier']
     else:
-        # For auto-detected sims, find python processes whose cwd matches the sim directory
-        process_cmd = (
-            f"found=0; for pid in $(pgrep '[p]ython' 2>/dev/null); do "
-            f"cwd=$(readlink /proc/$pid/cwd 2>/dev/null); "
-            f"if [ \"$cwd\" = \"{directory}\" ]; then "
-            f"cmd=$(tr '\\0' ' ' < /proc/$pid/cmdline 2>/dev/null); "
-            f"echo \"$pid $cmd\"; found=1; fi; done; "
-            f"[ $found -eq 0 ] && echo 'NOT_RUNNING'"
+        # Rows only ever get appended, so [0, rows) stays put once the lock is released
+        t = history.column('time_ps', 0, rows)
+        lo, hi = np.searchsorted(t, start_ps, 'left'), np.searchsorted(t, end_ps, 'right')
+        t, columns, tier = t[lo:hi], {f: history.column(f, lo, hi) for f in fields}, None
+    # Raw rows (stored or in memory) can still outnumber the budget
+    keep = downsample(t, {f: v for f, v in columns.items() if f not in AXIS_COLUMNS}, max_points)
+    if keep is not None:
+        t, columns = t[keep], {f: v[keep] for f, v in columns.items()}
+    result = {'source': 'store' if from_store else 'memory', 'tier': tier,
+              'time_ns': (t - first_ps) / 1000.0}
+    result.update((f, np.asarray(v, dtype=np.float64)) for f, v in columns.items())
+    return result
+
+
+def _preview(history):
+    """A HISTORY_PREVIEW_POINTS-row LTTB downsample of history, as a new SimHistory."""
+    keep = history.downsample_indices(LOG_COLUMNS, HISTORY_PREVIEW_POINTS)
+    preview = SimHistory(len(keep))
+    preview.append({name: history.column(name)[keep] for name in LOG_COLUMNS})
+    return preview
+
+
+def _unspill(key, state):
+    """Bring back a spilled log's full history before rows are appended to it (under _log_lock)."""
+    if not state.get('spilled'):
+        return
+    if _store is not None:
+        state['history'] = _store.load_history(key)
+    state['spilled'] = False
+
+
+def _spill_histories(budget):
+    """
+    Spill idle logs, then the least recently grown ones until the histories
+    fit in budget bytes. Results and snapshots holding a spilled history get
+    the preview instead. Returns the spilled (host, path) keys.
+    """
+    now = time.monotonic()
+    spilled = {}
+    with _log_lock:
+        used = sum(state['history'].nbytes for state in _log_state.values())
+        candidates = sorted(
+            (state.setdefault('grown_at', now), key, state) for key, state in _log_state.items()
+            if not state.get('spilled') and len(state['history']) > HISTORY_PREVIEW_POINTS
         )
-    commands = [
-        f"echo '===TAIL==='",
-        f"tail -1 {log_path} 2>/dev/null || echo 'NO_LOG'",
-        f"echo '===HISTORY==='",
-        f"cat {log_path} 2>/dev/null || echo 'NO_LOG'",
-        f"echo '===PROCESS==='",
-        process_cmd,
-        f"echo '===LOGTAIL==='",
-        f"tail -30 {log_path} 2>/dev/null || echo 'NO_LOG'",
-    ]
-    combined = ' ; '.join(commands)
-    output = ssh_run(host, combined)
+        for grown_at, key, state in candidates:
+            if now - grown_at < HISTORY_IDLE and used <= budget:
+                break
+            used -= state['history'].nbytes
+            state['history'] = spilled[key] = _preview(state['history'])
+            state['spilled'] = True
+            used += state['history'].nbytes
+    if not spilled:
+        return spilled
 
-    # Debug: write raw SSH output to a log file
-    debug_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug.log')
-    with open(debug_path, 'a') as f:
-        f.write(f"\n--- {datetime.now()} poll {name} ---\n")
-        f.write(f"command: {combined[:200]}...\n")
-        f.write(f"output: {repr(output[:500]) if output else 'None'}\n")
+    def swap(result):
+        preview = spilled.get((result.get('host'), result.get('_log_path')))
+        if preview is None:
+            return result
+        return dict(result, log_data=preview, log_rows=len(preview))
+
+    with _results_lock:
+        for key, result in list(_last_known.items()):
+            _last_known[key] = swap(result)
+        for host, snapshot in list(_host_snapshots.items()):
+            _host_snapshots[host] = dict(snapshot, simulations=[swap(s) for s in snapshot.get('simulations', [])])
+    return spilled
+
+
+def _forget_sims(host, simulations):
+    """
+    Drop what the caches still hold for sims of host that are neither
+    configured nor discovered any more, and discovered sims that discovery
+    hasn't found for DISCOVERED_MAX_AGE seconds.
+    """
+    now = time.time()
+    for key in [k for k in _discovered_cache if k[0] == host]:
+        if now - _discovered_seen.setdefault(key, now) > DISCOVERED_MAX_AGE:
+            _discovered_cache.pop(key, None)
+            _discovered_seen.pop(key, None)
+    known = merge_simulations(simulations, _cached_discoveries(host))
+    names = {sim['name'] for sim in known}
+    paths = {_log_path(sim) for sim in known}
+    with _results_lock:
+        for key in [k for k in _last_known if k[0] == host and k[1] not in names]:
+            _last_known.pop(key, None)
+            _next_poll.pop(key, None)
+    with _log_lock:
+        for key in [k for k in _log_state if k[0] == host and k[1] not in paths]:
+            del _log_state[key]
+
+
+def cache_usage(budget=HISTORY_MEMORY_BUDGET):
+    """Occupancy of the poller caches, with per-log history sizes, for /api/cache."""
+    now = time.monotonic()
+    names = {(host, r.get('_log_path')): name for (host, name), r in list(_last_known.items())}
+    with _log_lock:
+        logs = [{
+            'host': host, 'path': path, 'name': names.get((host, path)),
+            'rows': len(state['history']), 'bytes': state['history'].nbytes,
+            'spilled': bool(state.get('spilled')),
+            'idle_s': round(now - state['grown_at']) if 'grown_at' in state else None,
+        } for (host, path), state in _log_state.items()]
+    logs.sort(key=lambda log: -log['bytes'])
+    used = sum(log['bytes'] for log in logs)
+    return {
+        'budget_bytes': budget,
+        'used_bytes': used,
+        'percent': round(100.0 * used / budget, 1) if budget else None,
+        'spilled': sum(log['spilled'] for log in logs),
+        'store': _store.path if _store is not None else None,
+        'last_known': len(_last_known),
+        'discovered': len(_discovered_cache),
+        'logs': logs,
+    }
+
+
+def _display_tail(state):
+    """Last LOG_TAIL_LINES lines of the log, including a half-written last line."""
+    lines = list(state['tail'])
+    partial = state['partial'].decode('utf-8', 'replace')
+    if partial.strip():
+        lines = lines[1 - LOG_TAIL_LINES:] + [partial]
+    return lines
+
+
+def _process_table_command(prefix=''):
+    """
+    One pass over the ssh user's processes: ===PS=== from ps (ids, CPU, RSS,
+    name and command line) and ===CWD=== ("/proc/<pid> <cwd>") from a single
+    find over /proc, in place of a pgrep / readlink loop per simulation.
+    """
+    return (
+        f"echo '==={prefix}PS===' ; "
+        "ps -u \"$(id -u)\" -ww -o pid=,ppid=,pgid=,pcpu=,rss=,comm=,args= 2>/dev/null ; "
+        f"echo '==={prefix}CWD===' ; "
+        "find /proc/[0-9]* -maxdepth 1 -name cwd -printf '%h %l\\n' 2>/dev/null"
+    )
+
+
+class ProcessTable:
+    """
+    One snapshot of a host's processes, parsed from the PS and CWD sections:
+    dicts of pid, ppid, pgid, cpu (%), rss (KiB), comm, cwd and cmdline,
+    indexed by normalized working directory.
+    """
+
+    def __init__(self, ps_text='', cwd_text=''):
+        cwds = {}
+        for line in cwd_text.split('\n'):
+            path, _, cwd = line.strip().partition(' ')
+            if path.startswith('/proc/') and cwd:
+                cwds[path[len('/proc/'):]] = cwd
+        self.processes = []
+        self.by_cwd = {}
+        for line in ps_text.split('\n'):
+            fields = line.split(None, 6)
+            if len(fields) < 6 or not fields[0].isdigit():
+                continue
+            try:
+                process = {
+                    'pid': int(fields[0]), 'ppid': int(fields[1]), 'pgid': int(fields[2]),
+                    'cpu': float(fields[3]), 'rss': int(fields[4]), 'comm': fields[5],
+                    'cwd': cwds.get(fields[0], ''),
+                    'cmdline': fields[6] if len(fields) > 6 else fields[5],
+                }
+            except ValueError:
+                continue
+            self.processes.append(process)
+            if process['cwd']:
+                self.by_cwd.setdefault(_normalize_sim_dir(process['cwd']), []).append(process)
 
+    @classmethod
+    def from_sections(cls, sections):
+        return cls(sections.get('PS', ''), sections.get('CWD', ''))
+
+    def for_sim(self, sim_config):
+        """
+        The sim's processes: those running its script, or for auto-detected
+        sims (and sims without a script) python processes in its directory.
+        """
+        script_name = sim_config.get('script', '')
+        if script_name and not sim_config.get('_auto_detected'):
+            return [p for p in self.processes if script_name in p['cmdline']]
+        return [p for p in self.by_cwd.get(_normalize_sim_dir(sim_config['directory']), [])
+                if 'python' in p['comm']]
+
+    def stop_targets(self, sim_config):
+        """
+        (processes, pgids) that stopping the sim may kill. Only the sim's
+        python processes, and only those in its directory when one is known,
+        so an editor or pager holding the script open is never a target. A
+        process group is killed whole (conda run wrappers and workers) only
+        when no other python process shares it, so a driver shell that
+        launched several sims into one group doesn't take the others down.
+        """
+        directory = sim_config.get('directory')
+        targets = [
+            p for p in self.for_sim(sim_config)
+            if 'python' in p['comm']
+            and (not directory or _normalize_sim_dir(p['cwd']) == _normalize_sim_dir(directory))
+        ]
+        pids = {p['pid'] for p in targets}
+        pgids = sorted({p['pgid'] for p in targets} - {
+            p['pgid'] for p in self.processes if 'python' in p['comm'] and p['pid'] not in pids
+        })
+        return targets, pgids
+
+
+def sim_stop_targets(host, sim_config):
+    """
+    (processes, pgids) to kill to stop the sim, from a fresh snapshot of
+    host's process table (one SSH call); see ProcessTable.stop_targets.
+    None when the host couldn't be reached.
+    """
+    output = ssh_run(host, _process_table_command())
     if output is None:
-        cached = _last_known.get(name)
+        return None
+    return ProcessTable.from_sections(_split_sections(output)).stop_targets(sim_config)
+
+
+def _simulation_command(host, sim_config, prefix='', processes=True):
+    """
+    Build the remote command that gathers everything for one simulation.
+    Output sections are marked ===<prefix>NAME=== so several simulations
+    can share one batched SSH call. processes=False leaves out the process
+    table, for callers that already have this cycle's.
+    """
+    log_path = _log_path(sim_config)
+    commands = [_history_command(host, log_path, prefix)]
+    if processes:
+        commands.append(_process_table_command(prefix))
+    command = ' ; '.join(commands)
+    known = _unchanged_stat(host, sim_config)
+    if known is None:
+        return command
+    # Pre-check: when the log's stat still matches the last full read, answer
+    # with a bare UNCHANGED marker instead of log bytes and a process scan
+    return (
+        f"if [ \"$(stat -c '%i %s %Y' {log_path} 2>/dev/null)\" = \"{known}\" ]; then "
+        f"echo '==={prefix}UNCHANGED==='; else {command} ; fi"
+    )
+
+
+def _parse_simulation(host, sim_config, sections, processes=None):
+    """
+    Turn one simulation's output sections into a result dict.
+    sections is None when the SSH call failed. processes is the cycle's
+    ProcessTable; without one it is read from the sim's own sections.
+    """
+    name = sim_config['name']
+    directory = sim_config['directory']
+    target_ns = sim_config.get('target_ns', 500)
+    script_name = sim_config.get('script', '')
+    debug_path = DEBUG_LOG
+
+    if sections is None:
+        cached = _last_known.get((host, name))
         if cached:
             # Preserve last known data — progress can only go forward.
             # Keep completed status as-is; mark others as unreachable.
@@ -153,6 +1005,7 @@ def poll_simulation(host, sim_config):
             return cached
         return {
             'name': name,
+            'host': host,
             'status': 'unreachable',
             'current_ns': 0,
             'target_ns': target_ns,
@@ -160,73 +1013,81 @@ def poll_simulation(host, sim_config):
             'eta': None,
             'speed': None,
             'last_update': None,
-            'log_data': [],
+            'log_data': SimHistory(0),
+            'log_rows': 0,
             'log_tail': [],
             'process_running': False,
             'error': 'SSH connection failed',
         }
 
-    # Parse sections
-    sections = {}
-    current_section = None
-    current_lines = []
-    for line in output.split('\n'):
-        if line.startswith('===') and line.endswith('==='):
-            if current_section:
-                sections[current_section] = '\n'.join(current_lines)
-            current_section = line.strip('=')
-            current_lines = []
-        else:
-            current_lines.append(line)
-    if current_section:
-        sections[current_section] = '\n'.join(current_lines)
+    if 'UNCHANGED' in sections and (host, name) in _last_known:
+        return _unchanged_result(host, sim_config, processes)
 
-    # Parse last log line for current status
-    tail_text = sections.get('TAIL', '').strip()
-    last_entry = parse_log_line(tail_text) if tail_text and tail_text != 'NO_LOG' else None
+    # Incremental log history for plots (new bytes only, appended to the cache).
+    # The current status and the display tail come from the same single read.
+    history, log_tail = _ingest_history(host, _log_path(sim_config), sections)
+    last_entry = history.last()
+    if processes is None:
+        processes = ProcessTable.from_sections(sections)
+    matched = processes.for_sim(sim_config)
 
     # Debug: log what we parsed
     with open(debug_path, 'a') as f:
         f.write(f"sections found: {list(sections.keys())}\n")
-        f.write(f"tail_text: {repr(tail_text[:200])}\n")
         f.write(f"last_entry: {last_entry}\n")
-        f.write(f"process_text: {repr(sections.get('PROCESS', '')[:100])}\n")
-
-    # Parse log history for plots
-    history_text = sections.get('HISTORY', '')
-    log_data = parse_log_lines(history_text) if history_text != 'NO_LOG' else []
+        f.write(f"processes: {[p['pid'] for p in matched]}\n")
 
-    # Check process and capture cmdline for restart
-    process_text = sections.get('PROCESS', '')
-    process_running = process_text.strip() != 'NOT_RUNNING' and process_text.strip() != ''
+    process_running = bool(matched)
     # Try to extract launch command from running process
     process_launch_cmd = ''
     if process_running and not script_name:
-        for pline in process_text.strip().split('\n'):
-            pline = pline.strip()
-            if not pline or pline == 'NOT_RUNNING':
-                continue
-            # Format: "PID cmdline..."
-            pparts = pline.split(None, 1)
-            if len(pparts) >= 2 and pparts[0].isdigit():
-                process_launch_cmd = f"cd {directory} && nohup conda run --no-capture-output -n md-env {pparts[1]} > /dev/null 2>&1 &"
-                break
+        process_launch_cmd = f"cd {directory} && nohup conda run --no-capture-output -n md-env {matched[0]['cmdline']} > /dev/null 2>&1 &"
 
-    # Log tail for display
-    log_tail_text = sections.get('LOGTAIL', '')
-    log_tail = []
-    if log_tail_text and log_tail_text != 'NO_LOG':
-        log_tail = [l for l in log_tail_text.split('\n') if l.strip()]
+    # Determine status based on progress and process detection
+    progress, finished = _progress(history, target_ns)
+    if finished:
+        status = 'completed'
+    elif process_running:
+        status = 'running'
+    else:
+        status = 'stopped'
 
-    # Calculate progress and ETA
+    result = {
+        'name': name,
+        'host': host,
+        'status': status,
+        **progress,
+        'log_tail': log_tail,
+        'process_running': process_running,
+        'process_cpu': round(sum(p['cpu'] for p in matched), 1),
+        'process_rss_mb': round(sum(p['rss'] for p in matched) / 1024),
+        '_directory': directory,
+        '_script': script_name,
+        '_launch_cmd': sim_config.get('launch_cmd', '') or process_launch_cmd,
+        '_log': sim_config.get('log', 'production.log'),
+        '_log_path': _log_path(sim_config),
+    }
+
+    # Cache every successful poll so data survives SSH outages
+    with _results_lock:
+        _last_known[(host, name)] = result
+
+    return result
+
+
+def _progress(history, target_ns):
+    """
+    Progress, ETA and latest readings of a sim from its log history, and
+    whether it has reached target_ns.
+    """
+    last_entry = history.last()
     # Subtract equilibration time — first log entry marks the start of production
-    first_ns = log_data[0]['time_ns'] if log_data else 0
-    for entry in log_data:
-        entry['time_ns'] -= first_ns
+    first_ns = history[0]['time_ns'] if len(history) else 0
     current_ns = last_entry['time_ns'] if last_entry else 0
     production_ns = current_ns - first_ns
     percent = min(100.0, (production_ns / target_ns) * 100) if target_ns > 0 else 0
     speed = last_entry['speed_ns_day'] if last_entry else None
+    log_interval = _log_write_interval(history, speed)
 
     eta = None
     if speed and speed > 0 and production_ns < target_ns:
@@ -234,80 +1095,135 @@ def poll_simulation(host, sim_config):
         remaining_days = remaining_ns / speed
         eta = datetime.now() + timedelta(days=remaining_days)
 
-    # Determine status based on progress and process detection
-    # Use 99.5% threshold to handle floating point accumulation from timestep rounding
-    if production_ns >= target_ns * 0.995:
-        status = 'completed'
-    elif process_running:
-        status = 'running'
-    else:
-        status = 'stopped'
-
-    result = {
-        'name': name,
-        'status': status,
+    progress = {
         'current_ns': round(production_ns, 1),
         'target_ns': target_ns,
         'percent': round(percent, 1),
         'eta': eta.isoformat() if eta else None,
         'eta_human': eta.strftime('%b %d %H:%M') if eta else None,
         'speed': round(speed, 1) if speed else None,
+        'log_interval': round(log_interval, 1) if log_interval else None,
         'temperature': round(last_entry['temperature'], 1) if last_entry else None,
         'density': round(last_entry['density'], 4) if last_entry else None,
         'energy': round(last_entry['total_energy'], 0) if last_entry else None,
         'last_update': datetime.now().isoformat(),
-        'log_data': log_data,
-        'log_tail': log_tail,
-        'process_running': process_running,
-        '_directory': directory,
-        '_script': script_name,
-        '_launch_cmd': sim_config.get('launch_cmd', '') or process_launch_cmd,
+        # Serialized by the dashboard up to log_rows, so rows appended after
+        # this poll never leak into this snapshot
+        'log_data': history,
+        'log_rows': len(history),
     }
+    # Use 99.5% threshold to handle floating point accumulation from timestep rounding
+    return progress, production_ns >= target_ns * 0.995
 
-    # Cache every successful poll so data survives SSH outages
-    _last_known[name] = result
 
-    return result
+def _log_write_interval(history, speed):
+    """
+    Wall-clock seconds between log writes: the recent time_ps step per row
+    at the current ns/day speed. None until there are two rows and a speed.
+    """
+    if len(history) < 2 or not speed or speed <= 0:
+        return None
+    step_ps = float(np.median(np.diff(history.column('time_ps', max(0, len(history) - 10)))))
+    if step_ps <= 0:
+        return None
+    return step_ps / 1000.0 / speed * 86400
 
 
-def discover_simulations(host):
-    """Auto-detect simulations via GPU process scanning and active log files."""
-    command = (
-        "echo '===GPU===' ; "
+def poll_simulation(host, sim_config, timeout=15):
+    """Poll a single simulation's status."""
+    # If marked as completed in config, return static status
+    if sim_config.get('status') == 'completed':
+        return _completed_result(host, sim_config)
+
+    # Build a single SSH command that gathers everything
+    combined = _simulation_command(host, sim_config)
+    output = ssh_run(host, combined, timeout=timeout)
+
+    # Debug: write raw SSH output to a log file
+    debug_path = DEBUG_LOG
+    with open(debug_path, 'a') as f:
+        f.write(f"\n--- {datetime.now()} poll {sim_config['name']} ---\n")
+        f.write(f"command: {combined[:200]}...\n")
+        f.write(f"output: {repr(output[:500]) if output else 'None'}\n")
+
+    return _parse_simulation(host, sim_config, _split_sections(output) if output is not None else None)
+
+
+def _discovery_command(prefix='', roots=DISCOVERY_ROOTS, depth=DISCOVERY_DEPTH):
+    """
+    Build the remote discovery scan of roots down to depth, with sections
+    marked ===<prefix>NAME===.
+    """
+    # Left unquoted so the remote shell expands ~
+    roots = ' '.join(roots)
+    return (
+        f"echo '==={prefix}GPU===' ; "
         "nvidia-smi pmon -c 1 -s u 2>/dev/null | awk '/python/ {print $2}' | "
         "while read pid; do "
         "cwd=$(readlink /proc/$pid/cwd 2>/dev/null) ; "
         "cmd=$(tr '\\0' ' ' < /proc/$pid/cmdline 2>/dev/null) ; "
         "[ -n \"$cwd\" ] && echo \"$pid:$cwd:$cmd\" ; "
         "done ; "
-        "echo '===RECENT===' ; "
-        "find ~/code/md-learning/simulations ~/code/md/simulations "
-        "-maxdepth 2 -name 'production.log' -type f -mmin -60 2>/dev/null ; "
-        "echo '===META===' ; "
-        "find ~/code/md-learning/simulations ~/code/md/simulations "
-        "-maxdepth 2 -name 'sim_meta.json' -type f 2>/dev/null | "
-        "while read f; do echo \"$f:\"; cat \"$f\"; done"
+        f"echo '==={prefix}RECENT===' ; "
+        f"find {roots} "
+        f"-maxdepth {depth} -name 'production.log' -type f -mmin -60 2>/dev/null ; "
+        f"echo '==={prefix}META===' ; "
+        f"find {roots} "
+        f"-maxdepth {depth} -name 'sim_meta.json' -type f 2>/dev/null | "
+        "while read f; do echo \"$f:\"; cat \"$f\"; echo; done"
     )
-    output = ssh_run(host, command, timeout=20)
+
+
+def discover_simulations(host, roots=DISCOVERY_ROOTS, depth=DISCOVERY_DEPTH):
+    """Auto-detect simulations via GPU process scanning and active log files."""
+    return asyncio.run(discover_host_async(host, roots, depth))
+
+
+async def discover_host_async(host, roots=DISCOVERY_ROOTS, depth=DISCOVERY_DEPTH):
+    """
+    One discovery run of host in its own SSH call. Returns the host's sims
+    (cached ones included), and on SSH failure just the cached ones.
+    """
+    _host_discovered_at[host] = time.monotonic()
+    output = await ssh_run_async(host, _discovery_command(roots=roots, depth=depth), timeout=20)
     if output is None:
         # SSH failed — return cached discoveries so sims don't disappear
-        return list(_discovered_cache.values())
+        return _cached_discoveries(host)
+    return _parse_discovery(host, _split_sections(output))
 
-    # Parse sections
-    sections = {}
-    current_section = None
-    current_lines = []
-    for line in output.split('\n'):
-        if line.startswith('===') and line.endswith('==='):
-            if current_section:
-                sections[current_section] = current_lines
-            current_section = line.strip('=')
-            current_lines = []
-        else:
-            if line.strip():
-                current_lines.append(line.strip())
-    if current_section:
-        sections[current_section] = current_lines
+
+def discover_fleet(fleet):
+    """
+    Run discovery on every host of fleet in parallel (see load_fleet) and
+    return {host: what changed since its previous run}. Sims found for the
+    first time have no poll yet, so the next scheduled cycle picks them up.
+    """
+    async def run():
+        await asyncio.gather(*(
+            discover_host_async(host, spec.get('discovery_roots', DISCOVERY_ROOTS),
+                                spec.get('discovery_depth', DISCOVERY_DEPTH))
+            for host, spec in fleet.items()
+        ))
+    asyncio.run(run())
+    return {host: _discovery_changes.get(host) for host in fleet}
+
+
+def discovery_due_at(fleet, interval=DISCOVERY_INTERVAL):
+    """Monotonic time the earliest host of fleet is due a discovery run."""
+    return min((_host_discovered_at.get(host, 0) + interval for host in fleet), default=0)
+
+
+def _cached_discoveries(host):
+    # Copied first: the scheduler reads this from the UI thread mid-poll
+    return [sim for (cached_host, _), sim in list(_discovered_cache.items()) if cached_host == host]
+
+
+def _parse_discovery(host, raw_sections):
+    """Build sim configs from the GPU / RECENT / META discovery sections."""
+    sections = {
+        key: [line.strip() for line in text.split('\n') if line.strip()]
+        for key, text in raw_sections.items()
+    }
 
     discovered = {}
 
@@ -392,12 +1308,24 @@ def discover_simulations(host):
                     sim['script'] = meta['script']
                 break
 
+    # What changed since the last run; sims no longer found stay cached
+    found = {_normalize_sim_dir(norm_dir): sim['name'] for norm_dir, sim in discovered.items()}
+    known = {key: sim['name'] for (cached_host, key), sim in list(_discovered_cache.items())
+             if cached_host == host}
+    _discovery_changes[host] = {
+        'at': datetime.now().isoformat(),
+        'found': len(found),
+        'added': sorted(name for key, name in found.items() if key not in known),
+        'missing': sorted(name for key, name in known.items() if key not in found),
+    }
+
     # Update persistent cache with newly discovered sims
     for norm_dir, sim in discovered.items():
-        _discovered_cache[_normalize_sim_dir(norm_dir)] = sim
+        _discovered_cache[(host, _normalize_sim_dir(norm_dir))] = sim
+        _discovered_seen[(host, _normalize_sim_dir(norm_dir))] = time.time()
 
     # Include cached sims that weren't found this time (process stopped, log aged out)
-    for cached_key, cached_sim in _discovered_cache.items():
+    for cached_sim in _cached_discoveries(host):
         norm_dir = cached_sim['directory'].rstrip('/')
         if norm_dir not in discovered:
             discovered[norm_dir] = cached_sim
@@ -435,11 +1363,15 @@ def merge_simulations(manual, discovered):
     return merged
 
 
+GPU_COMMAND = "/usr/lib/wsl/lib/nvidia-smi --query-gpu=utilization.gpu,utilization.memory,memory.used,memory.total,temperature.gpu,name --format=csv,noheader,nounits 2>/dev/null || nvidia-smi --query-gpu=utilization.gpu,utilization.memory,memory.used,memory.total,temperature.gpu,name --format=csv,noheader,nounits"
+
+
 def poll_gpu(host):
     """Poll GPU stats from the remote host."""
-    command = "/usr/lib/wsl/lib/nvidia-smi --query-gpu=utilization.gpu,utilization.memory,memory.used,memory.total,temperature.gpu,name --format=csv,noheader,nounits 2>/dev/null || nvidia-smi --query-gpu=utilization.gpu,utilization.memory,memory.used,memory.total,temperature.gpu,name --format=csv,noheader,nounits"
-    output = ssh_run(host, command)
+    return _parse_gpu(ssh_run(host, GPU_COMMAND))
 
+
+def _parse_gpu(output):
     if output is None:
         return {'error': 'SSH connection failed'}
 
@@ -457,36 +1389,972 @@ def poll_gpu(host):
         return {'error': f'Failed to parse: {output}'}
 
 
-def poll_all(host, simulations):
-    """Poll all simulations and GPU in sequence (one SSH connection each)."""
+def add_publish_hook(hook):
+    """Register hook(snapshot) to be called whenever a poll cycle completes."""
+    if hook not in _publish_hooks:
+        _publish_hooks.append(hook)
+
+
+def _publish(results):
+    for hook in list(_publish_hooks):
+        try:
+            hook(results)
+        except Exception as e:
+            debug_path = DEBUG_LOG
+            with open(debug_path, 'a') as f:
+                f.write(f"publish hook {hook!r} failed: {e}\n")
+
+
+def _poll_error_result(host, sim, e):
+    """Log a per-simulation poll exception and return a placeholder result."""
+    import traceback
+    debug_path = DEBUG_LOG
+    with open(debug_path, 'a') as f:
+        f.write(f"\npoll_simulation EXCEPTION for {sim['name']}: {e}\n")
+        traceback.print_exc(file=f)
+    return {'name': sim['name'], 'host': host, 'status': 'error', 'percent': 0}
+
+
+def poll_all(host, simulations, batched=True, max_workers=MAX_WORKERS_PER_HOST,
+             sim_timeout=SIM_TIMEOUT, discovery_roots=DISCOVERY_ROOTS, scheduled=False,
+             poll_interval=POLL_INTERVAL, stream=False, collector=False,
+             discovery_depth=DISCOVERY_DEPTH, memory_budget=HISTORY_MEMORY_BUDGET):
+    """
+    Poll all simulations and the GPU.
+
+    In batched mode (the default) the GPU query and every known simulation
+    are compiled into one remote script and run in a single SSH round trip.
+    Discovery is not part of the cycle (see discover_fleet): sims come from
+    the config and _discovered_cache. Only a host's very first cycle scans
+    discovery_roots inline, and the sims it finds get follow-up calls. With
+    batched=False each simulation gets its own SSH call. With collector=True a
+    batched cycle runs collector.py on the host instead of the shell script,
+    and gets one JSON document back.
+
+    Per-simulation calls run concurrently, at most max_workers at a time for
+    this host, each with a sim_timeout deadline; a sim that misses it is
+    reported from its last known state. Results keep the merged config order.
+
+    While the host's circuit breaker is open the cycle makes no SSH calls
+    beyond a due backoff probe, and every sim is reported from its last known
+    state straight away.
+
+    With scheduled=True only the sims that are due (see _sim_interval) are
+    polled; the rest are reported from their last poll, and a host with
+    nothing due is not contacted at all. Unscheduled polls poll everything.
+
+    With stream=True the host's running sims are also followed by a LogStream,
+    which publishes new rows as they are written; while it is live those sims
+    are only due once per poll_interval, for their process checks.
+
+    After the cycle, sims that are no longer configured or discovered are
+    dropped from the caches, and log histories past memory_budget bytes are
+    spilled to the history store (see _spill_histories).
+
+    This is the synchronous facade over poll_all_async. The finished snapshot
+    is handed to every publish hook before returning.
+    """
+    results = asyncio.run(poll_all_async(host, simulations, batched, max_workers, sim_timeout,
+                                         discovery_roots, scheduled, poll_interval, stream,
+                                         collector, discovery_depth, memory_budget))
+    _publish(results)
+    return results
+
+
+def poll_fleet(fleet, **kwargs):
+    """
+    Poll every host of a fleet in parallel and return one merged snapshot.
+
+    fleet maps host -> {'simulations': [...], 'discovery_roots': [...], 'discovery_depth': n}
+    (see load_fleet). Each host publishes as soon as it finishes, merged with
+    the other hosts' latest snapshots, so a slow or unreachable box never
+    holds back the rest. kwargs are passed to poll_all_async for every host.
+
+    hosts=(...) polls only those hosts, still returning and publishing the
+    whole fleet with the others' latest snapshots. The monitor runs one such
+    poll per host on its own schedule, so a hung host's cycle never delays
+    the next cycle of the others.
+    """
+    return asyncio.run(poll_fleet_async(fleet, **kwargs))
+
+
+def load_fleet(config):
+    """
+    Fleet spec from config.yaml: either a `hosts:` mapping of host ->
+    {simulations, discovery_roots, discovery_depth}, or the single-host
+    `host:` + `simulations:` layout. Top-level discovery_roots and
+    discovery_depth are the defaults for every host.
+    """
+    hosts = config.get('hosts') or {config['host']: {'simulations': config.get('simulations', [])}}
+    roots = config.get('discovery_roots') or DISCOVERY_ROOTS
+    depth = config.get('discovery_depth') or DISCOVERY_DEPTH
+    return {
+        host: {
+            'simulations': (spec or {}).get('simulations') or [],
+            'discovery_roots': tuple((spec or {}).get('discovery_roots') or roots),
+            'discovery_depth': int((spec or {}).get('discovery_depth') or depth),
+        }
+        for host, spec in hosts.items()
+    }
+
+
+def _host_summary(host, snapshot):
+    """Per-host aggregate for the fleet snapshot's `hosts` list."""
+    sims = snapshot.get('simulations', [])
+    running = [s for s in sims if s.get('status') == 'running']
+    return {
+        'host': host,
+        'reachable': snapshot.get('reachable', False),
+        'breaker': breaker_state(host),
+        'discovery': _discovery_changes.get(host),
+        'timestamp': snapshot.get('timestamp'),
+        'gpu': snapshot.get('gpu', {}),
+        'simulations': len(sims),
+        'running': len(running),
+        'unreachable': sum(1 for s in sims if s.get('status') == 'unreachable'),
+        'ns_per_day': round(sum(s.get('speed') or 0 for s in running), 1),
+        'stale': snapshot.get('stale', False),
+    }
+
+
+def merge_snapshots(snapshots):
+    """
+    Merge {host: poll_all snapshot} into one fleet snapshot. Every simulation
+    already carries its host; `hosts` holds the per-host aggregates and `gpu`
+    stays the first host's, for single-host clients. `stale` is set while any
+    host is still served from a warm start (see load_warm_start).
+    """
+    hosts = [_host_summary(host, snap) for host, snap in snapshots.items()]
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'simulations': [sim for snap in snapshots.values() for sim in snap.get('simulations', [])],
+        'gpu': hosts[0]['gpu'] if hosts else {},
+        'hosts': hosts,
+        'stale': any(h['stale'] for h in hosts),
+    }
+
+
+# --- warm start -------------------------------------------------------------
+# After every cycle the per-host snapshots, _last_known and _discovered_cache
+# are written to one JSON file (atomically, via rename). At launch they are
+# loaded back and served straight away, flagged stale, while the first poll
+# runs. Log histories are not in the file: they come back from the history
+# store when one is open (open_store before load_warm_start).
+
+def _without_history(result):
+    return {k: v for k, v in result.items() if k != 'log_data'}
+
+
+def _with_history(host, result):
+    """A saved result with its log_data reattached from the restored tail state."""
+    state = _log_state.get((host, result.get('_log_path')))
+    return dict(result, log_data=state['history'] if state else SimHistory(0))
+
+
+def save_warm_start(path):
+    """Atomically write the current host snapshots and poller caches to path."""
+    with _warm_lock:
+        _save_warm_start(path)
+
+
+def _save_warm_start(path):
+    state = {
+        'saved_at': datetime.now().isoformat(),
+        'hosts': {
+            host: dict(snap, simulations=[_without_history(s) for s in snap.get('simulations', [])])
+            for host, snap in list(_host_snapshots.items())
+        },
+        'last_known': [[host, _without_history(result)] for (host, _), result in list(_last_known.items())],
+        'discovered': [[host, directory, sim] for (host, directory), sim in list(_discovered_cache.items())],
+    }
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        debug_path = DEBUG_LOG
+        with open(debug_path, 'a') as f:
+            f.write(f"save_warm_start failed: {e!r}\n")
+
+
+def load_warm_start(path):
+    """
+    Restore what save_warm_start wrote and return the fleet snapshot to serve
+    until the first poll lands: stale, and timestamped when it was saved.
+    Returns None when there is no usable file.
+    """
     try:
-        gpu = poll_gpu(host)
-    except Exception:
-        gpu = {'error': 'GPU poll failed'}
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for host, result in state.get('last_known', []):
+        _last_known.setdefault((host, result['name']), _with_history(host, result))
+    for host, directory, sim in state.get('discovered', []):
+        _discovered_cache.setdefault((host, directory), sim)
+    for host, snap in state.get('hosts', {}).items():
+        if host in _host_snapshots:
+            continue
+        _host_snapshots[host] = dict(snap, stale=True, simulations=[
+            _last_known.get((host, sim['name'])) or _with_history(host, sim)
+            for sim in snap.get('simulations', [])
+        ])
+    if not _host_snapshots:
+        return None
+    snapshot = merge_snapshots(dict(_host_snapshots))
+    snapshot['timestamp'] = state.get('saved_at')
+    return snapshot
+
+
+# --- log streaming ----------------------------------------------------------
+# Opt-in (stream=True): one long-lived ssh process per host runs `tail -F` on
+# every running sim's log, each line prefixed with the file's index, and new
+# rows go straight into the same tail state the polls use. Polls keep running
+# (less often for streamed sims) for process checks, discovery and catch-up,
+# so a dead stream only costs freshness.
+STREAM_FLUSH_INTERVAL = 0.5  # seconds of rows coalesced into one publish
+STREAM_RETRY = 5  # seconds before the first reconnect of a dropped stream
+STREAM_RETRY_MAX = 300
+
+# host -> LogStream
+_log_streams = {}
+
+
+def _stream_command(files):
+    """
+    Remote script following files [(path, inode, offset)], each from its byte
+    offset, with every line written as "<index>:<line>". A file that no longer
+    has that inode, or has shrunk below the offset, is left to the polls.
+    tail's own notices (truncation, rotation) come through as lines too.
+    The tails end with the script, which ends when our end of ssh closes.
+    """
+    parts = []
+    for i, (path, inode, offset) in enumerate(files):
+        parts.append(
+            f"st=$(stat -c '%i %s' {path} 2>/dev/null); "
+            f"if [ \"${{st%% *}}\" = \"{inode}\" ] && [ \"${{st#* }}\" -ge {offset} ]; then "
+            f"tail -F --pid=$$ -c +{offset + 1} {path} 2>&1 | sed -u 's/^/{i}:/' & fi"
+        )
+    # stdin stays open as long as the local ssh process does
+    return ' ; '.join(parts + ['cat > /dev/null'])
+
+
+class LogStream:
+    """
+    Follows the logs of one host's running sims over a single ssh process.
+    A reader thread owns the process: it (re)starts it whenever the followed
+    set changes, and after a drop reconnects with backoff, resuming every log
+    from the offset its tail state has reached.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self._lock = threading.Lock()
+        # [(sim name, target_ns, log key, tail state)] as last asked for by follow()
+        self._wanted = []
+        self._changed = threading.Event()
+        self._closed = False
+        self._proc = None
+        self._thread = threading.Thread(target=self._run, name=f'log-stream-{host}', daemon=True)
+        self._thread.start()
+
+    @property
+    def live(self):
+        """True while the ssh process is up."""
+        proc = self._proc
+        return proc is not None and proc.poll() is None
+
+    def following(self, name):
+        """True when sim `name` is followed by a live stream."""
+        with self._lock:
+            return self.live and any(sim == name for sim, *_ in self._wanted)
+
+    def follow(self, sims):
+        """
+        Follow the logs of sims [(name, target_ns, log path)]. Logs without
+        tail state yet (never polled) are skipped. The process is restarted
+        only when the set of logs, or a log's tail state, has changed.
+        """
+        wanted = []
+        with _log_lock:
+            for name, target_ns, log_path in sims:
+                state = _log_state.get((self.host, log_path))
+                if state is not None:
+                    wanted.append((name, target_ns, (self.host, log_path), state))
+        with self._lock:
+            if [(k, id(s)) for _, _, k, s in wanted] == [(k, id(s)) for _, _, k, s in self._wanted]:
+                return
+            self._wanted = wanted
+        self._changed.set()
+        self._kill()
+
+    def close(self):
+        self._closed = True
+        self._changed.set()
+        self._kill()
+
+    def _kill(self):
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
+    def _run(self):
+        retry = STREAM_RETRY
+        while not self._closed:
+            self._changed.clear()
+            with self._lock:
+                files = list(self._wanted)
+            if not files or _breaker_open(self.host):
+                # Nothing to follow, or the host is down: wait for follow() or a retry
+                self._changed.wait(retry if files else None)
+                continue
+            with _log_lock:
+                start = [(key[1], state['inode'], state['offset']) for _, _, key, state in files]
+            started = time.monotonic()
+            returncode = self._stream(files, start)
+            if self._closed or self._changed.is_set():
+                retry = STREAM_RETRY
+                continue
+            # The process died on its own: a dropped connection or a dead host
+            if returncode == 255:
+                _record_connection(self.host, False)
+            if time.monotonic() - started > retry:
+                retry = STREAM_RETRY
+            debug_path = DEBUG_LOG
+            with open(debug_path, 'a') as f:
+                f.write(f"log stream {self.host} exited ({returncode}), reconnecting in {retry}s\n")
+            self._changed.wait(retry)
+            retry = min(retry * 2, STREAM_RETRY_MAX)
+
+    def _stream(self, files, start):
+        """Run one ssh process over files until it exits; returns its exit code."""
+        _ensure_ssh_master(self.host)
+        try:
+            self._proc = subprocess.Popen(
+                [SSH_BINARY, *_ssh_options(), '-o', 'ControlMaster=no', self.host,
+                 _stream_command(start)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return 255
+        if self._changed.is_set():
+            # follow() ran while we were starting up; come back with the new set
+            self._kill()
+        offsets = [offset for _, _, offset in start]
+        lost = set()  # files tail reported as truncated or replaced
+        pending = {}
+        buffered = b''
+        flushed = time.monotonic()
+        fd = self._proc.stdout.fileno()
+        try:
+            while True:
+                ready, _, _ = select.select([fd], [], [], STREAM_FLUSH_INTERVAL)
+                if not ready and self._proc.poll() is not None:
+                    # Exited, though something it started may still hold the pipe
+                    break
+                if ready:
+                    chunk = os.read(fd, 65536)
+                    if not chunk:
+                        break
+                    lines, _, buffered = (buffered + chunk).rpartition(b'\n')
+                    for line in lines.split(b'\n') if lines else []:
+                        index, _, data = line.partition(b':')
+                        if not index.isdigit() or int(index) >= len(files) or int(index) in lost:
+                            continue
+                        i = int(index)
+                        if data.startswith(b'tail: '):
+                            # Offsets past this point are meaningless; the next
+                            # poll re-reads the file and follow() restarts us
+                            lost.add(i)
+                            continue
+                        pending.setdefault(i, []).append((offsets[i], data + b'\n'))
+                        offsets[i] += len(data) + 1
+                if pending and time.monotonic() - flushed >= STREAM_FLUSH_INTERVAL:
+                    self._flush(files, pending)
+                    pending = {}
+                    flushed = time.monotonic()
+        finally:
+            if pending:
+                self._flush(files, pending)
+            self._kill()
+            self._proc.stdin.close()
+            self._proc.stdout.close()
+        return self._proc.wait()
+
+    def _flush(self, files, pending):
+        """Feed buffered lines into their tail states and publish the sims that grew."""
+        grown = []
+        with _log_lock:
+            for i, chunks in pending.items():
+                name, target_ns, key, state = files[i]
+                # A poll reset this log (rotation, truncation) since we started
+                if _log_state.get(key) is not state:
+                    continue
+                _unspill(key, state)
+                rows, consumed = len(state['history']), state['offset']
+                for offset, data in chunks:
+                    _consume(state, offset, data)
+                if state['offset'] != consumed:
+                    _save_log(key, state, rows)
+                if len(state['history']) > rows:
+                    grown.append((name, target_ns, state['history'], _display_tail(state)))
+        if grown:
+            _stream_update(self.host, grown)
+
+
+def _stream_update(host, grown):
+    """
+    Refresh the progress of streamed sims [(name, target_ns, history, log_tail)]
+    in their last known results and host snapshot, and publish the fleet.
+    """
+    fresh = {name: _progress(history, target_ns) + (log_tail,)
+                for name, target_ns, history, log_tail in grown}
+    updated = {}
+    # Read and write back under the lock, so a poll cycle's newer result or
+    # snapshot is never overwritten by an updated copy of the one it replaced
+    with _results_lock:
+        for name, (sim_progress, finished, log_tail) in fresh.items():
+            previous = _last_known.get((host, name))
+            if previous is None:
+                continue
+            updated[name] = _last_known[(host, name)] = dict(
+                previous, **sim_progress, log_tail=log_tail,
+                status='completed' if finished else previous['status'])
+        snapshot = _host_snapshots.get(host)
+        if not updated or snapshot is None:
+            return
+        _host_snapshots[host] = dict(snapshot, simulations=[
+            updated.get(sim['name'], sim) for sim in snapshot['simulations']
+        ])
+        snapshots = dict(_host_snapshots)
+    _publish(merge_snapshots(snapshots))
+
+
+def _follow_logs(host, results):
+    """Point host's log stream at the sims of a fresh poll that are running."""
+    stream = _log_streams.get(host)
+    if stream is None:
+        stream = _log_streams[host] = LogStream(host)
+    stream.follow([
+        (sim['name'], sim['target_ns'], sim['_log_path'])
+        for sim in results['simulations']
+        if sim.get('status') == 'running' and sim.get('_log_path')
+    ])
+
+
+def close_log_streams():
+    """Stop every log stream (called at interpreter exit)."""
+    for stream in list(_log_streams.values()):
+        stream.close()
+    _log_streams.clear()
+
+
+atexit.register(close_log_streams)
+
+
+# --- asyncio engine ---------------------------------------------------------
+# Every SSH call is an asyncio subprocess, so any number of hosts and sims can
+# be in flight from one thread. Timeouts and cancellation kill the ssh process.
+
+async def _ssh_exec_async(host, command, timeout):
+    proc = await asyncio.create_subprocess_exec(
+        SSH_BINARY, *_ssh_options(), '-o', 'ControlMaster=no', host, command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException:
+        # Timed out or cancelled: don't leave the ssh process behind
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return proc.returncode, stdout.decode('utf-8', 'surrogateescape'), stderr.decode('utf-8', 'replace')
+
+
+async def _ensure_ssh_master_async(host):
+    checked = _ssh_masters.get(host)
+    if checked is not None and time.monotonic() - checked < SSH_HEALTH_INTERVAL:
+        return True
+    # Master upkeep is rare (once per SSH_HEALTH_INTERVAL) and shares the
+    # sync pool's lock, so it runs on a worker thread rather than the loop
+    return await asyncio.to_thread(_ensure_ssh_master, host)
+
+
+async def ssh_run_async(host, command, timeout=15):
+    """Async ssh_run: same pooled connection, breaker, return value and failure handling."""
+    if _breaker_open(host):
+        return None
+    try:
+        pooled = await _ensure_ssh_master_async(host)
+        returncode, stdout, stderr = await _ssh_exec_async(host, command, timeout)
+        if returncode == 255 and pooled:
+            # 255 is ssh's own failure code — the master likely dropped under us
+            await asyncio.to_thread(_drop_ssh_master, host)
+            await _ensure_ssh_master_async(host)
+            returncode, stdout, stderr = await _ssh_exec_async(host, command, timeout)
+        _record_connection(host, returncode != 255)
+        if returncode != 0 or not stdout.strip():
+            debug_path = DEBUG_LOG
+            with open(debug_path, 'a', errors='replace') as f:
+                f.write(f"ssh_run returncode={returncode}\n")
+                f.write(f"ssh_run stderr={stderr[:300]}\n")
+                f.write(f"ssh_run stdout={stdout[:300]}\n")
+        if stdout.strip():
+            return stdout.strip()
+        return None
+    except (asyncio.TimeoutError, OSError) as e:
+        _record_connection(host, False)
+        if isinstance(e, asyncio.TimeoutError):
+            # A hung call may mean a half-dead master; force a fresh one next time
+            await asyncio.to_thread(_drop_ssh_master, host)
+        debug_path = DEBUG_LOG
+        with open(debug_path, 'a') as f:
+            f.write(f"ssh_run exception: {e!r}\n")
+        return None
+
+
+async def poll_simulation_async(host, sim_config, timeout=15, processes=None):
+    """Async poll_simulation. Given the cycle's ProcessTable, no process scan is sent."""
+    if sim_config.get('status') == 'completed':
+        return _completed_result(host, sim_config)
+    command = _simulation_command(host, sim_config, processes=processes is None)
+    output = await ssh_run_async(host, command, timeout=timeout)
+    return _parse_simulation(host, sim_config, _split_sections(output) if output is not None else None,
+                             processes)
+
+
+async def _poll_one_async(host, sim, limit, timeout, processes=None):
+    async with limit:
+        try:
+            # Deadline starts once a worker slot is ours; covers master upkeep too
+            sim_result = await asyncio.wait_for(poll_simulation_async(host, sim, timeout, processes),
+                                                timeout + 5)
+        except asyncio.TimeoutError:
+            sim_result = dict(_parse_simulation(host, sim, None), error='Poll deadline exceeded')
+        except Exception as e:
+            return _poll_error_result(host, sim, e)
+    if sim.get('_auto_detected'):
+        sim_result['_auto_detected'] = True
+    return sim_result
+
+
+async def _poll_simulations_async(host, sims, max_workers, timeout, processes=None):
+    """Poll sims with at most max_workers in flight; results in input order."""
+    limit = asyncio.Semaphore(max(1, max_workers))
+    return await asyncio.gather(*(_poll_one_async(host, sim, limit, timeout, processes) for sim in sims))
+
+
+async def poll_all_async(host, simulations, batched=True, max_workers=MAX_WORKERS_PER_HOST,
+                         sim_timeout=SIM_TIMEOUT, discovery_roots=DISCOVERY_ROOTS, scheduled=False,
+                         poll_interval=POLL_INTERVAL, stream=False, collector=False,
+                         discovery_depth=DISCOVERY_DEPTH, memory_budget=HISTORY_MEMORY_BUDGET):
+    """Async poll_all for one host (without publishing)."""
+    now = time.monotonic()
+    if scheduled and host in _host_snapshots and host_due_at(host, simulations, poll_interval) > now:
+        return _host_snapshots[host]
+    # Sims not yet due are reported from their last poll
+    skip = _not_due(host, simulations, now) if scheduled else set()
+    # Sims show up on the first cycle; after that discovery has its own schedule
+    discover = host not in _host_discovered_at
+    if _breaker_open(host) and not await _probe_host_async(host):
+        results = _breaker_snapshot(host, simulations)
+    else:
+        if batched:
+            results = await _poll_all_batched(host, simulations, max_workers, sim_timeout,
+                                              discovery_roots, skip, discover, collector,
+                                              discovery_depth)
+        else:
+            results = await _poll_all_sequential(host, simulations, max_workers, sim_timeout,
+                                                 discovery_roots, skip, discover, discovery_depth)
+        if discover:
+            _host_discovered_at[host] = now
+    _host_polled_at[host] = now
+    if stream:
+        _follow_logs(host, results)
+    log_stream = _log_streams.get(host) if stream else None
+    for sim_result in results['simulations']:
+        if sim_result['name'] not in skip:
+            interval = _sim_interval(sim_result, poll_interval)
+            if log_stream is not None and log_stream.following(sim_result['name']):
+                # Rows arrive over the stream; polls only need to catch a stop
+                interval = max(interval, poll_interval)
+            _next_poll[(host, sim_result['name'])] = now + interval
+    if _store is not None and results is not _host_snapshots.get(host):
+        _store.add_samples(host, results, skip)
+    with _results_lock:
+        _host_snapshots[host] = results
+    # Keep the caches bounded: forget sims that are gone, spill cold histories
+    _forget_sims(host, simulations)
+    _spill_histories(memory_budget)
+    return _host_snapshots[host]
+
+
+def _sim_interval(result, poll_interval):
+    """Seconds until a sim with this poll result is due again."""
+    status = result.get('status')
+    if status == 'completed':
+        return poll_interval * COMPLETED_INTERVAL_FACTOR
+    if status == 'stopped':
+        return poll_interval * STOPPED_INTERVAL_FACTOR
+    if status != 'running':
+        # Unreachable or errored: the host's breaker paces the retries
+        return poll_interval
+    # Poll about as often as the log is written: fast sims more often than
+    # poll_interval, slow ones less (but still often enough to notice a stop)
+    interval = min(result.get('log_interval') or poll_interval, poll_interval * STOPPED_INTERVAL_FACTOR)
+    if result.get('eta'):
+        # Be there when it finishes
+        remaining = (datetime.fromisoformat(result['eta']) - datetime.now()).total_seconds()
+        interval = min(interval, remaining)
+    return max(SCHEDULE_MIN_INTERVAL, interval)
+
+
+def _not_due(host, simulations, now):
+    """Names of the host's known sims that have a last poll and aren't due yet."""
+    return {
+        sim['name'] for sim in merge_simulations(simulations, _cached_discoveries(host))
+        if (host, sim['name']) in _last_known and _next_poll.get((host, sim['name']), 0) > now
+    }
+
+
+def host_due_at(host, simulations, poll_interval=POLL_INTERVAL):
+    """Monotonic time a scheduled poll of host next has anything to do."""
+    # A heartbeat cycle (GPU, unchanged sims) at least once per poll_interval
+    due = [_host_polled_at.get(host, 0) + poll_interval]
+    for sim in merge_simulations(simulations, _cached_discoveries(host)):
+        if sim.get('status') != 'completed':
+            due.append(_next_poll.get((host, sim['name']), 0))
+    return max(min(due), _host_polled_at.get(host, 0) + HOST_MIN_INTERVAL)
+
+
+def fleet_due_at(fleet, poll_interval=POLL_INTERVAL):
+    """Monotonic time the earliest host of fleet is due a scheduled poll."""
+    return min((host_due_at(host, spec.get('simulations', []), poll_interval)
+                for host, spec in fleet.items()), default=0)
+
+
+async def _probe_host_async(host):
+    """
+    If host's open breaker is due a probe, try one bare connection and return
+    True when it succeeded (which closes the breaker).
+    """
+    if not _claim_probe(host):
+        return False
+    try:
+        # ControlMaster=no and no master upkeep: a single connection attempt
+        returncode, _, stderr = await _ssh_exec_async(host, 'true', BREAKER_PROBE_TIMEOUT)
+    except (asyncio.TimeoutError, OSError) as e:
+        returncode, stderr = 255, repr(e)
+    if returncode == 255:
+        debug_path = DEBUG_LOG
+        with open(debug_path, 'a') as f:
+            f.write(f"breaker probe of {host} failed: {stderr[:300]}\n")
+        return False
+    _record_connection(host, True)
+    return True
+
+
+def _breaker_snapshot(host, simulations):
+    """Snapshot for a host whose breaker is open, built without any SSH."""
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'simulations': [],
+        'gpu': {'error': 'Host unreachable (circuit open)'},
+        'reachable': False,
+    }
+    for sim in merge_simulations(simulations, _cached_discoveries(host)):
+        if sim.get('status') == 'completed':
+            sim_result = _completed_result(host, sim)
+        else:
+            sim_result = _parse_simulation(host, sim, None)
+        if sim.get('_auto_detected'):
+            sim_result['_auto_detected'] = True
+        results['simulations'].append(sim_result)
+    return results
+
+
+async def poll_fleet_async(fleet, publish=True, hosts=None, **kwargs):
+    """
+    Async poll_fleet. Hosts run as sibling tasks in one TaskGroup; a failure
+    on one host is contained to that host's snapshot.
+    """
+    hosts = list(fleet) if hosts is None else [host for host in hosts if host in fleet]
+    snapshots = {}
+
+    def merged():
+        # This cycle's results where in, the previous cycle's for hosts still in flight
+        return merge_snapshots({
+            host: snapshots.get(host) or _host_snapshots.get(host)
+            or {'timestamp': None, 'simulations': [], 'gpu': {'error': 'Polling...'}}
+            for host in fleet
+        })
+
+    async def one(host, spec):
+        previous = _host_snapshots.get(host)
+        try:
+            snapshot = await poll_all_async(host, spec.get('simulations', []),
+                                            discovery_roots=spec.get('discovery_roots', DISCOVERY_ROOTS),
+                                            discovery_depth=spec.get('discovery_depth', DISCOVERY_DEPTH),
+                                            **kwargs)
+        except Exception as e:
+            snapshot = {'timestamp': datetime.now().isoformat(), 'simulations': [],
+                        'gpu': {'error': f'Poll failed: {e}'}, 'reachable': False}
+        snapshots[host] = snapshot
+        # A scheduled host with nothing due hands back its previous snapshot
+        if publish and snapshot is not previous and len(snapshots) < len(hosts):
+            _publish(merged())
+
+    async with asyncio.TaskGroup() as group:
+        for host in hosts:
+            group.create_task(one(host, fleet[host]))
+    results = merged()
+    if publish:
+        _publish(results)
+    return results
+
+
+async def _poll_all_sequential(host, simulations, max_workers, sim_timeout, discovery_roots,
+                               skip=frozenset(), discover=True, discovery_depth=DISCOVERY_DEPTH):
+    """
+    Separate SSH calls for GPU, discovery and every simulation. Sims named in
+    skip are reported from _last_known; discover=False reuses cached discoveries.
+    """
+    gpu_output, discovery_output, process_output = await asyncio.gather(
+        ssh_run_async(host, GPU_COMMAND),
+        ssh_run_async(host, _discovery_command(roots=discovery_roots, depth=discovery_depth), timeout=20)
+        if discover else asyncio.sleep(0),
+        ssh_run_async(host, _process_table_command()),
+    )
+    gpu = _parse_gpu(gpu_output)
+    # One process scan for the whole cycle; without it each sim brings its own
+    processes = ProcessTable.from_sections(_split_sections(process_output)) if process_output else None
 
     # Auto-discover simulations and merge with manual config
+    if discovery_output is None:
+        discovered = _cached_discoveries(host)
+    else:
+        try:
+            discovered = _parse_discovery(host, _split_sections(discovery_output))
+        except Exception:
+            discovered = []
+    all_sims = merge_simulations(simulations, discovered)
+
+    # Only due sims whose log changed since the last cycle get their own SSH call
+    unchanged = {i: _last_known[(host, sim['name'])] for i, sim in enumerate(all_sims) if sim['name'] in skip}
+    unchanged.update(await _unchanged_sims_async(host, all_sims, skip, processes))
+    polled = iter(await _poll_simulations_async(
+        host, [sim for i, sim in enumerate(all_sims) if i not in unchanged], max_workers, sim_timeout,
+        processes))
+    sim_results = []
+    for i, sim in enumerate(all_sims):
+        sim_result = unchanged[i] if i in unchanged else next(polled)
+        if sim.get('_auto_detected'):
+            sim_result['_auto_detected'] = True
+        sim_results.append(sim_result)
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'simulations': sim_results,
+        'gpu': gpu,
+        'reachable': gpu_output is not None or discovery_output is not None,
+    }
+
+
+async def _unchanged_sims_async(host, sims, skip=frozenset(), processes=None):
+    """
+    Pre-check stage: stat every tracked log in one SSH call and return
+    {index: cached result} for the sims whose log is unchanged since its last
+    full read, with process state from processes when given. Completed sims
+    and those named in skip are left out.
+    """
+    known = {
+        i: stat for i, sim in enumerate(sims)
+        if sim.get('status') != 'completed' and sim['name'] not in skip
+        and (stat := _unchanged_stat(host, sim)) is not None
+    }
+    if not known:
+        return {}
+    # Paths unquoted in the word list so the remote shell expands ~
+    paths = ' '.join(_log_path(sims[i]) for i in known)
+    output = await ssh_run_async(
+        host, f"for f in {paths}; do stat -c '%i %s %Y' \"$f\" 2>/dev/null || echo MISSING; done")
+    if output is None:
+        return {}
+    return {
+        i: _unchanged_result(host, sims[i], processes)
+        for i, line in zip(known, output.split('\n')) if line.strip() == known[i]
+    }
+
+
+def _collector_script():
+    """(source, remote path) of the collector; the path changes with the source."""
+    with open(COLLECTOR_SOURCE, 'rb') as f:
+        source = f.read()
+    return source, f"{COLLECTOR_DIR}/collector-{hashlib.sha1(source).hexdigest()[:12]}.py"
+
+
+def _collector_command(request, install=False):
+    """
+    Remote command running the collector on request. Prints COLLECTOR_MISSING
+    when the script isn't installed (install=True ships it first) and
+    COLLECTOR_FAILED when it ran but failed.
+    """
+    source, path = _collector_script()
+    payload = base64.b64encode(json.dumps(request, separators=(',', ':')).encode('utf-8')).decode('ascii')
+    run = f"{{ {COLLECTOR_PYTHON} {path} {payload} || echo COLLECTOR_FAILED ; }}"
+    if install:
+        return (f"mkdir -p {COLLECTOR_DIR} && echo {base64.b64encode(source).decode('ascii')} | "
+                f"base64 -d > {path}.$$ && mv {path}.$$ {path} && {run}")
+    return f"if [ -f {path} ]; then {run}; else echo COLLECTOR_MISSING; fi"
+
+
+def _collector_sim(host, sim):
+    """
+    What the collector needs to know to read one sim's log: it reads from the
+    start of the line held back (so it only ever parses whole lines) on.
+    """
+    state = _log_state.get((host, _log_path(sim)))
+    return {
+        'log': _log_path(sim),
+        'inode': state['inode'] if state else '',
+        'offset': state['offset'] - len(state['partial']) if state else 0,
+        'known': _unchanged_stat(host, sim),
+    }
+
+
+async def _collect_async(host, sims, discovery_roots, discover, discovery_depth=DISCOVERY_DEPTH):
+    """
+    Run the remote collector for one batched cycle. Returns (ran, sections):
+    sections in the batched shell layout (GPU, DISCOVER:*, SIM<i>:*), or None
+    when the host couldn't be reached. ran is False when the collector itself
+    failed and the cycle should fall back to the shell script.
+    """
+    request = {
+        'gpu': True,
+        'discover': list(discovery_roots) if discover else None,
+        'depth': discovery_depth,
+        'tail': LOG_TAIL_LINES,
+        'parse_bytes': COLLECTOR_PARSE_BYTES,
+        'sims': [_collector_sim(host, sim) for sim in sims],
+    }
+    output = await ssh_run_async(host, _collector_command(request), timeout=30)
+    if output == 'COLLECTOR_MISSING':
+        output = await ssh_run_async(host, _collector_command(request, install=True), timeout=30)
+    if output is None:
+        return True, None
     try:
-        discovered = discover_simulations(host)
-    except Exception:
-        discovered = []
+        document = json.loads(output)
+        sections = {'GPU': document.get('gpu') or '', **document['processes']}
+        sections.update({f"DISCOVER:{k}": v for k, v in (document.get('discover') or {}).items()})
+        for i, sim_sections in enumerate(document['sims']):
+            if 'ROWS' in sim_sections:
+                # Parsed remotely: one list of values per LOG_COLUMNS column
+                table = np.array(sim_sections['ROWS'], dtype=np.float64).T
+                if table.ndim != 2 or table.shape[1] != len(LOG_COLUMNS):
+                    raise ValueError(f"collector rows of shape {table.shape}")
+                sim_sections['ROWS'] = table
+            sections.update({f"SIM{i}:{k}": v for k, v in sim_sections.items()})
+    except (ValueError, KeyError, TypeError, AttributeError):
+        _collector_failed[host] = time.monotonic()
+        debug_path = DEBUG_LOG
+        with open(debug_path, 'a') as f:
+            f.write(f"collector on {host} failed, polling by shell: {output[:300]!r}\n")
+        return False, None
+    return True, sections
+
+
+async def _poll_all_batched(host, simulations, max_workers, sim_timeout, discovery_roots,
+                            skip=frozenset(), discover=True, collector=False,
+                            discovery_depth=DISCOVERY_DEPTH):
+    """
+    Single round-trip poll cycle: GPU, discovery and every known simulation.
+    Sims named in skip are reported from _last_known; discover=False reuses
+    cached discoveries. collector=True gathers it all with the remote
+    collector, falling back to the shell script where that fails.
+    """
+    # Sims known before this cycle (manual + previously discovered) ride in the batch
+    known = merge_simulations(simulations, _cached_discoveries(host))
+    batch = {}
+    batched = []
+    for sim in known:
+        if sim.get('status') == 'completed' or sim['name'] in skip:
+            continue
+        batch[_normalize_sim_dir(sim['directory'])] = f"SIM{len(batch)}:"
+        batched.append(sim)
+
+    collected = False
+    if collector and time.monotonic() - _collector_failed.get(host, -COLLECTOR_RETRY) >= COLLECTOR_RETRY:
+        collected, sections = await _collect_async(host, batched, discovery_roots, discover,
+                                                   discovery_depth)
+    if not collected:
+        parts = ["echo '===GPU==='", GPU_COMMAND, _process_table_command()]
+        if discover:
+            parts.append(_discovery_command('DISCOVER:', discovery_roots, discovery_depth))
+        for i, sim in enumerate(batched):
+            parts.append(_simulation_command(host, sim, f"SIM{i}:", processes=False))
+        # The bare echo between parts puts every marker on a fresh line, even when
+        # the previous part's output (a json file, a half-written log) lacks a newline
+        combined = ' ; echo ; '.join(parts)
+        output = await ssh_run_async(host, combined, timeout=30)
+
+        debug_path = DEBUG_LOG
+        with open(debug_path, 'a') as f:
+            f.write(f"\n--- {datetime.now()} batched poll ({len(batch)} sims) ---\n")
+            f.write(f"output: {repr(output[:500]) if output else 'None'}\n")
+
+        sections = _split_sections(output) if output is not None else None
+
+    processes = None
+    if sections is None:
+        gpu = _parse_gpu(None)
+        discovered = _cached_discoveries(host)
+    else:
+        gpu = _parse_gpu(sections.get('GPU', '').strip() or None)
+        processes = ProcessTable.from_sections(sections)
+        try:
+            discovered = (_parse_discovery(host, _namespace(sections, 'DISCOVER:')) if discover
+                          else _cached_discoveries(host))
+        except Exception:
+            discovered = _cached_discoveries(host)
     all_sims = merge_simulations(simulations, discovered)
 
+    # Newly discovered this cycle — not in the batch, poll them on their own
+    followups = [
+        sim for sim in all_sims
+        if sim.get('status') != 'completed' and sim['name'] not in skip
+        and _normalize_sim_dir(sim['directory']) not in batch
+    ]
+    followup_results = iter(await _poll_simulations_async(host, followups, max_workers, sim_timeout,
+                                                          processes))
+
     results = {
         'timestamp': datetime.now().isoformat(),
         'simulations': [],
         'gpu': gpu,
+        'reachable': sections is not None,
     }
     for sim in all_sims:
         try:
-            sim_result = poll_simulation(host, sim)
+            prefix = batch.get(_normalize_sim_dir(sim['directory']))
+            if sim.get('status') == 'completed':
+                sim_result = _completed_result(host, sim)
+            elif sim['name'] in skip:
+                sim_result = _last_known[(host, sim['name'])]
+            elif prefix is None:
+                sim_result = next(followup_results)
+            elif sections is None:
+                sim_result = _parse_simulation(host, sim, None)
+            else:
+                sim_result = _parse_simulation(host, sim, _namespace(sections, prefix), processes)
             if sim.get('_auto_detected'):
                 sim_result['_auto_detected'] = True
             results['simulations'].append(sim_result)
         except Exception as e:
-            import traceback
-            debug_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug.log')
-            with open(debug_path, 'a') as f:
-                f.write(f"\npoll_simulation EXCEPTION for {sim['name']}: {e}\n")
-                traceback.print_exc(file=f)
-            results['simulations'].append({'name': sim['name'], 'status': 'error', 'percent': 0})
+            results['simulations'].append(_poll_error_result(host, sim, e))
     return results
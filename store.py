@@ -0,0 +1,565 @@
+"""
+On-disk history store.
+One SQLite database in WAL mode keeps, per (host, log path), the incremental
+tail state and every parsed production.log row, plus GPU and per-sim status
+samples from each poll. A restarted monitor reloads the tail states, so its
+first poll only fetches the bytes written while it was down.
+
+Rows are stored columnar: each chunk is one blob holding a raw NumPy buffer
+per LOG_COLUMNS field. Writes are buffered in memory and committed by a
+background thread, one transaction per flush.
+
+Old data is kept at decreasing resolution: the same thread periodically
+folds it into min/mean/max rollups at coarser tiers (see compact), and query
+reads each stretch of a series from the coarsest tier that is still fine
+enough for the resolution asked for.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from history import AXIS_COLUMNS, COLUMN_DTYPES, LOG_COLUMNS, SimHistory
+
+
+# Where debug output is appended, next to poller's (bench.py points it elsewhere)
+DEBUG_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug.log')
+
+# Seconds between background flushes of buffered writes
+STORE_FLUSH_INTERVAL = 5
+
+# A log stored as more chunks than this is merged into one when it is loaded
+COMPACT_CHUNKS = 64
+
+# Tiered retention, applied every ROLLUP_INTERVAL seconds by the writer thread.
+# GPU and status samples stay raw for RAW_RETENTION seconds; after that they
+# only survive as rollups, one row of n/min/mean/max per bucket, at each
+# (bucket seconds, seconds kept) tier of SAMPLE_TIERS (None: kept for good).
+ROLLUP_INTERVAL = 600
+RAW_RETENTION = 2 * 86400
+SAMPLE_TIERS = ((60, 30 * 86400), (3600, 365 * 86400), (86400, None))
+# Log rows are timed in simulation time, so they are rolled up over time_ps:
+# rows older than the last LOG_RAW_WINDOW ps of a log are folded into buckets
+# of each LOG_TIERS width (ps), which are kept as long as the log is. The
+# first row always stays raw: it marks the start of production.
+LOG_RAW_WINDOW = 50000
+LOG_TIERS = (100, 1000, 10000)
+
+GPU_FIELDS = ('gpu_util', 'mem_util', 'mem_used_mb', 'mem_total_mb', 'temperature')
+STATUS_FIELDS = ('current_ns', 'percent', 'speed')
+
+# series -> (raw sample table, key columns, rolled-up fields); log rows live in chunks
+SERIES = {
+    'gpu': ('gpu', ('host',), GPU_FIELDS),
+    'status': ('status', ('host', 'name'), STATUS_FIELDS),
+    'log': (None, ('host', 'path'), LOG_COLUMNS),
+}
+
+
+def _rollup_table(series):
+    _, keys, fields = SERIES[series]
+    stats = ', '.join(f'{f}_{s} REAL' for f in fields for s in ('min', 'mean', 'max'))
+    return (f"CREATE TABLE IF NOT EXISTS {series}_rollup ({', '.join(f'{k} TEXT' for k in keys)}, "
+            f"tier REAL, t REAL, n INTEGER, {stats}, PRIMARY KEY ({', '.join(keys)}, tier, t));\n")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    host TEXT, path TEXT, inode TEXT, offset INTEGER, partial BLOB, stat TEXT, tail TEXT,
+    PRIMARY KEY (host, path)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY, host TEXT, path TEXT, rows INTEGER,
+    t_first REAL, t_last REAL, data BLOB
+);
+CREATE INDEX IF NOT EXISTS chunks_log ON chunks (host, path, id);
+CREATE TABLE IF NOT EXISTS gpu (
+    host TEXT, t REAL, gpu_util REAL, mem_util REAL, mem_used_mb REAL,
+    mem_total_mb REAL, temperature REAL
+);
+CREATE INDEX IF NOT EXISTS gpu_host_t ON gpu (host, t);
+CREATE TABLE IF NOT EXISTS status (
+    host TEXT, name TEXT, t REAL, status TEXT, current_ns REAL, percent REAL, speed REAL
+);
+CREATE INDEX IF NOT EXISTS status_sim_t ON status (host, name, t);
+CREATE TABLE IF NOT EXISTS marks (name TEXT PRIMARY KEY, upto REAL);
+""" + ''.join(_rollup_table(series) for series in SERIES)
+
+
+def encode_rows(columns):
+    """{column: array} -> one blob of the LOG_COLUMNS buffers back to back."""
+    return b''.join(np.ascontiguousarray(columns[name], dtype=COLUMN_DTYPES[name]).tobytes()
+                    for name in LOG_COLUMNS)
+
+
+def decode_rows(data, rows):
+    """Inverse of encode_rows: {column: array} views into data."""
+    columns = {}
+    offset = 0
+    for name in LOG_COLUMNS:
+        dtype = np.dtype(COLUMN_DTYPES[name])
+        columns[name] = np.frombuffer(data, dtype=dtype, count=rows, offset=offset)
+        offset += dtype.itemsize * rows
+    return columns
+
+
+def rollup_columns(t, columns, width):
+    """
+    Fold time-sorted samples into width-wide buckets: (bucket starts, counts,
+    {field: (min, mean, max)}).
+    """
+    bucket = np.floor(np.asarray(t, dtype=np.float64) / width) * width
+    if not len(bucket):
+        return bucket, np.empty(0, dtype=np.int64), {f: (bucket,) * 3 for f in columns}
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    n = np.diff(np.r_[starts, len(bucket)])
+    stats = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        stats[name] = (np.minimum.reduceat(values, starts), np.add.reduceat(values, starts) / n,
+                       np.maximum.reduceat(values, starts))
+    return bucket[starts], n, stats
+
+
+def _merge(pieces, fields):
+    """
+    Concatenate (t, n, stats) pieces in time order, combining rows that share
+    a bucket start (a bucket half rolled up and half still raw).
+    """
+    pieces = [p for p in pieces if len(p[0])]
+    if not pieces:
+        empty = np.empty(0)
+        return empty, empty, {f: (empty,) * 3 for f in fields}
+    t = np.concatenate([p[0] for p in pieces])
+    n = np.concatenate([p[1] for p in pieces]).astype(np.float64)
+    order = np.argsort(t, kind='stable')
+    t, n = t[order], n[order]
+    starts = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+    total = np.add.reduceat(n, starts)
+    stats = {}
+    for f in fields:
+        lo, mean, hi = (np.concatenate([p[2][f][i] for p in pieces])[order] for i in range(3))
+        stats[f] = (np.minimum.reduceat(lo, starts), np.add.reduceat(mean * n, starts) / total,
+                    np.maximum.reduceat(hi, starts))
+    return t[starts], total, stats
+
+
+class HistoryStore:
+    """Buffered writer, retention engine and reader for the on-disk history database."""
+
+    def __init__(self, path, flush_interval=STORE_FLUSH_INTERVAL, rollup_interval=ROLLUP_INTERVAL):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        # (host, path) -> {'reset', 'chunks', 'state'}, and [(table, row)] samples
+        self._pending = {}
+        self._samples = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(flush_interval, rollup_interval),
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self, interval, rollup_interval):
+        compacted = time.monotonic()
+        while not self._stop.wait(interval):
+            self.flush()
+            if time.monotonic() - compacted >= rollup_interval:
+                compacted = time.monotonic()
+                try:
+                    self.compact()
+                except sqlite3.Error as e:
+                    with open(DEBUG_LOG, 'a') as f:
+                        f.write(f"history store compaction failed: {e!r}\n")
+
+    def close(self):
+        """Stop the writer thread, commit what is buffered and close the database."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    # --- writes (buffered) --------------------------------------------------
+
+    def save_log(self, key, state, columns=None, reset=False):
+        """
+        Buffer a tail state and the rows just appended to its history. reset
+        discards everything stored for the log so far (first read, truncation
+        or rotation); state=None removes the log altogether.
+        """
+        snapshot = None if state is None else {
+            'inode': state['inode'], 'offset': state['offset'], 'partial': state['partial'],
+            'stat': state.get('stat'), 'tail': list(state['tail']),
+        }
+        chunk = None
+        if columns is not None and len(columns['step']):
+            time_ps = columns['time_ps']
+            chunk = (len(time_ps), float(time_ps[0]), float(time_ps[-1]), encode_rows(columns))
+        with self._lock:
+            entry = self._pending.setdefault(key, {'reset': False, 'chunks': [], 'state': None})
+            if reset or state is None:
+                entry['reset'] = True
+                entry['chunks'] = []
+            if chunk is not None:
+                entry['chunks'].append(chunk)
+            entry['state'] = snapshot
+
+    def drop_log(self, key):
+        """Forget a log that no longer exists."""
+        self.save_log(key, None)
+
+    def add_samples(self, host, snapshot, skip=frozenset()):
+        """Buffer the GPU reading and per-sim status of one host poll snapshot."""
+        t = time.time()
+        samples = []
+        gpu = snapshot.get('gpu') or {}
+        if 'gpu_util' in gpu:
+            samples.append(('gpu', (host, t) + tuple(gpu.get(f) for f in GPU_FIELDS)))
+        for sim in snapshot.get('simulations', []):
+            if sim.get('name') in skip or sim.get('status') in ('unreachable', 'error'):
+                continue
+            samples.append(('status', (host, sim['name'], t, sim.get('status'), sim.get('current_ns'),
+                                       sim.get('percent'), sim.get('speed'))))
+        with self._lock:
+            self._samples.extend(samples)
+
+    def flush(self):
+        """Commit everything buffered so far in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            samples, self._samples = self._samples, []
+        if not pending and not samples:
+            return
+        with self._db_lock, self._db:
+            for (host, path), entry in pending.items():
+                if entry['reset']:
+                    self._db.execute('DELETE FROM chunks WHERE host = ? AND path = ?', (host, path))
+                    self._db.execute('DELETE FROM log_rollup WHERE host = ? AND path = ?', (host, path))
+                    self._db.execute('DELETE FROM marks WHERE name = ?', (self._log_mark(host, path),))
+                self._db.executemany(
+                    'INSERT INTO chunks (host, path, rows, t_first, t_last, data) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(host, path) + chunk for chunk in entry['chunks']])
+                state = entry['state']
+                if state is None:
+                    self._db.execute('DELETE FROM logs WHERE host = ? AND path = ?', (host, path))
+                else:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (host, path, state['inode'], state['offset'], state['partial'],
+                         state['stat'], json.dumps(state['tail'])))
+            self._db.executemany('INSERT INTO gpu VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                 [row for table, row in samples if table == 'gpu'])
+            self._db.executemany('INSERT INTO status VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                 [row for table, row in samples if table == 'status'])
+
+    # --- retention ----------------------------------------------------------
+
+    @staticmethod
+    def _log_mark(host, path):
+        return f'log:{host}:{path}'
+
+    def _mark(self, name):
+        """How far (t) a series has been rolled up; 0 before its first compaction."""
+        row = self._db.execute('SELECT upto FROM marks WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_mark(self, name, upto):
+        self._db.execute('INSERT OR REPLACE INTO marks VALUES (?, ?)', (name, upto))
+
+    def _roll_up(self, series, width, source, start, end, where='', params=()):
+        """
+        Insert (or refresh) series' width-tier buckets covering [start, end)
+        from source: None for the raw samples, or the width of a finer tier.
+        """
+        table, keys, fields = SERIES[series]
+        key_cols = ', '.join(keys)
+        if source is None:
+            count = 'COUNT(*)'
+            stats = ', '.join(f'MIN({f}), AVG({f}), MAX({f})' for f in fields)
+            origin, tier = table, ''
+        else:
+            count = 'SUM(n)'
+            stats = ', '.join(f'MIN({f}_min), SUM({f}_mean * n) / SUM(n), MAX({f}_max)' for f in fields)
+            origin, tier = f'{series}_rollup', f'AND tier = {source}'
+        self._db.execute(
+            f'INSERT OR REPLACE INTO {series}_rollup '
+            f'SELECT {key_cols}, ?, CAST(t / ? AS INTEGER) * ? AS bucket, {count}, {stats} '
+            f'FROM {origin} WHERE t >= ? AND t < ? {tier} {where} GROUP BY {key_cols}, bucket',
+            (width, width, width, start, end) + tuple(params))
+
+    def _compact_samples(self, series, now):
+        table = SERIES[series][0]
+        source, source_mark = None, now
+        marks = []
+        for width, keep in SAMPLE_TIERS:
+            name = f'{series}:{width}'
+            mark = self._mark(name)
+            # Only whole buckets, and only what the finer level already holds
+            end = math.floor(min(now, source_mark) / width) * width
+            if end > mark:
+                self._roll_up(series, width, source, mark, end)
+                self._set_mark(name, end)
+                mark = end
+            marks.append(mark)
+            source, source_mark = width, mark
+        # Expire only what the next tier up has already absorbed
+        self._db.execute(f'DELETE FROM {table} WHERE t < ?', (min(now - RAW_RETENTION, marks[0]),))
+        for i, (width, keep) in enumerate(SAMPLE_TIERS):
+            if keep is not None and i + 1 < len(SAMPLE_TIERS):
+                self._db.execute(f'DELETE FROM {series}_rollup WHERE tier = ? AND t < ?',
+                                 (width, min(now - keep, marks[i + 1])))
+
+    def _compact_log(self, host, path):
+        """Fold the rows of one log older than its raw window into the LOG_TIERS rollups."""
+        name = self._log_mark(host, path)
+        rolled = self._mark(name)
+        t_last = self._db.execute('SELECT MAX(t_last) FROM chunks WHERE host = ? AND path = ?',
+                                  (host, path)).fetchone()[0]
+        if t_last is None:
+            return
+        width = LOG_TIERS[0]
+        cutoff = math.floor((t_last - LOG_RAW_WINDOW) / width) * width
+        if cutoff <= rolled:
+            return
+        columns, _ = self._read_rows(host, path)
+        t = columns['time_ps']
+        old = (t >= rolled) & (t < cutoff)
+        if old.any():
+            starts, n, stats = rollup_columns(t[old], {f: columns[f][old] for f in LOG_COLUMNS}, width)
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO log_rollup VALUES ({', '.join('?' * (5 + 3 * len(LOG_COLUMNS)))})",
+                [(host, path, width, float(starts[i]), int(n[i]))
+                 + tuple(float(stats[f][j][i]) for f in LOG_COLUMNS for j in range(3))
+                 for i in range(len(starts))])
+            # Coarser buckets touched by the new rows are recomputed whole
+            for finer, coarser in zip(LOG_TIERS, LOG_TIERS[1:]):
+                self._roll_up('log', coarser, finer, math.floor(rolled / coarser) * coarser, cutoff,
+                              'AND host = ? AND path = ?', (host, path))
+        keep = t >= cutoff
+        keep[0] = True
+        self._db.execute('DELETE FROM chunks WHERE host = ? AND path = ?', (host, path))
+        self._db.execute(
+            'INSERT INTO chunks (host, path, rows, t_first, t_last, data) VALUES (?, ?, ?, ?, ?, ?)',
+            (host, path, int(keep.sum()), float(t[keep][0]), float(t[keep][-1]),
+             encode_rows({f: columns[f][keep] for f in LOG_COLUMNS})))
+        self._set_mark(name, cutoff)
+
+    def compact(self, now=None):
+        """
+        One retention pass: roll finished buckets of every series up through
+        its tiers, then drop raw samples and fine rollups past their retention.
+        """
+        now = time.time() if now is None else now
+        self.flush()
+        with self._db_lock:
+            with self._db:
+                for series in ('gpu', 'status'):
+                    self._compact_samples(series, now)
+            for host, path in self._db.execute('SELECT host, path FROM logs').fetchall():
+                with self._db:
+                    self._compact_log(host, path)
+
+    # --- reads --------------------------------------------------------------
+
+    def load_logs(self):
+        """
+        Every stored log as (host, path) -> {'inode', 'offset', 'partial',
+        'stat', 'tail', 'history'}, the history rebuilt from its chunks and
+        finest rollups. Logs stored in more than COMPACT_CHUNKS chunks are
+        rewritten as one.
+        """
+        logs = {}
+        with self._db_lock:
+            states = self._db.execute(
+                'SELECT host, path, inode, offset, partial, stat, tail FROM logs').fetchall()
+            for host, path, inode, offset, partial, stat, tail in states:
+                history = self._read_history(host, path, compact=True)
+                if isinstance(partial, str):
+                    # Saved before held-back lines were kept as raw bytes
+                    partial = partial.encode('utf-8')
+                logs[(host, path)] = {
+                    'inode': inode, 'offset': offset, 'partial': partial, 'stat': stat,
+                    'tail': json.loads(tail), 'history': history,
+                }
+        return logs
+
+    def load_history(self, key):
+        """The stored rows of one log as a SimHistory (commits buffered writes first)."""
+        self.flush()
+        with self._db_lock:
+            return self._read_history(*key)
+
+    def _read_rows(self, host, path, compact=False):
+        """The raw rows stored for a log, as {column: array}, and how many chunks held them."""
+        chunks = self._db.execute(
+            'SELECT rows, t_first, t_last, data FROM chunks WHERE host = ? AND path = ? ORDER BY id',
+            (host, path)).fetchall()
+        parts = [decode_rows(data, rows) for rows, _, _, data in chunks]
+        columns = {name: np.concatenate([p[name] for p in parts]) if parts
+                   else np.empty(0, dtype=COLUMN_DTYPES[name]) for name in LOG_COLUMNS}
+        if compact and len(chunks) > COMPACT_CHUNKS:
+            with self._db:
+                self._db.execute('DELETE FROM chunks WHERE host = ? AND path = ?', (host, path))
+                self._db.execute(
+                    'INSERT INTO chunks (host, path, rows, t_first, t_last, data) VALUES (?, ?, ?, ?, ?, ?)',
+                    (host, path, len(columns['step']), chunks[0][1], chunks[-1][2], encode_rows(columns)))
+        return columns, len(chunks)
+
+    def _read_history(self, host, path, compact=False):
+        """
+        A log's history: its raw rows, with the stretch already rolled up
+        filled in by one row per finest-tier bucket. That row holds the bucket
+        means, except for step and time_ps: those come from the bucket's last
+        row, so the restored history has no steps the log never wrote.
+        """
+        columns, _ = self._read_rows(host, path, compact)
+        t, n, stats = self._read_tier('log', (host, path), LOG_COLUMNS, LOG_TIERS[0])
+        if len(t):
+            sums = {f: stats[f][1] * n for f in LOG_COLUMNS}
+            # The first row stays raw although it was rolled up too: take it
+            # back out of its bucket so it isn't counted twice
+            early = columns['time_ps'] < self._mark(self._log_mark(host, path))
+            if early.any():
+                width = LOG_TIERS[0]
+                bucket = np.floor(columns['time_ps'][early] / width) * width
+                index = np.minimum(np.searchsorted(t, bucket), len(t) - 1)
+                hit = t[index] == bucket
+                np.subtract.at(n, index[hit], 1)
+                for f in LOG_COLUMNS:
+                    np.subtract.at(sums[f], index[hit], columns[f][early][hit])
+            rolled = n > 0
+            rows = {f: (stats[f][2][rolled] if f in AXIS_COLUMNS else sums[f][rolled] / n[rolled])
+                    .astype(COLUMN_DTYPES[f]) for f in LOG_COLUMNS}
+            merged = {f: np.concatenate([columns[f], rows[f]]) for f in LOG_COLUMNS}
+            order = np.argsort(merged['time_ps'], kind='stable')
+            columns = {f: merged[f][order] for f in LOG_COLUMNS}
+        history = SimHistory(max(len(columns['step']), 1))
+        history.append(columns)
+        return history
+
+    def _read_tier(self, series, key, fields, width, start=-math.inf, end=math.inf, last=math.inf):
+        """Stored width-tier buckets of one series key starting in [start, end) and at most at last."""
+        _, keys, _ = SERIES[series]
+        stat_cols = ', '.join(f'{f}_{s}' for f in fields for s in ('min', 'mean', 'max'))
+        where = ' AND '.join(f'{k} = ?' for k in keys)
+        rows = self._db.execute(
+            f'SELECT t, n, {stat_cols} FROM {series}_rollup WHERE {where} AND tier = ? '
+            f'AND t >= ? AND t < ? AND t <= ? ORDER BY t', tuple(key) + (width, start, end, last)).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), 2 + 3 * len(fields))
+        stats = {f: tuple(data[:, 2 + 3 * i + j] for j in range(3)) for i, f in enumerate(fields)}
+        return data[:, 0], data[:, 1], stats
+
+    def _read_raw(self, series, key, fields, start=-math.inf, end=math.inf):
+        """Raw samples (t, {field: values}) of one series key with t in [start, end]."""
+        table, keys, _ = SERIES[series]
+        if table is None:
+            columns, _ = self._read_rows(*key)
+            t = columns['time_ps'].astype(np.float64)
+            mask = (t >= start) & (t <= end)
+            return t[mask], {f: columns[f][mask].astype(np.float64) for f in fields}
+        where = ' AND '.join(f'{k} = ?' for k in keys)
+        rows = self._db.execute(
+            f"SELECT t, {', '.join(fields)} FROM {table} WHERE {where} AND t >= ? AND t <= ? ORDER BY t",
+            tuple(key) + (start, end)).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), 1 + len(fields))
+        return data[:, 0], {f: data[:, 1 + i] for i, f in enumerate(fields)}
+
+    def _raw_floor(self, series, key):
+        """Where a key's raw samples begin; anything earlier exists only as rollups."""
+        if series == 'log':
+            return self._mark(self._log_mark(*key))
+        table, keys, _ = SERIES[series]
+        where = ' AND '.join(f'{k} = ?' for k in keys)
+        row = self._db.execute(f'SELECT MIN(t) FROM {table} WHERE {where}', tuple(key)).fetchone()
+        return row[0] if row[0] is not None else math.inf
+
+    def _span(self, series, key):
+        """(first, last) t held for a key at any resolution, or None when empty."""
+        _, keys, _ = SERIES[series]
+        where = ' AND '.join(f'{k} = ?' for k in keys)
+        if series == 'log':
+            raw = self._db.execute(f'SELECT MIN(t_first), MAX(t_last) FROM chunks WHERE {where}',
+                                   tuple(key)).fetchone()
+        else:
+            raw = self._db.execute(f'SELECT MIN(t), MAX(t) FROM {series} WHERE {where}',
+                                   tuple(key)).fetchone()
+        rolled = self._db.execute(f'SELECT MIN(t), MAX(t + tier) FROM {series}_rollup WHERE {where}',
+                                  tuple(key)).fetchone()
+        firsts = [v for v in (raw[0], rolled[0]) if v is not None]
+        lasts = [v for v in (raw[1], rolled[1]) if v is not None]
+        return (min(firsts), max(lasts)) if firsts else None
+
+    def query(self, series, key, fields=None, start=None, end=None, max_points=None):
+        """
+        One series ('gpu' by (host,), 'status' by (host, name), 'log' by
+        (host, path)) over t in [start, end]: wall-clock seconds, or time_ps
+        for logs. With max_points the coarsest tier whose buckets are no wider
+        than (end - start) / max_points is read, otherwise the raw samples;
+        stretches a level no longer holds come from the next coarser one, and
+        buckets not rolled up yet are built from the raw samples on the fly.
+
+        Returns {'tier': bucket width or None for raw, 't', 'n', field: means,
+        field_min, field_max} of NumPy arrays; t is each bucket's start.
+        Raises ValueError for a field the series doesn't have.
+        """
+        fields = tuple(fields or SERIES[series][2])
+        # Field names end up in the SQL, so only the series' own columns get through
+        unknown = set(fields) - set(SERIES[series][2])
+        if unknown:
+            raise ValueError(f"unknown {series} fields: {', '.join(sorted(unknown))}")
+        self.flush()
+        tiers = LOG_TIERS if series == 'log' else tuple(width for width, _ in SAMPLE_TIERS)
+        with self._db_lock:
+            span = self._span(series, key)
+            if span is None:
+                t, n, stats = _merge([], fields)
+                return self._result(None, t, n, stats, fields)
+            start = span[0] if start is None else start
+            end = span[1] if end is None else end
+            resolution = (end - start) / max_points if max_points and end > start else 0
+            fine_enough = [width for width in tiers if width <= resolution]
+            chosen = fine_enough[-1] if fine_enough else None
+            levels = [None] + list(tiers) if chosen is None else tiers[tiers.index(chosen):]
+            raw_floor = self._raw_floor(series, key)
+            pieces = []
+            upper = math.inf  # everything from here on is covered by a finer level
+            for width in levels:
+                if width is None:
+                    t, values = self._read_raw(series, key, fields, max(start, raw_floor), end)
+                    pieces.append((t, np.ones(len(t)), {f: (values[f],) * 3 for f in fields}))
+                    covered = t[0] if len(t) else upper
+                else:
+                    mark = (self._mark(self._log_mark(*key)) if series == 'log'
+                            else self._mark(f'{series}:{width}'))
+                    # Whole buckets only: each must end where the finer data begins
+                    stored = self._read_tier(series, key, fields, width, start, mark,
+                                             min(end, upper - width))
+                    pieces.append(stored)
+                    covered = stored[0][0] if len(stored[0]) else min(upper, mark)
+                    if width == chosen and mark <= end:
+                        # Newer than the last compaction: bucket the raw samples now
+                        t, values = self._read_raw(series, key, fields, max(start, mark, raw_floor), end)
+                        pieces.append(rollup_columns(t, values, width))
+                upper = min(upper, covered)
+                if upper <= start:
+                    break
+        t, n, stats = _merge(pieces, fields)
+        return self._result(chosen, t, n, stats, fields)
+
+    @staticmethod
+    def _result(tier, t, n, stats, fields):
+        result = {'tier': tier, 't': t, 'n': n}
+        for f in fields:
+            result[f'{f}_min'], result[f], result[f'{f}_max'] = stats[f]
+        return result
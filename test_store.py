@@ -0,0 +1,84 @@
+"""
+HistoryStore reads after a log has been compacted, checked against the raw
+rows that went in.
+"""
+
+import numpy as np
+import pytest
+
+from history import LOG_COLUMNS
+from store import LOG_RAW_WINDOW, LOG_TIERS, HistoryStore, rollup_columns
+
+KEY = ('node1', '/data/sim/production.log')
+ROWS = 40000
+
+
+def _raw_rows():
+    rng = np.random.default_rng(0)
+    step = np.arange(ROWS, dtype=np.int64) * 1000
+    columns = {name: rng.normal(size=ROWS) for name in LOG_COLUMNS}
+    columns['step'] = step
+    columns['time_ps'] = step * 0.002
+    return columns
+
+
+@pytest.fixture
+def compacted(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'), flush_interval=3600, rollup_interval=3600)
+    columns = _raw_rows()
+    state = {'inode': 1, 'offset': 0, 'partial': b'', 'stat': None, 'tail': []}
+    store.save_log(KEY, state, columns, reset=True)
+    store.compact()
+    yield store, columns
+    store.close()
+
+
+def _cutoff(columns):
+    width = LOG_TIERS[0]
+    return np.floor((columns['time_ps'][-1] - LOG_RAW_WINDOW) / width) * width
+
+
+def test_compaction_rolls_up_old_rows(compacted):
+    store, columns = compacted
+    raw = store.query('log', KEY, fields=('step',))
+    assert raw['tier'] is None
+    assert raw['t'][0] < LOG_TIERS[0]
+    assert raw['n'].sum() == ROWS
+
+
+def test_read_history_counts_each_row_once(compacted):
+    store, columns = compacted
+    history = store.load_history(KEY)
+    t = columns['time_ps']
+    cutoff = _cutoff(columns)
+    old = t < cutoff
+    old[0] = False
+    starts, n, stats = rollup_columns(t[old], {f: columns[f][old] for f in LOG_COLUMNS}, LOG_TIERS[0])
+    assert len(history) == 1 + len(starts) + (t >= cutoff).sum()
+
+    # The first row comes back as written, then one row per bucket without it
+    assert all(history[0][f] == columns[f][0] for f in LOG_COLUMNS)
+    rolled = slice(1, 1 + len(starts))
+    for f in ('potential_energy', 'temperature', 'speed_ns_day'):
+        np.testing.assert_allclose(history.column(f)[rolled], stats[f][1])
+    # Axis columns are the bucket's last row: steps the log actually wrote
+    np.testing.assert_array_equal(history.column('step')[rolled], stats['step'][2].astype(np.int64))
+    assert np.isin(history.column('step'), columns['step']).all()
+
+    recent = slice(1 + len(starts), None)
+    for f in LOG_COLUMNS:
+        np.testing.assert_array_equal(history.column(f)[recent], columns[f][t >= cutoff])
+
+
+def test_query_tiers_match_raw_rows(compacted):
+    store, columns = compacted
+    t = columns['time_ps']
+    for width in LOG_TIERS:
+        result = store.query('log', KEY, fields=('potential_energy',), start=0, end=t[-1],
+                             max_points=int(t[-1] // width))
+        assert result['tier'] == width
+        starts, n, stats = rollup_columns(t, {'potential_energy': columns['potential_energy']}, width)
+        np.testing.assert_array_equal(result['t'], starts)
+        np.testing.assert_array_equal(result['n'], n)
+        for i, suffix in enumerate(('_min', '', '_max')):
+            np.testing.assert_allclose(result['potential_energy' + suffix], stats['potential_energy'][i])